@@ -1,13 +1,43 @@
 # AbletonMCP/__init__.py
 from __future__ import absolute_import, print_function, unicode_literals
 from _Framework.ControlSurface import ControlSurface
-import socket, json, threading, traceback, re
+import socket, json, struct, threading, traceback, time, collections, itertools, types
 import Live
+from .task_queue import TaskQueue, needs_focus, classify, write_key, FOCUS_COMMANDS, LANES, REALTIME, INTERACTIVE
+from .browser_index import BrowserIndex, entry_id
+from .lom_paths import LomResolver, PathObservers
+from .session_state import SessionState
+from .modulation import ModulationEngine
+from .transaction import normalize_op, resolve_refs
+from .wire import FrameDecoder, encode_frame, encode_message, decode_message, WIRE_PROTOCOL
 
 try: import Queue as queue
 except ImportError: import queue
 
+try: string_types = (str, unicode)
+except NameError: string_types = (str,)
+
 DEFAULT_PORT, HOST = 9877, "localhost"
+# Budget de temps (ms) accordé à la file de commandes à chaque tick du thread principal
+TICK_BUDGET_MS, MIN_TICK_BUDGET_MS = 20.0, 4.0
+# Budget (ms) de construction de l'index du Browser à chaque rafraîchissement d'affichage
+BROWSER_INDEX_BUDGET_MS = 8.0
+# Ticks laissés à Live après un changement de piste sélectionnée, avant de charger depuis le Browser
+FOCUS_SETTLE_TICKS = 2
+# Les flux sont émis depuis update_display (~10 Hz) : au-delà, la cadence est plafonnée
+MAX_STREAM_RATE_HZ = 10.0
+# Notes insérées par appel à add_new_notes : les grosses parties sont réparties sur plusieurs ticks
+NOTE_CHUNK = 256
+NOTE_FIELDS = ("pitch", "start", "dur", "vel", "mute")
+NOTE_DEFAULTS = {"vel": 100, "mute": False}
+# Deux débuts de note plus proches que cela (en beats) désignent la même note lors d'une synchronisation
+NOTE_TIME_EPSILON = 1e-4
+# Étendue temporelle "tout le clip" (les notes peuvent dépasser la fin de boucle)
+ALL_NOTES_SPAN = 1e6
+# Ticks récents conservés pour les centiles de temps passé et de profondeur de file
+TICK_HISTORY = 512
+
+_now = getattr(time, "perf_counter", time.time)
 
 def create_instance(c_instance): return AbletonMCP(c_instance)
 
@@ -17,18 +47,48 @@ class AbletonMCP(ControlSurface):
         self.log_message("==============================================")
         self.log_message("   AbletonMCP V26 - FINAL C++ & LOM FIX       ")
         self.log_message("==============================================")
-        self._task_queue = queue.Queue()
+        self._task_queue = TaskQueue()
+        self._focus_batch, self._focus_track, self._focus_ready_tick = collections.deque(), None, 0
+        # Tâches longues suspendues par une commande temps réel qui a elle-même démarré une tâche longue
+        self._suspended_jobs = []
         self._is_processing = False
+        self._schedule_lock = threading.Lock()
+        self._tick_budget = self._effective_budget = TICK_BUDGET_MS / 1000.0
+        self._task_costs = {}
+        self._tick_stats = {"ticks": 0, "tasks": 0, "focus_switches": 0, "last_spent_ms": 0.0, "avg_spent_ms": 0.0, "overruns": 0, "max_queue_depth": 0,
+                            "cancelled": 0, "expired": 0, "coalesced": 0}
+        self._tick_history = collections.deque(maxlen=TICK_HISTORY)
+        self._clients = set()
+        self._lom = LomResolver()
+        self._observers = PathObservers(self._lom, lambda client, paths: client.send({"event": "invalidate", "paths": paths}))
+        self._session = SessionState(self.song)
+        self._subscriptions, self._sub_ids = {}, itertools.count(1)
+        self._current_task = None
+        self._job, self._job_deadline = None, None
+        self._modulation = ModulationEngine(self.song, self.log_message)
+        self._browser_index = BrowserIndex(lambda: Live.Application.get_application().browser, self.log_message)
         self.running = True
         self.start_server()
 
     def disconnect(self):
         self.running = False
+        for client in list(self._clients): client.close()
+        self._observers.clear()
+        self._lom.clear()
+        self._session.clear()
         if hasattr(self, 'server') and self.server: 
             try: self.server.close()
             except: pass
         ControlSurface.disconnect(self)
 
+    def update_display(self):
+        ControlSurface.update_display(self)
+        try: self._browser_index.step(BROWSER_INDEX_BUDGET_MS / 1000.0)
+        except Exception as e: self.log_message("(AbletonMCP) Browser index error: " + str(e))
+        if self._modulation: self._modulation.tick()
+        if self._subscriptions: self._pump_streams()
+        self._observers.flush()
+
     def start_server(self):
         try:
             self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -41,58 +101,362 @@ class AbletonMCP(ControlSurface):
         except: self.log_message("Server Error: " + traceback.format_exc())
 
     def _listen(self):
+        # Une connexion persistante par client : chaque accept lance son propre lecteur
         while self.running:
             try:
                 conn, addr = self.server.accept()
-                data = conn.recv(65536)
-                if data:
-                    try:
-                        req = json.loads(data.decode('utf-8'))
-                        self._process_request(conn, req)
-                    except: conn.close()
-                else: conn.close()
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                client = _Client(self, conn)
+                self._clients.add(client)
+                client.start()
             except: pass
 
-    def _process_request(self, conn, req):
+    def _client_closed(self, client):
+        self._clients.discard(client)
+        self._observers.drop_client(client)
+        for sub_id, sub in list(self._subscriptions.items()):
+            if sub["client"] is client: self._subscriptions.pop(sub_id, None)
+
+    def _process_request(self, client, req):
         cmd_type = req.get("type") or req.get("command")
         params = req.get("params", {})
-        try:
-            conn.sendall(json.dumps({"status": "queued"}).encode('utf-8'))
-            conn.close()
-        except: pass
+        task = _Task(cmd_type, params, client, req.get("id"), req.get("reply", "ack"), req.get("timeout"), req.get("trace"),
+                     classify(cmd_type, params, req.get("priority")), req.get("tag"), req.get("deadline_ms"))
+        if cmd_type == "hello":
+            # Négociation de l'encodage, sans passer par le thread principal
+            client.binary = "binary" in params.get("encodings", ()) and params.get("protocol") == WIRE_PROTOCOL and not client.legacy
+            encodings = ["binary", "json"] if client.binary else ["json"]
+            client.send(task.stamp({"status": "success", "result": {"protocol": WIRE_PROTOCOL, "encodings": encodings}}))
+            return
+        if cmd_type == "ping":
+            # Battement de cœur : réponse immédiate, même quand le thread principal est occupé
+            client.send(task.stamp({"status": "success", "result": {"pong": True, "ticks": self._tick_stats["ticks"],
+                                                                    "queued": self._task_queue.qsize(), "busy": self._job is not None}}))
+            return
+        if cmd_type == "cancel":
+            # Annulation immédiate, sans attendre derrière les tâches qu'elle vise
+            try: client.send(task.stamp({"status": "success", "result": self._cancel(client, params)}))
+            except Exception as e: client.send(task.stamp({"status": "error", "message": str(e)}))
+            return
+        if task.reply != "result":
+            client.send(task.stamp({"status": "queued", "lane": LANES[task.lane]}))
         if cmd_type:
             params["_retry_count"] = 0
-            self._task_queue.put((cmd_type, params))
+            # Écriture fusionnée dans une écriture en attente sur la même cible : rien de plus à exécuter
+            if self._task_queue.put(task) is not None: self._tick_stats["coalesced"] += 1
+            self._wake_queue()
+        else: self._reply(task, error="Missing command type")
+
+    def _wake_queue(self):
+        with self._schedule_lock:
             if not self._is_processing:
                 self._is_processing = True
                 self.schedule_message(1, self._process_queue)
 
+    def _cancel(self, client, params):
+        """Annule les tâches de ce client désignées par "ids", ou filtrées par "tag" et/ou "lanes".
+
+        Les tâches en file sont retirées et reçoivent l'erreur "Cancelled" ; celles du lot à focus et les
+        tâches longues en cours sont marquées et s'arrêtent à leur prochain passage sur le thread principal.
+        """
+        ids, tag, lanes = set(params.get("ids") or ()), params.get("tag"), params.get("lanes")
+        if not ids and tag is None and lanes is None: raise ValueError("cancel needs ids, tag or lanes")
+        unknown = [lane for lane in lanes or () if lane not in LANES]
+        if unknown: raise ValueError("Unknown lanes: " + ", ".join(unknown))
+        lanes = None if lanes is None else [LANES.index(lane) for lane in lanes]
+        def match(t):
+            if t.client is not client or t.cancelled: return False
+            # Une écriture fusionnée est annulée en bloc, avec toutes les requêtes qu'elle a absorbées
+            if ids: return any(f.req_id in ids for f in (t,) + t.followers)
+            return (tag is None or t.tag == tag) and (lanes is None or t.lane in lanes)
+        removed = self._task_queue.remove(match)
+        for task in removed:
+            task.cancelled = True
+            self._reply(task, error="Cancelled: " + str(task.cmd_type))
+        running = [t for t in list(self._focus_batch) + [job[0] for job in [self._job] + self._suspended_jobs if job] if match(t)]
+        for task in running: task.cancelled = True
+        self._tick_stats["cancelled"] += len(removed)
+        return {"cancelled": [f.req_id for t in removed + running for f in (t,) + t.followers], "queued": len(removed), "running": len(running)}
+
+    def _drop_expired(self):
+        """Répond tout de suite aux tâches dont l'échéance est passée pendant leur attente, sans les exécuter."""
+        for task in self._task_queue.pop_expired():
+            self._tick_stats["expired"] += 1
+            self._reply(task, error="Deadline exceeded before execution: " + str(task.cmd_type))
+
+    def _reply(self, task, result=None, error=None):
+        """Renvoie le résultat réel (ou l'erreur) aux clients qui l'ont demandé, y compris aux écritures
+        fusionnées dans cette tâche ; celles dont la valeur a été remplacée sont marquées "superseded"."""
+        group = (task,) + task.followers
+        for i, t in enumerate(group):
+            if t.reply != "result": continue
+            msg = {"status": "error", "message": error} if error is not None else {"status": "success", "result": result}
+            if i < len(group) - 1: msg["superseded"] = True
+            if t.trace is not None: msg["timing"] = t.timing(self._tick_stats["ticks"])
+            t.client.send(t.stamp(msg))
+
     def _process_queue(self):
-        if self._task_queue.empty():
-            self._is_processing = False
-            return
-        cmd_type, params = self._task_queue.get()
+        """Vide la file tant que le budget du tick le permet ; le reste passe au tick suivant."""
+        started, executed = _now(), 0
+        tick = self._tick_stats["ticks"]
+        self._drop_expired()
+        while True:
+            # Voie temps réel (transport, lancement) : passe avant la tâche longue en cours et le lot à focus
+            task, from_batch = self._task_queue.get(max_lane=REALTIME), False
+            if task is None:
+                # Une tâche longue (générateur) reste en tête de file jusqu'à sa fin, pour préserver l'ordre
+                if self._job is not None and not self._advance_job(started + self._effective_budget): break
+                from_batch = bool(self._focus_batch) and tick >= self._focus_ready_tick
+                if from_batch: task = self._focus_batch.popleft()
+                # Pendant que la sélection se stabilise, seules les tâches arrivées avant le lot avancent
+                else: task = self._task_queue.get(before=self._focus_batch[0].seq if self._focus_batch else None)
+            if task is None: break
+            # Tâche annulée ou périmée : réponse immédiate, sans budget ni changement de focus
+            if task.cancelled or task.expired():
+                self._run_task(task)
+                continue
+            # On s'arrête avant une tâche dont le coût estimé dépasserait le budget restant
+            if executed and _now() - started + self._task_costs.get(task.cmd_type, 0.0) > self._effective_budget:
+                if from_batch: self._focus_batch.appendleft(task)
+                else: self._task_queue.put_front(task)
+                task.count("requeues")
+                break
+            if not from_batch and needs_focus(task):
+                self._start_focus_batch(task, tick)
+                continue
+            if from_batch and not self._ensure_focus(tick):
+                self._focus_batch.appendleft(task)
+                continue
+            t0 = _now()
+            self._run_task(task)
+            cost = _now() - t0
+            prev = self._task_costs.get(task.cmd_type)
+            self._task_costs[task.cmd_type] = cost if prev is None else prev * 0.8 + cost * 0.2
+            executed += 1
+        self._adapt_budget(_now() - started, executed)
+        with self._schedule_lock:
+            if self._task_queue.empty() and not self._focus_batch and self._job is None:
+                self._is_processing = False
+                return
+        self.schedule_message(1, self._process_queue)
+
+    def _start_focus_batch(self, task, tick):
+        """Regroupe les commandes à focus consécutives de la même piste : une seule sélection par lot."""
+        self._focus_track = task.params.get("track_index")
+        self._focus_batch.extend([task] + self._task_queue.take_focus_run(task))
+        self._focus_ready_tick = tick
+        self._ensure_focus(tick)
+
+    def _ensure_focus(self, tick):
+        """Sélectionne la piste du lot si besoin ; False tant que la sélection n'est pas stabilisée."""
+        target = self._track_by_index(self._focus_track)
+        if target is None or self.song().view.selected_track == target: return tick >= self._focus_ready_tick
+        # FIX FOCUS : Toujours passer par l'objet Track pour éviter l'erreur C++, puis laisser 2 ticks à Live
+        self.song().view.selected_track = target
+        self._focus_ready_tick = tick + FOCUS_SETTLE_TICKS
+        self._tick_stats["focus_switches"] += 1
+        for waiting in self._focus_batch: waiting.count("focus_waits")
+        return False
+
+    def _track_by_index(self, t_idx):
+        """Piste par index global : pistes, puis pistes de retour, puis Master."""
+        if t_idx is None: return None
+        all_tracks = list(self.song().tracks) + list(self.song().return_tracks) + [self.song().master_track]
+        return all_tracks[t_idx] if 0 <= t_idx < len(all_tracks) else None
+
+    def _adapt_budget(self, spent, executed):
+        """Mesure le temps réellement passé dans le tick et ajuste le budget effectif."""
+        stats = self._tick_stats
+        stats["ticks"] += 1
+        stats["tasks"] += executed
+        stats["last_spent_ms"] = spent * 1000.0
+        stats["avg_spent_ms"] = stats["avg_spent_ms"] * 0.9 + spent * 100.0
+        depth = self._task_queue.qsize() + len(self._focus_batch)
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], depth)
+        self._tick_history.append((spent * 1000.0, depth))
+        if spent > self._effective_budget:
+            stats["overruns"] += 1
+            self._effective_budget = max(MIN_TICK_BUDGET_MS / 1000.0, self._effective_budget * 0.8)
+        else:
+            self._effective_budget = min(self._tick_budget, self._effective_budget * 1.1)
+
+    def _run_task(self, task):
+        cmd_type, params = task.cmd_type, task.params
         try:
-            # FIX FOCUS : Toujours convertir l'index en objet Track pour éviter l'erreur C++
-            t_idx = params.get("track_index")
-            if t_idx is not None:
-                all_tracks = list(self.song().tracks) + list(self.song().return_tracks) + [self.song().master_track]
-                if t_idx < len(all_tracks):
-                    target = all_tracks[t_idx]
-                    if self.song().view.selected_track != target:
-                        self.song().view.selected_track = target
-                        self._task_queue.put((cmd_type, params))
-                        self.schedule_message(2, self._process_queue)
-                        return
-
-            if cmd_type == "load_device": self._load_device_by_name(params)
-            elif cmd_type == "load_sample": self._load_sample(params)
-            elif cmd_type == "universal_accessor": self._universal_accessor(params)
-            elif cmd_type == "add_midi_notes": self._add_midi_notes(params)
-            elif cmd_type == "set_device_param": self._set_device_param_by_name(params)
+            if task.cancelled:
+                self._reply(task, error="Cancelled: " + str(cmd_type))
+                return
+            if task.expired():
+                self._tick_stats["expired"] += 1
+                self._reply(task, error="Deadline exceeded before execution: " + str(cmd_type))
+                return
+            handler = self._handlers().get(cmd_type)
+            if handler is None: raise ValueError("Unknown command: " + str(cmd_type))
+            self._current_task = task
+            task.begin_slice(self._tick_stats["ticks"])
+            result = handler(params)
+            if isinstance(result, types.GeneratorType):
+                task.end_slice()
+                if self._job is not None: self._suspended_jobs.append(self._job)
+                self._job = (task, result)
+                return
             self.log_message("(AbletonMCP) Done: " + str(cmd_type))
-        except Exception as e: self.log_message("(AbletonMCP) Error: " + str(e))
-        self.schedule_message(5, self._process_queue)
+            self._reply(task, result=_serialize(result))
+        except Exception as e:
+            self.log_message("(AbletonMCP) Error: " + str(e))
+            self._reply(task, error=str(e))
+
+    def _advance_job(self, deadline):
+        """Fait avancer la tâche longue en cours jusqu'à la fin du budget ; True si elle est terminée.
+
+        Le générateur produit un dict de progression par morceau de travail, puis un _Result final ;
+        _NEXT_TICK rend la main jusqu'au tick suivant (attente de Live).
+        """
+        task, job = self._job
+        progress, self._job_deadline = None, deadline
+        task.begin_slice(self._tick_stats["ticks"])
+        try:
+            while task.client.alive and not task.cancelled:
+                item = next(job)
+                if isinstance(item, _Result):
+                    self._end_job()
+                    self.log_message("(AbletonMCP) Done: " + str(task.cmd_type))
+                    self._reply(task, result=_serialize(item.value))
+                    return True
+                if item is _NEXT_TICK: break
+                progress = item
+                if _now() > deadline: break
+            else:
+                self._end_job()
+                job.close()
+                if task.cancelled: self._reply(task, error="Cancelled: " + str(task.cmd_type))
+                return True
+        except Exception as e:
+            self._end_job()
+            self.log_message("(AbletonMCP) Error: " + str(e))
+            self._reply(task, error=str(e))
+            return True
+        task.end_slice()
+        if progress is not None and task.req_id is not None:
+            progress.update(event="progress", id=task.req_id)
+            task.client.send(progress)
+        return False
+
+    def _end_job(self):
+        """Termine la tâche longue en cours et reprend celle qu'une commande temps réel avait suspendue."""
+        self._job = self._suspended_jobs.pop() if self._suspended_jobs else None
+
+    def _configure_scheduler(self, params):
+        """Règle le budget par tick et renvoie les mesures du planificateur."""
+        if params.get("tick_budget_ms") is not None:
+            self._tick_budget = max(MIN_TICK_BUDGET_MS, float(params["tick_budget_ms"])) / 1000.0
+            self._effective_budget = self._tick_budget
+        stats = dict(self._tick_stats)
+        stats["tick_budget_ms"] = self._tick_budget * 1000.0
+        stats["effective_budget_ms"] = self._effective_budget * 1000.0
+        stats["queue_depth"] = self._task_queue.qsize() + len(self._focus_batch)
+        stats["lanes"] = self._task_queue.depths()
+        history = list(self._tick_history)
+        stats["recent"] = {"ticks": len(history), "spent_ms": _percentiles([h[0] for h in history]),
+                           "queue_depth": _percentiles([h[1] for h in history])}
+        if params.get("reset_peaks"): stats["max_queue_depth"] = self._tick_stats["max_queue_depth"] = 0
+        return stats
+
+    def _handlers(self):
+        return {
+            "load_device": self._load_device_by_name,
+            "load_sample": self._load_sample,
+            "universal_accessor": self._universal_accessor,
+            "add_midi_notes": self._add_midi_notes,
+            "sync_notes": self._sync_notes,
+            "clear_midi_notes": self._clear_midi_notes,
+            "set_device_param": self._set_device_param_by_name,
+            "add_automation": self._add_automation,
+            "start_modulation": self._start_modulation,
+            "update_modulation": self._update_modulation,
+            "stop_modulation": self._stop_modulation,
+            "list_modulations": lambda params: self._modulation.describe(),
+            "search_browser": self._search_browser,
+            "batch_get": self._batch_get,
+            "get_session_info": self._get_session_info,
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe,
+            "configure_scheduler": self._configure_scheduler,
+            "transaction": self._transaction,
+        }
+
+    def _transaction(self, params):
+        """Exécute une liste ordonnée d'opérations en une seule passe et un seul pas d'annulation.
+
+        Une opération qui doit laisser Live travailler (sélection de la piste avant un chargement, device
+        inséré) ou qui dépasse le budget du tick coupe la transaction : le pas d'annulation est refermé
+        avant de rendre la main et rouvert à la reprise, pour que ni Live ni les autres commandes n'y
+        écrivent. Une transaction avec chargements peut donc occuper plusieurs pas d'annulation.
+
+        ops : [{"type": ..., "params": {...}} | {"get"/"set"/"call": chemin, "value": v}, ...], chaque opération
+        pouvant porter "as" (nom du résultat) et "when" (condition, souvent une référence {"$ref": "nom"}).
+        Les paramètres peuvent référencer un résultat précédent : {"$ref": "nom.clé"} ou {"$ref": index}.
+        stop_on_error (défaut True) : les opérations suivant une erreur ne sont pas exécutées.
+        """
+        ops = [normalize_op(op, i) for i, op in enumerate(params.get("ops") or [])]
+        if not ops: raise ValueError("Empty transaction")
+        return self._transaction_job(ops, params.get("stop_on_error", True))
+
+    def _transaction_job(self, ops, stop_on_error):
+        song, handlers = self.song(), self._handlers()
+        results, named, report, failed = [], {}, [], None
+        undo = hasattr(song, "begin_undo_step")
+        if undo: song.begin_undo_step()
+        try:
+            for i, (cmd_type, params, alias, when) in enumerate(ops):
+                if failed is not None and stop_on_error:
+                    results.append(None)
+                    report.append({"skipped": True, "reason": "previous error"})
+                    continue
+                try:
+                    if not resolve_refs(when, results, named):
+                        results.append(None)
+                        report.append({"skipped": True})
+                        continue
+                    params = resolve_refs(params, results, named)
+                    handler = handlers.get(cmd_type)
+                    if handler is None: raise ValueError("Unknown command: " + str(cmd_type))
+                    # Chargement depuis le Browser : sélection de la piste, puis on laisse Live la prendre en compte
+                    target = self._track_by_index(params.get("track_index")) if cmd_type in FOCUS_COMMANDS else None
+                    if target is not None and song.view.selected_track != target:
+                        song.view.selected_track = target
+                        for _ in range(FOCUS_SETTLE_TICKS):
+                            for item in self._outside_undo(song, undo, _NEXT_TICK): yield item
+                    result = handler(params)
+                    if isinstance(result, types.GeneratorType):
+                        for item in result:
+                            if isinstance(item, _Result):
+                                result = item.value
+                                break
+                            # Opération longue : elle continue dans la même passe tant que le budget du tick le permet
+                            if item is not _NEXT_TICK and _now() < self._job_deadline: continue
+                            for pause in self._outside_undo(song, undo, item): yield pause
+                    # On laisse Live insérer le device chargé avant que les opérations suivantes ne le cherchent
+                    if cmd_type in FOCUS_COMMANDS:
+                        for item in self._outside_undo(song, undo, _NEXT_TICK): yield item
+                    result = _serialize(result)
+                    results.append(result)
+                    report.append({"ok": True, "result": result})
+                    if alias: named[alias] = result
+                except Exception as e:
+                    failed = i if failed is None else failed
+                    results.append(None)
+                    report.append({"ok": False, "error": str(e)})
+        finally:
+            if undo: song.end_undo_step()
+        yield _Result({"results": report, "completed": sum(1 for r in report if r.get("ok")), "failed": failed})
+
+    def _outside_undo(self, song, undo, item):
+        """Rend la main (item) hors du pas d'annulation de la transaction, rouvert à la reprise."""
+        if undo: song.end_undo_step()
+        try: yield item
+        finally:
+            if undo: song.begin_undo_step()
 
     def _universal_accessor(self, params):
         action, path_str, value = params.get("action"), params.get("path", ""), params.get("value")
@@ -102,34 +466,78 @@ class AbletonMCP(ControlSurface):
             try:
                 idx = int(value)
                 self.song().view.selected_track = self.song().tracks[idx]
-                return
+                return idx
             except: pass
 
-        obj_data = self._navigate_and_execute(path_str)
-        if obj_data:
-            obj, attr = obj_data
-            if action == "set":
-                val = float(value) if hasattr(obj, "min") else value
-                setattr(obj, attr, val)
-            elif action == "call":
-                getattr(obj, attr)(value) if value is not None else getattr(obj, attr)()
+        if action == "get":
+            if params.get("observe"): return self._observed_read(path_str)
+            return self._read_path(path_str)
+        obj, attr = self._navigate_and_execute(path_str)
+        if attr is None: raise ValueError("Path has no attribute to " + str(action) + ": " + str(path_str))
+        if action == "set":
+            val = float(value) if hasattr(obj, "min") else value
+            setattr(obj, attr, val)
+            return getattr(obj, attr)
+        elif action == "call":
+            return getattr(obj, attr)(value) if value is not None else getattr(obj, attr)()
+        raise ValueError("Unknown action: " + str(action))
 
     def _navigate_and_execute(self, path_str):
-        path_str = path_str.replace("live_set", "song").replace(" ", ".")
-        path_str = re.sub(r'([a-zA-Z_]+)\.([\d]+)', r'\1[\2]', path_str)
-        obj = self.song() if path_str.startswith("song") else self
-        path_str = path_str.replace("song.", "").replace("song", "").strip(".")
-        parts = [p for p in path_str.split(".") if p]
-        curr = obj
-        for part in parts[:-1]:
-            try:
-                if "[" in part:
-                    name, key = part.split("[")[0], part.split("[")[1].replace("]", "").strip('"')
-                    coll = getattr(curr, name)
-                    curr = coll[int(key)] if key.isdigit() else next((x for x in coll if key.lower() in x.name.lower()), coll[0])
-                else: curr = getattr(curr, part)
-            except: return None
-        return (curr, parts[-1])
+        """Résout un chemin LOM (compilé une fois puis servi par le cache) en (objet, attribut)."""
+        compiled = self._lom.compile(path_str)
+        try: obj = self._lom.walk(self.song() if compiled.root == "song" else self, compiled.steps)
+        except (AttributeError, IndexError, TypeError): raise ValueError("Path not found: " + str(path_str))
+        return obj, compiled.attr
+
+    def _read_path(self, path_str):
+        compiled = self._lom.compile(path_str)
+        try: return self._lom.read(self.song() if compiled.root == "song" else self, compiled)
+        except (AttributeError, IndexError, TypeError): raise ValueError("Path not found: " + str(path_str))
+
+    def _observed_read(self, path_str):
+        """Lecture + listeners d'invalidation pour le cache du serveur ("observed" False : pas de listener possible)."""
+        value = self._read_path(path_str)
+        compiled = self._lom.compile(path_str)
+        observed = self._observers.observe(self.song() if compiled.root == "song" else self, compiled, self._current_task.client)
+        return {"value": value, "observed": observed}
+
+    def _batch_get(self, params):
+        """Lit plusieurs chemins (avec [*] et {projection}) dans le même tick : un seul aller-retour."""
+        values = {}
+        for path_str in params.get("paths", []):
+            try: values[path_str] = self._read_path(path_str)
+            except Exception as e: values[path_str] = {"error": str(e)}
+        return values
+
+    def _get_session_info(self, params):
+        """Instantané versionné de la session ; avec since_version, seulement les changements depuis."""
+        since = params.get("since_version")
+        return self._session.query(int(since) if since is not None else None)
+
+    def _subscribe(self, params):
+        """Abonne le client à des propriétés (mètres, position de lecture, paramètres...) poussées à cadence fixe."""
+        rate = max(0.1, min(float(params.get("rate_hz", MAX_STREAM_RATE_HZ)), MAX_STREAM_RATE_HZ))
+        paths = [self._lom.compile(p) for p in params.get("paths", [])]
+        if not paths: raise ValueError("No paths to subscribe to")
+        sub_id = next(self._sub_ids)
+        self._subscriptions[sub_id] = {"client": self._current_task.client, "paths": paths, "interval": 1.0 / rate, "next": 0.0}
+        return {"subscription": sub_id, "rate_hz": rate}
+
+    def _unsubscribe(self, params):
+        return {"removed": self._subscriptions.pop(params.get("subscription"), None) is not None}
+
+    def _pump_streams(self):
+        """Envoie une trame à chaque abonnement arrivé à échéance (thread principal, sans requête du serveur)."""
+        now = time.time()
+        for sub_id, sub in list(self._subscriptions.items()):
+            if now < sub["next"]: continue
+            due = sub["next"] + sub["interval"]
+            sub["next"] = due if due > now else now + sub["interval"]
+            values = []
+            for compiled in sub["paths"]:
+                try: values.append(_serialize(self._lom.read(self.song() if compiled.root == "song" else self, compiled)))
+                except Exception: values.append(None)
+            sub["client"].send({"event": "stream", "subscription": sub_id, "t": now, "values": values})
 
     def _load_device_by_name(self, params):
         name = str(params.get("device_name", "")).lower().strip()
@@ -137,59 +545,364 @@ class AbletonMCP(ControlSurface):
         
         # PRIORITÉ : Effets audio si on est sur une piste audio ou si le nom n'indique pas un instrument
         is_kit = "kit" in name or "drum" in name
-        cats = [browser.audio_effects, browser.instruments, browser.drums, browser.packs]
-        if is_kit: cats = [browser.drums, browser.packs, browser.instruments]
-
-        def find_r(node, target):
-            if hasattr(node, 'is_loadable') and node.is_loadable:
-                n_name = node.name.lower()
-                if n_name.endswith(('.wav', '.aif', '.mp3')): return None
-                if target == n_name: return node # Match exact
-                if target in n_name: return node # Match partiel
-            if hasattr(node, 'children'):
-                for child in node.children:
-                    res = find_r(child, target)
-                    if res: return res
-            return None
+        cats = ["audio_effects", "instruments", "drums", "packs"]
+        if is_kit: cats = ["drums", "packs", "instruments"]
 
         found = None
-        for cat in cats:
-            found = find_r(cat, name)
-            if found: break
-        if found: 
-            browser.load_item(found)
-            self.log_message("(AbletonMCP) Loaded Device: " + str(found.name))
+        for item in self._find_browser_item(name, cats, devices_only=True, item_id=params.get("item_id")):
+            if isinstance(item, _Result):
+                found = item.value
+                break
+            yield item
+        if not found: raise ValueError("Device not found: " + (params.get("item_id") or name))
+        browser.load_item(found)
+        self.log_message("(AbletonMCP) Loaded Device: " + str(found.name))
+        yield _Result({"loaded": found.name})
 
     def _load_sample(self, params):
         name = str(params.get("sample_name", "")).lower().strip()
         browser = Live.Application.get_application().browser
-        roots = [browser.samples, browser.user_library] + (list(browser.user_folders) if hasattr(browser, 'user_folders') else [])
-        def find_s(node, target):
-            if hasattr(node, 'is_loadable') and node.is_loadable:
-                if target in node.name.lower(): return node
-            if hasattr(node, 'children'):
-                for child in node.children:
-                    res = find_s(child, target)
-                    if res: return res
-            return None
         found = None
-        for r in roots:
-            found = find_s(r, name)
-            if found: break
-        if found:
-            self.log_message("(AbletonMCP) FOUND SAMPLE: " + str(found.name))
-            browser.load_item(found)
+        for item in self._find_browser_item(name, ["samples", "user_library", "user_folders"], item_id=params.get("item_id")):
+            if isinstance(item, _Result):
+                found = item.value
+                break
+            yield item
+        if not found: raise ValueError("Sample not found: " + (params.get("item_id") or name))
+        self.log_message("(AbletonMCP) FOUND SAMPLE: " + str(found.name))
+        browser.load_item(found)
+        yield _Result({"loaded": found.name})
+
+    def _find_browser_item(self, name, categories, devices_only=False, item_id=None):
+        """Recherche dans l'index du Browser (simple lookup, plus de parcours récursif à chaque appel).
+
+        Générateur (tâche longue) terminé par _Result(élément ou None) : attend par tranches un index en
+        construction. Un élément absent de l'index (ajouté depuis, dans un sous-dossier) relance la
+        reconstruction en tâche de fond et est cherché par un parcours direct limité du Browser.
+        item_id : identifiant renvoyé par search_browser, chargé tel quel sans nouvelle recherche.
+        """
+        index = self._browser_index
+        for progress in index.building(): yield progress
+        entry = index.find(item_id) if item_id else index.lookup(name, categories, devices_only)
+        found = index.resolve(entry) if entry else None
+        if found is None:
+            index.invalidate()
+            if not item_id:
+                self.log_message("(AbletonMCP) Not in Browser index, walking the Browser: " + name)
+                for found in index.walk_live(name, categories, devices_only):
+                    if found is not None: break
+                    yield {"walking": name}
+        yield _Result(found)
+
+    def _search_browser(self, params):
+        """Meilleurs candidats du Browser pour une requête, avec score, catégorie et chemin.
+
+        Générateur (tâche longue) : le classement est réparti sur les ticks par tranches de candidats.
+        """
+        index = self._browser_index
+        for progress in index.building(): yield progress
+        query, categories = str(params.get("query", "")), params.get("categories") or None
+        for ranked in index.search(query, categories, int(params.get("limit", 10))):
+            if ranked is None: yield {"searching": query}
+        yield _Result([{"id": entry_id(e), "name": e[0], "score": score, "category": e[1], "path": "/".join(e[2])}
+                       for score, e in ranked])
 
     def _add_midi_notes(self, params):
+        """Ajoute des notes par morceaux de NOTE_CHUNK, répartis sur les ticks (tâche longue).
+
+        notes : colonnes parallèles {"pitch": [...], "start": [...], "dur": [...], "vel": [...], "mute": [...]}
+        (une liste de dicts par note reste acceptée).
+        """
+        clip = self._midi_clip(params)
+        cols = _note_columns(params.get("notes") or {})
+        return self._note_job(clip, cols, len(cols["pitch"]))
+
+    def _midi_clip(self, params):
         clip = self.song().tracks[params.get("track_index")].clip_slots[params.get("clip_index")].clip
-        notes = [Live.Clip.MidiNoteSpecification(pitch=int(n['pitch']), start_time=float(n['start']), duration=float(n['dur']), velocity=int(n['vel'])) for n in params.get("notes", [])]
-        clip.add_new_notes(tuple(notes))
+        if clip is None: raise ValueError("No clip in this slot")
+        if not clip.is_midi_clip: raise ValueError("Not a MIDI clip")
+        return clip
+
+    def _clear_midi_notes(self, params):
+        clip = self._midi_clip(params)
+        removed = len(clip.get_notes_extended(0, 128, 0.0, ALL_NOTES_SPAN))
+        clip.remove_notes_extended(0, 128, 0.0, ALL_NOTES_SPAN)
+        return {"removed": removed}
+
+    def _sync_notes(self, params):
+        """Aligne les notes d'un clip (ou d'une zone) sur l'ensemble voulu en n'appliquant que les différences.
+
+        Une note existante et une note voulue de même hauteur et même début sont la même note : seules
+        la durée, la vélocité ou le mute sont alors modifiés. Les notes existantes sans correspondance
+        dans la zone sont supprimées, les notes voulues sans correspondance ajoutées (par morceaux).
+        region : {"pitch_low", "pitch_high", "start", "end"} (défaut : tout le clip).
+        """
+        clip = self._midi_clip(params)
+        region = params.get("region") or {}
+        low, high = int(region.get("pitch_low", 0)), int(region.get("pitch_high", 127))
+        start = float(region.get("start", 0.0))
+        end = float(region["end"]) if region.get("end") is not None else start + ALL_NOTES_SPAN
+        cols = _note_columns(params.get("notes") or {})
+        total = len(cols["pitch"])
+        for i in range(total):
+            if not (low <= int(cols["pitch"][i]) <= high and start <= float(cols["start"][i]) < end):
+                raise ValueError("Note outside the sync region: pitch " + str(cols["pitch"][i]) + " at " + str(cols["start"][i]))
+        existing = clip.get_notes_extended(low, high - low + 1, start, end - start)
+        return self._sync_job(clip, existing, cols, total)
+
+    def _sync_job(self, clip, existing, cols, total):
+        key = lambda pitch, t: (int(pitch), int(round(float(t) / NOTE_TIME_EPSILON)))
+        wanted = {}
+        for i in range(total): wanted.setdefault(key(cols["pitch"][i], cols["start"][i]), collections.deque()).append(i)
+        removed, modified, matched = [], 0, set()
+        for note in existing:
+            candidates = wanted.get(key(note.pitch, note.start_time))
+            if not candidates:
+                removed.append(note.note_id)
+                continue
+            i = candidates.popleft()
+            matched.add(i)
+            dur, vel, mute = float(cols["dur"][i]), float(cols["vel"][i]), bool(cols["mute"][i])
+            if abs(note.duration - dur) > NOTE_TIME_EPSILON or abs(note.velocity - vel) > 1e-6 or bool(note.mute) != mute:
+                note.duration, note.velocity, note.mute = dur, vel, mute
+                modified += 1
+        # Modifications d'abord : le vecteur renvoyé par get_notes_extended contient encore les notes à supprimer
+        if modified: clip.apply_note_modifications(existing)
+        if removed: clip.remove_notes_by_id(removed)
+        added = [i for i in range(total) if i not in matched]
+        yield {"done": 0, "total": len(added), "removed": len(removed), "modified": modified}
+        for item in self._note_job(clip, dict((f, [cols[f][i] for i in added]) for f in NOTE_FIELDS), len(added)):
+            if isinstance(item, _Result): break
+            yield item
+        yield _Result({"added": len(added), "removed": len(removed), "modified": modified, "unchanged": len(matched) - modified})
+
+    def _note_job(self, clip, cols, total):
+        spec = Live.Clip.MidiNoteSpecification
+        pitch, start, dur, vel, mute = [cols[f] for f in NOTE_FIELDS]
+        for first in range(0, total, NOTE_CHUNK):
+            last = min(total, first + NOTE_CHUNK)
+            clip.add_new_notes(tuple(spec(pitch=int(pitch[i]), start_time=float(start[i]), duration=float(dur[i]), velocity=int(vel[i]), mute=bool(mute[i])) for i in range(first, last)))
+            yield {"done": last, "total": total}
+        yield _Result({"added": total})
 
     def _set_device_param_by_name(self, params):
-        d_name, p_name, val = params.get("device_name").lower(), params.get("param_name").lower(), float(params.get("value"))
-        for dev in self.song().view.selected_track.devices:
-            if d_name in dev.name.lower():
-                for p in dev.parameters:
-                    if p_name in p.name.lower():
-                        p.value = max(p.min, min(p.max, val))
-                        return True
\ No newline at end of file
+        dev, p = self._device_param(params)
+        p.value = max(p.min, min(p.max, float(params.get("value"))))
+        return {"device": dev.name, "param": p.name, "value": p.value}
+
+    def _device_param(self, params):
+        """(device, paramètre) désignés par device_name / param_name sur la piste track_index."""
+        d_name, p_name = params.get("device_name").lower(), params.get("param_name").lower()
+        # Pas besoin du focus : on résout directement l'objet Track
+        track = self._track_by_index(params.get("track_index")) or self.song().view.selected_track
+        dev = self._lom.find_by_name(track, "devices", d_name)
+        p = self._lom.find_by_name(dev, "parameters", p_name) if dev is not None else None
+        if p is None: raise ValueError("Parameter not found: " + d_name + " > " + p_name)
+        return dev, p
+
+    def _start_modulation(self, params):
+        """Lance un modulateur (lfo, ramp, steps) sur un paramètre désigné par device_name/param_name ou par path."""
+        if params.get("path"):
+            param = self._read_path(params["path"])
+            device = getattr(param, "canonical_parent", None) or param
+        else: device, param = self._device_param(params)
+        if not hasattr(param, "min"): raise ValueError("Not a device parameter: " + str(params.get("path")))
+        mod = self._modulation.start(params.get("kind", "lfo"), param, device, params.get("config"), params.get("clock", "song"))
+        return mod.describe()
+
+    def _update_modulation(self, params):
+        return self._modulation.update(params.get("id"), params.get("config"), bool(params.get("restart"))).describe()
+
+    def _stop_modulation(self, params):
+        return {"stopped": self._modulation.stop(params.get("id"), bool(params.get("restore", True)))}
+
+    def _add_automation(self, params):
+        """Écrit toute une enveloppe de clip en une seule opération.
+
+        points : colonnes {"time": [...], "value": [...]}, valeurs normalisées 0..1 ramenées à la plage
+        du paramètre ; replace (défaut) efface l'enveloppe existante avant d'écrire les points.
+        """
+        clip = self.song().tracks[params.get("track_index")].clip_slots[params.get("clip_index")].clip
+        if clip is None: raise ValueError("No clip in this slot")
+        dev, p = self._device_param(params)
+        times, values = params["points"]["time"], params["points"]["value"]
+        if len(times) != len(values): raise ValueError("Misaligned automation columns")
+        if params.get("replace", True): clip.clear_envelope(p)
+        envelope = clip.automation_envelope(p) or clip.create_automation_envelope(p)
+        if envelope is None: raise ValueError("Cannot create an envelope for " + p.name + " on this clip")
+        span = p.max - p.min
+        # Durée nulle : chaque pas est un simple point, Live interpole linéairement entre deux points
+        for t, v in zip(times, values): envelope.insert_step(float(t), 0.0, p.min + span * max(0.0, min(1.0, float(v))))
+        return {"device": dev.name, "param": p.name, "points": len(times)}
+
+def _serialize(value):
+    """Convertit une valeur du LOM en données JSON (les objets Live deviennent leur nom)."""
+    if value is None or isinstance(value, (bool, int, float) + string_types): return value
+    if isinstance(value, dict): return dict((str(k), _serialize(v)) for k, v in value.items())
+    if hasattr(value, "name"): return value.name
+    if hasattr(value, "__iter__"): return [_serialize(v) for v in value]
+    return str(value)
+
+
+def _note_columns(notes):
+    """Colonnes de notes complètes (vélocité 100 et mute False par défaut), quel que soit le format reçu.
+
+    En liste de notes, le défaut s'applique note par note : une note sans "vel" ne touche pas aux autres.
+    """
+    if isinstance(notes, dict):
+        total = len(notes.get("pitch", ()))
+        cols = dict((f, list(notes[f]) if notes.get(f) is not None else None) for f in NOTE_FIELDS)
+    else:
+        total = len(notes)
+        cols = dict((f, [n[f] for n in notes] if all(f in n for n in notes) else None) for f in NOTE_FIELDS)
+        for f, default in NOTE_DEFAULTS.items():
+            if cols[f] is None: cols[f] = [n.get(f, default) for n in notes]
+    for f in ("pitch", "start", "dur"):
+        if cols[f] is None or len(cols[f]) != total: raise ValueError("Missing or misaligned note column: " + f)
+    for f, default in NOTE_DEFAULTS.items():
+        if cols[f] is None: cols[f] = [default] * total
+    if len(cols["vel"]) != total or len(cols["mute"]) != total: raise ValueError("Misaligned note columns")
+    return cols
+
+
+# Élément produit par une tâche longue pour attendre le tick suivant
+_NEXT_TICK = object()
+
+
+class _Result(object):
+    """Résultat final d'une tâche longue (dernier élément produit par son générateur)."""
+    __slots__ = ("value",)
+
+    def __init__(self, value): self.value = value
+
+
+def _percentiles(values):
+    if not values: return None
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": values[-1]}
+
+
+class _Task(object):
+    """Commande en attente d'exécution sur le thread principal de Live.
+
+    Si le client le demande ("trace"), la tâche note ses étapes : attente en file, temps passé sur le
+    thread principal (somme des tranches d'une tâche longue), remises en file faute de budget ou en
+    attendant le focus. Sans trace, ces appels ne coûtent qu'un test.
+
+    Échéance : "deadline_ms" si la requête le précise, sinon le délai d'attente du client ("timeout")
+    quand il attend le résultat. Une tâche qui n'a pas démarré avant son échéance n'est jamais exécutée.
+
+    Écriture (write_key non nul) : les écritures suivantes sur la même cible, absorbées en file, sont
+    gardées dans followers et reçoivent la même réponse.
+    """
+    __slots__ = ("cmd_type", "params", "client", "req_id", "reply", "deadline", "trace", "lane", "tag", "cancelled",
+                 "write_key", "followers", "seq")
+
+    def __init__(self, cmd_type, params, client, req_id=None, reply="ack", timeout=None, trace=False,
+                 lane=INTERACTIVE, tag=None, deadline_ms=None):
+        self.cmd_type, self.params, self.client, self.req_id = cmd_type, params, client, req_id
+        self.reply, self.lane, self.tag, self.cancelled, self.seq = reply, lane, tag, False, None
+        if deadline_ms: self.deadline = time.time() + float(deadline_ms) / 1000.0
+        elif timeout and reply == "result": self.deadline = time.time() + float(timeout)
+        else: self.deadline = None
+        self.write_key, self.followers = write_key(cmd_type, params), ()
+        self.trace = {"received": _now(), "started": None, "slice": None, "exec": 0.0, "tick": None,
+                      "requeues": 0, "focus_waits": 0} if trace else None
+
+    def count(self, key):
+        if self.trace is not None: self.trace[key] += 1
+
+    def begin_slice(self, tick):
+        if self.trace is None: return
+        now = self.trace["slice"] = _now()
+        if self.trace["started"] is None: self.trace["started"], self.trace["tick"] = now, tick
+
+    def end_slice(self):
+        if self.trace is None or self.trace["slice"] is None: return
+        self.trace["exec"] += _now() - self.trace["slice"]
+        self.trace["slice"] = None
+
+    def timing(self, tick):
+        """Durées côté Live (ms), jointes à la réponse d'une commande tracée."""
+        self.end_slice()
+        t, now = self.trace, _now()
+        started = t["started"] if t["started"] is not None else now
+        return {"queue_ms": (started - t["received"]) * 1000.0, "exec_ms": t["exec"] * 1000.0,
+                "live_ms": (now - t["received"]) * 1000.0, "ticks": tick - t["tick"] if t["tick"] is not None else 0,
+                "requeues": t["requeues"], "focus_waits": t["focus_waits"]}
+
+    def absorb(self, newer):
+        """Fusionne une écriture plus récente sur la même cible : sa valeur remplace celle en attente."""
+        self.params["value"] = newer.params.get("value")
+        self.followers += (newer,)
+        self.deadline = None if self.deadline is None or newer.deadline is None else max(self.deadline, newer.deadline)
+
+    def expired(self):
+        return self.deadline is not None and time.time() > self.deadline
+
+    def stamp(self, msg):
+        if self.req_id is not None: msg["id"] = self.req_id
+        return msg
+
+
+class _Client(object):
+    """Connexion persistante avec le serveur MCP.
+
+    Les requêtes arrivent en trames préfixées par leur longueur (voir wire.py), sans limite de
+    taille ; un ancien client en JSON délimité par des retours à la ligne reste accepté et reçoit
+    ses réponses sous la même forme. Un client qui annonce l'encodage binaire ("hello") reçoit les
+    listes numériques (notes, mètres...) sous forme de tableaux compacts. Chaque requête porte un "id" que l'on renvoie dans la
+    réponse : plusieurs commandes peuvent être en vol en même temps. Les écritures passent par
+    une file dédiée pour ne jamais bloquer le thread principal de Live.
+    """
+    def __init__(self, owner, conn):
+        self.owner, self.conn = owner, conn
+        self.alive = True
+        self._outbox = queue.Queue()
+        self._decoder = FrameDecoder()
+        self.binary = False
+
+    @property
+    def legacy(self):
+        return bool(self._decoder.legacy)
+
+    def start(self):
+        for target in (self._read_loop, self._write_loop):
+            t = threading.Thread(target=target)
+            t.daemon = True
+            t.start()
+
+    def send(self, msg):
+        if self.alive: self._outbox.put(msg)
+
+    def close(self):
+        if not self.alive: return
+        self.alive = False
+        self._outbox.put(None)
+        try: self.conn.close()
+        except: pass
+        self.owner._client_closed(self)
+
+    def _read_loop(self):
+        try:
+            while self.owner.running:
+                data = self.conn.recv(65536)
+                if not data: break
+                for frame in self._decoder.feed(data):
+                    try: req = decode_message(frame)
+                    except (ValueError, struct.error):
+                        self.send({"status": "error", "message": "Invalid JSON"})
+                        continue
+                    self.owner._process_request(self, req)
+        except: pass
+        self.close()
+
+    def _write_loop(self):
+        while True:
+            msg = self._outbox.get()
+            if msg is None: break
+            try: self.conn.sendall(json.dumps(msg).encode('utf-8') + b"\n" if self.legacy else encode_frame(encode_message(msg, self.binary)))
+            except:
+                self.close()
+                break
@@ -0,0 +1,331 @@
+# AbletonMCP/browser_index.py
+from __future__ import absolute_import, print_function, unicode_literals
+import os, re, json, threading, time, heapq, bisect, hashlib
+
+_now = getattr(time, "perf_counter", time.time)
+
+CACHE_VERSION = 2
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".abletonmcp", "browser_index.json")
+# Catégories du Browser indexées (dans l'ordre de parcours historique)
+CATEGORIES = ("audio_effects", "instruments", "drums", "packs", "samples", "user_library", "user_folders")
+AUDIO_EXTS = ('.wav', '.aif', '.aiff', '.mp3', '.flac', '.ogg')
+# Intervalle (s) entre deux vérifications de l'empreinte des bibliothèques
+FINGERPRINT_INTERVAL = 30.0
+# Intervalle (s) entre deux reconstructions de vérification en tâche de fond (changements plus profonds)
+REWALK_INTERVAL = 600.0
+# Tranche (s) de construction quand une commande attend l'index (tâche longue du thread principal)
+BUILD_SLICE = 0.002
+# Parcours direct d'un élément absent de l'index : nœuds visités au plus, et par tranche
+LIVE_WALK_MAX_NODES, LIVE_WALK_CHUNK = 50000, 256
+# Un trigramme présent dans plus de cette fraction des éléments ne sert pas à générer les candidats
+MAX_POSTING_RATIO = 0.05
+# Recherche répartie sur les ticks : candidats notés (ou postings fusionnés) par tranche
+SEARCH_CHUNK = 128
+
+_SPLIT = re.compile(r"[^a-z0-9]+")
+
+def normalize(name):
+    return " ".join(name.lower().split())
+
+def _stem(key):
+    dot = key.rfind(".")
+    return key[:dot] if dot > 0 else key
+
+def is_audio_file(name):
+    return name.lower().endswith(AUDIO_EXTS)
+
+def tokens(key):
+    return [t for t in _SPLIT.split(key) if t]
+
+def trigrams(key):
+    padded = " " + " ".join(tokens(key)) + " "
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _contains(posting, i):
+    """Présence de l'élément i dans une liste de postings (indices croissants)."""
+    j = bisect.bisect_left(posting, i)
+    return j < len(posting) and posting[j] == i
+
+def entry_id(entry):
+    """Identifiant stable d'un élément : catégorie + chemin dans le Browser."""
+    return entry[1] + ":" + "/".join(entry[2])
+
+
+class _Catalog(object):
+    """Entrées indexées par nom exact, par mot et par trigramme ; construit élément par élément."""
+    def __init__(self):
+        self.entries, self.keys, self.by_key, self.by_id = [], [], {}, {}
+        self.by_token, self.by_gram, self.gram_counts = {}, {}, []
+
+    def add(self, entry):
+        i, key = len(self.entries), normalize(entry[0])
+        self.entries.append(entry)
+        self.keys.append(key)
+        self.by_key.setdefault(key, []).append(i)
+        if _stem(key) != key: self.by_key.setdefault(_stem(key), []).append(i)
+        self.by_id[entry_id(entry)] = i
+        for token in set(tokens(_stem(key))): self.by_token.setdefault(token, []).append(i)
+        grams = trigrams(_stem(key))
+        for gram in grams: self.by_gram.setdefault(gram, []).append(i)
+        self.gram_counts.append(len(grams))
+
+
+class BrowserIndex(object):
+    """Index en mémoire du Browser de Live : nom normalisé -> éléments chargeables.
+
+    Le parcours du Browser est découpé en petites étapes exécutées à chaque tick (step, ou building
+    pour une commande qui attend l'index) pour ne jamais geler l'interface. L'index est sauvegardé
+    sur disque et rechargé au démarrage suivant ; l'empreinte des bibliothèques (deux premiers niveaux
+    de chaque catégorie) invalide le cache quand elles changent, une reconstruction en tâche de fond
+    vérifie toujours le cache chargé puis revient tous les REWALK_INTERVAL pour les changements plus
+    profonds. Un élément introuvable relance la reconstruction (voir walk_live).
+    """
+    def __init__(self, get_browser, log, cache_path=CACHE_PATH):
+        self._get_browser, self._log, self._cache_path = get_browser, log, cache_path
+        self._catalog = _Catalog()
+        self._items = {}
+        self._complete = False
+        self._fingerprint = None
+        self._built_at = 0.0
+        self._pending_cache = None
+        self._walk = None
+        self._last_check = 0.0
+        self._write_lock = threading.Lock()
+        t = threading.Thread(target=self._read_cache)
+        t.daemon = True
+        t.start()
+
+    @property
+    def entries(self):
+        return self._catalog.entries
+
+    # --- Construction incrémentale ---
+    def step(self, budget):
+        """Avance la construction de l'index pendant au plus `budget` secondes (thread principal)."""
+        started = _now()
+        if self._pending_cache is not None: self._adopt_cache()
+        if self._walk is None:
+            if self._complete and started - self._last_check < FINGERPRINT_INTERVAL: return
+            self._last_check = started
+            fingerprint = self._compute_fingerprint()
+            if self._complete and fingerprint == self._fingerprint and started - self._built_at < REWALK_INTERVAL: return
+            self._start_walk(fingerprint)
+        self._advance(started + budget)
+
+    @property
+    def ready(self):
+        """L'index peut servir : construit, ou chargé depuis le cache (en cours de vérification)."""
+        return self._complete or bool(self.entries)
+
+    def building(self):
+        """Générateur : construit l'index par tranches de BUILD_SLICE jusqu'à ce qu'il puisse servir.
+
+        Pour une commande qui arrive avant la fin de la construction : tâche longue du thread principal,
+        qui produit la progression après chaque tranche au lieu de tout parcourir d'un coup.
+        """
+        if self._pending_cache is not None: self._adopt_cache()
+        while not self.ready:
+            if self._walk is None: self._start_walk(self._compute_fingerprint())
+            self._advance(_now() + BUILD_SLICE)
+            if self._walk is not None: yield {"indexing": len(self._walk["catalog"].entries)}
+
+    def _start_walk(self, fingerprint):
+        browser = self._get_browser()
+        stack = []
+        for category in reversed(CATEGORIES):
+            for root in reversed(self._roots(browser, category)):
+                for child in reversed(list(getattr(root, "children", []))):
+                    stack.append((child, category, ()))
+        self._walk = {"stack": stack, "fingerprint": fingerprint, "catalog": _Catalog(), "items": {}}
+
+    def _advance(self, deadline):
+        walk = self._walk
+        stack, catalog, items = walk["stack"], walk["catalog"], walk["items"]
+        count = 0
+        while stack:
+            node, category, parent = stack.pop()
+            path = parent + (node.name,)
+            if getattr(node, "is_loadable", False):
+                items[(category, path)] = node
+                catalog.add((node.name, category, path, getattr(node, "uri", None)))
+            children = getattr(node, "children", None)
+            if children:
+                for child in reversed(list(children)): stack.append((child, category, path))
+            count += 1
+            if count % 32 == 0 and _now() > deadline: return
+        self._walk = None
+        previous = self.entries
+        self._install(catalog, walk["fingerprint"])
+        self._items = items
+        self._log("(AbletonMCP) Browser index ready: " + str(len(catalog.entries)) + " items")
+        self._write_cache(previous=previous)
+
+    def invalidate(self):
+        """Force une reconstruction au prochain tick (élément introuvable, bibliothèque modifiée)."""
+        self._complete = False
+        self._last_check = 0.0
+
+    def _install(self, catalog, fingerprint):
+        self._catalog, self._fingerprint = catalog, fingerprint
+        self._complete, self._built_at = True, _now()
+
+    # --- Recherche ---
+    def lookup(self, name, categories, devices_only=False):
+        """Premier élément correspondant, catégorie par catégorie : correspondance exacte puis partielle."""
+        catalog, key = self._catalog, normalize(name)
+        allowed = lambda e: e[1] in categories and not (devices_only and is_audio_file(e[0]))
+        exact = [catalog.entries[i] for i in catalog.by_key.get(key, ()) if allowed(catalog.entries[i])]
+        if exact: return min(exact, key=lambda e: categories.index(e[1]))
+        best = None
+        for i, entry in enumerate(catalog.entries):
+            if key in catalog.keys[i] and allowed(entry):
+                rank = categories.index(entry[1])
+                if best is None or rank < best[0]: best = (rank, entry)
+                if rank == 0: break
+        return best[1] if best else None
+
+    def search(self, query, categories=None, limit=10):
+        """Générateur : classement des éléments par similarité (trigrammes + mots + bonus exact/préfixe).
+
+        Produit None après chaque tranche de SEARCH_CHUNK candidats (ou postings fusionnés), puis
+        [(score, entry)] trié par score décroissant.
+        """
+        catalog, key = self._catalog, normalize(query)
+        stem = _stem(key)
+        q_grams, q_tokens = trigrams(stem), set(tokens(stem))
+        if not q_grams:
+            yield []
+            return
+        # Les candidats viennent des trigrammes les plus rares et des mots entiers de la requête : un
+        # trigramme présent dans presque tout le Browser ("pre" de "Preset") n'aide pas à départager et coûte cher
+        postings = sorted((catalog.by_gram.get(g, ()) for g in q_grams), key=len)
+        rare_limit = MAX_POSTING_RATIO * len(catalog.entries)
+        rare = [p for p in postings if p and len(p) <= rare_limit] or postings[:1]
+        token_postings = [catalog.by_token.get(t, ()) for t in q_tokens]
+        candidates, merged = set(), 0
+        for posting in rare + [p for p in token_postings if len(p) <= rare_limit]:
+            candidates.update(posting)
+            merged += len(posting)
+            if merged >= SEARCH_CHUNK:
+                merged = 0
+                yield None
+        scored = []
+        for n, i in enumerate(candidates, 1):
+            entry = catalog.entries[i]
+            if n % SEARCH_CHUNK == 0: yield None
+            if categories and entry[1] not in categories: continue
+            # Trigrammes et mots communs lus dans l'index (listes triées), sans réanalyser le nom
+            common = sum(1 for p in postings if _contains(p, i))
+            score = float(common) / (len(q_grams) + catalog.gram_counts[i] - common)
+            if token_postings and all(_contains(p, i) for p in token_postings): score += 0.5
+            name_key = _stem(catalog.keys[i])
+            if name_key == stem: score += 1.0
+            elif name_key.startswith(stem): score += 0.3
+            scored.append((round(score, 4), -i, entry))
+        yield [(score, entry) for score, _, entry in heapq.nlargest(limit, scored)]
+
+    def find(self, item_id):
+        """Entrée correspondant à un identifiant renvoyé par search (None si inconnu)."""
+        i = self._catalog.by_id.get(item_id)
+        return self._catalog.entries[i] if i is not None else None
+
+    def resolve(self, entry):
+        """Objet BrowserItem correspondant à une entrée (parcours du chemin si elle vient du cache)."""
+        name, category, path, uri = entry
+        item = self._items.get((category, path))
+        if item is not None: return item
+        # Comme _start_walk, les chemins commencent sous la racine de la catégorie
+        nodes = [child for root in self._roots(self._get_browser(), category) for child in getattr(root, "children", [])]
+        for part in path:
+            item = next((n for n in nodes if n.name == part), None)
+            if item is None:
+                self.invalidate()
+                return None
+            nodes = list(getattr(item, "children", []))
+        self._items[(category, path)] = item
+        return item
+
+    def walk_live(self, name, categories, devices_only=False):
+        """Générateur : parcours direct du Browser (comme avant l'index) pour un élément absent de l'index.
+
+        Catégorie par catégorie, un élément au nom exact, sinon le premier qui contient name. Produit None
+        après chaque tranche de LIVE_WALK_CHUNK nœuds, puis l'élément trouvé ; abandonne au-delà de
+        LIVE_WALK_MAX_NODES nœuds.
+        """
+        key, browser, count = normalize(name), self._get_browser(), 0
+        for category in categories:
+            stack, partial = list(reversed(self._roots(browser, category))), None
+            while stack and count < LIVE_WALK_MAX_NODES:
+                node = stack.pop()
+                count += 1
+                if getattr(node, "is_loadable", False) and not (devices_only and is_audio_file(node.name)):
+                    node_key = normalize(node.name)
+                    if key in (node_key, _stem(node_key)):
+                        yield node
+                        return
+                    if partial is None and key in node_key: partial = node
+                children = getattr(node, "children", None)
+                if children: stack.extend(reversed(list(children)))
+                if count % LIVE_WALK_CHUNK == 0: yield None
+            if partial is not None:
+                yield partial
+                return
+
+    # --- Cache disque ---
+    def _roots(self, browser, category):
+        if category == "user_folders": return list(getattr(browser, "user_folders", []))
+        root = getattr(browser, category, None)
+        return [root] if root is not None else []
+
+    def _compute_fingerprint(self):
+        """Noms des deux premiers niveaux de chaque catégorie (collections, packs, dossiers et leur contenu)."""
+        browser = self._get_browser()
+        parts = []
+        for category in CATEGORIES:
+            for root in self._roots(browser, category):
+                for child in getattr(root, "children", []):
+                    parts.append(category + ":" + child.name + "/" + "|".join(c.name for c in getattr(child, "children", [])))
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _read_cache(self):
+        # Lecture et indexation hors du thread principal : il ne reste qu'à adopter le catalogue
+        try:
+            with open(self._cache_path) as f: data = json.load(f)
+            if data.get("version") != CACHE_VERSION: return
+            catalog = _Catalog()
+            for n, c, p, u in data["entries"]: catalog.add((n, c, tuple(p), u))
+            self._pending_cache = (data["fingerprint"], catalog)
+        except (IOError, OSError, ValueError, KeyError): pass
+
+    def _adopt_cache(self):
+        (fingerprint, catalog), self._pending_cache = self._pending_cache, None
+        if self.entries: return
+        if fingerprint != self._compute_fingerprint():
+            self._log("(AbletonMCP) Browser index cache outdated, rebuilding")
+            return
+        self._install(catalog, fingerprint)
+        # Le cache sert immédiatement ; une reconstruction en tâche de fond le vérifie
+        self._complete = False
+        self._log("(AbletonMCP) Browser index loaded from cache: " + str(len(self.entries)) + " items")
+
+    def _write_cache(self, background=True, previous=None):
+        """Sauvegarde l'index (sauf s'il a les mêmes entrées que previous). Comparaison et sérialisation se
+        font dans le thread d'écriture : les entrées d'un catalogue installé ne changent plus."""
+        entries, fingerprint = self.entries, self._fingerprint
+        def write():
+            # Le verrou sérialise les écritures (fin de parcours, écriture explicite) : même fichier temporaire
+            with self._write_lock:
+                if previous is not None and [e[:3] for e in entries] == [e[:3] for e in previous]: return
+                data = {"version": CACHE_VERSION, "fingerprint": fingerprint, "entries": [list(e[:2]) + [list(e[2]), e[3]] for e in entries]}
+                try:
+                    folder = os.path.dirname(self._cache_path)
+                    if not os.path.isdir(folder): os.makedirs(folder)
+                    tmp = self._cache_path + ".tmp"
+                    with open(tmp, "w") as f: json.dump(data, f)
+                    if os.path.exists(self._cache_path): os.remove(self._cache_path)
+                    os.rename(tmp, self._cache_path)
+                except (IOError, OSError) as e: self._log("(AbletonMCP) Browser index cache not saved: " + str(e))
+        if not background: return write()
+        t = threading.Thread(target=write)
+        t.daemon = True
+        t.start()
@@ -0,0 +1,279 @@
+# AbletonMCP/lom_paths.py
+from __future__ import absolute_import, print_function, unicode_literals
+import re, collections
+
+# Nombre de chemins compilés gardés en mémoire (LRU)
+PATH_CACHE_SIZE = 512
+
+# Projection finale : song.tracks[*].{name,arm,mixer_device.volume.value}
+_PROJECTION = re.compile(r'\.?\s*\{([^{}]*)\}\s*$')
+# Erreurs attendues en lisant un élément d'une collection (ex : "arm" sur une piste de groupe)
+_READ_ERRORS = (AttributeError, IndexError, TypeError, RuntimeError)
+
+try: _text_types = (str, unicode, bytes)
+except NameError: _text_types = (str, bytes)
+
+# ident | [n] | ["clé"] | ['clé'] | [clé] | nombre | séparateurs (point ou espace, syntaxe "live_set tracks 0")
+_TOKEN = re.compile(r'\s*(?:([A-Za-z_][A-Za-z0-9_]*)|\[\s*"([^"]*)"\s*\]|\[\s*\'([^\']*)\'\s*\]|\[\s*([^\]]*?)\s*\]|(\d+)|(\.))')
+
+
+class CompiledPath(object):
+    """Chemin LOM pré-analysé : racine ("song" ou "self"), étapes de navigation et attribut final.
+
+    projection : tuple (libellé, sous-chemin compilé) lu sur chaque objet atteint, ou None.
+    """
+    __slots__ = ("source", "root", "steps", "attr", "projection")
+
+    def __init__(self, source, root, steps, attr, projection=None):
+        self.source, self.root, self.steps, self.attr, self.projection = source, root, steps, attr, projection
+
+    @property
+    def is_multi(self):
+        return self.projection is not None or any(step[0] == "all" for step in self.steps)
+
+
+def compile_path(path_str):
+    """Analyse un chemin ("song.tracks[0].name", "live_set tracks 0 name", 'song.tracks["Bass"]...').
+
+    Lecture groupée : [*] parcourt toute la collection, {a,b.c} projette plusieurs champs.
+    """
+    text, projection = path_str.strip(), None
+    m = _PROJECTION.search(text)
+    if m:
+        fields = [f.strip() for f in m.group(1).split(",") if f.strip()]
+        if not fields: raise ValueError("Empty projection: " + path_str)
+        projection = tuple((f, compile_path(f)) for f in fields)
+        text = text[:m.start()]
+    parts, pos = [], 0
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos: raise ValueError("Invalid path: " + path_str)
+        pos = m.end()
+        ident, dq, sq, raw, number, dot = m.groups()
+        if ident is not None: parts.append([ident, None])
+        elif dot is not None: continue
+        else:
+            if not parts or parts[-1][1] is not None: raise ValueError("Invalid path: " + path_str)
+            key = number if number is not None else next(k for k in (dq, sq, raw) if k is not None)
+            parts[-1][1] = int(key) if (number is not None or (raw is not None and raw.isdigit())) else key
+    root = "self"
+    if parts and parts[0][0] in ("song", "live_set") and parts[0][1] is None:
+        root, parts = "song", parts[1:]
+    steps = tuple(_step(name, key) for name, key in parts)
+    if steps and steps[-1][0] == "attr" and projection is None: return CompiledPath(path_str, root, steps[:-1], steps[-1][1])
+    return CompiledPath(path_str, root, steps, None, projection)
+
+
+def _step(name, key):
+    if key is None: return ("attr", name)
+    if key == "*": return ("all", name)
+    if isinstance(key, int): return ("index", name, key)
+    return ("name", name, key.lower())
+
+
+class LomResolver(object):
+    """Résolution des chemins LOM : chemins compilés en cache LRU et index de noms par collection.
+
+    Les index de noms (pistes, scènes, devices, paramètres...) sont invalidés par les listeners
+    de changement de liste de Live (add_<collection>_listener) ; un renommage est détecté à la lecture.
+    """
+    def __init__(self, cache_size=PATH_CACHE_SIZE):
+        self._cache_size = cache_size
+        self._compiled = collections.OrderedDict()
+        self._names, self._listeners = {}, {}
+        self.stats = {"path_hits": 0, "path_misses": 0, "name_hits": 0, "name_misses": 0}
+
+    def compile(self, path_str):
+        compiled = self._compiled.pop(path_str, None)
+        if compiled is None:
+            self.stats["path_misses"] += 1
+            compiled = compile_path(path_str)
+            if len(self._compiled) >= self._cache_size: self._compiled.popitem(last=False)
+        else: self.stats["path_hits"] += 1
+        self._compiled[path_str] = compiled
+        return compiled
+
+    def walk(self, obj, steps):
+        """Applique les étapes de navigation à partir de obj."""
+        for step in steps: obj = self._apply(obj, step)
+        return obj
+
+    def _apply(self, obj, step):
+        kind, name = step[0], step[1]
+        if kind == "attr": return getattr(obj, name)
+        if kind == "index": return getattr(obj, name)[step[2]]
+        if kind == "all": raise ValueError("Wildcard [*] is only allowed for reads")
+        found = self.find_by_name(obj, name, step[2])
+        # Comportement historique : à défaut de correspondance, premier élément de la collection
+        return found if found is not None else getattr(obj, name)[0]
+
+    def read(self, obj, compiled, start=0):
+        """Lit la valeur d'un chemin compilé ; [*] produit une liste, une projection un dict.
+
+        Sous un [*] ou dans une projection, un élément illisible vaut None au lieu de tout faire échouer.
+        """
+        steps = compiled.steps
+        for i in range(start, len(steps)):
+            if steps[i][0] == "all":
+                return [self._read_or_none(item, compiled, i + 1) for item in getattr(obj, steps[i][1])]
+            obj = self._apply(obj, steps[i])
+        if compiled.projection is not None:
+            return dict((label, self._read_or_none(obj, sub, 0)) for label, sub in compiled.projection)
+        return getattr(obj, compiled.attr) if compiled.attr else obj
+
+    def _read_or_none(self, obj, compiled, start):
+        try: return self.read(obj, compiled, start)
+        except _READ_ERRORS: return None
+
+    def find_by_name(self, owner, collection, key):
+        """Élément de owner.<collection> dont le nom correspond à key (exact, sinon partiel), ou None."""
+        key = key.lower()
+        cache_key = (_ptr(owner), collection)
+        index = self._names.get(cache_key)
+        if index is not None:
+            obj = index["exact"].get(key)
+            if obj is None: obj = next((o for n, o in index["names"] if key in n), None)
+            # Un renommage n'est pas une modification de liste : on vérifie le nom avant de servir le cache
+            if obj is not None and key in obj.name.lower():
+                self.stats["name_hits"] += 1
+                return obj
+        self.stats["name_misses"] += 1
+        index = self._build(owner, collection, cache_key)
+        obj = index["exact"].get(key)
+        return obj if obj is not None else next((o for n, o in index["names"] if key in n), None)
+
+    def _build(self, owner, collection, cache_key):
+        names = [(item.name.lower(), item) for item in getattr(owner, collection)]
+        exact = {}
+        for n, item in names: exact.setdefault(n, item)
+        index = self._names[cache_key] = {"names": names, "exact": exact}
+        if cache_key not in self._listeners:
+            add = getattr(owner, "add_" + collection + "_listener", None)
+            if add is not None:
+                def on_change(): self._names.pop(cache_key, None)
+                try:
+                    add(on_change)
+                    self._listeners[cache_key] = (owner, on_change)
+                except Exception: pass
+        return index
+
+    def clear(self):
+        """Oublie tous les index de noms et retire les listeners posés sur Live."""
+        for (ptr, collection), (owner, listener) in list(self._listeners.items()):
+            try: getattr(owner, "remove_" + collection + "_listener")(listener)
+            except Exception: pass
+        self._listeners.clear()
+        self._names.clear()
+        self._compiled.clear()
+
+
+def _ptr(obj):
+    # Live recrée des objets Python à chaque accès : _live_ptr identifie l'objet C++ sous-jacent
+    return getattr(obj, "_live_ptr", None) or id(obj)
+
+
+# Nombre maximal de chemins observés simultanément (les plus anciens sont invalidés d'office)
+MAX_OBSERVED_PATHS = 4096
+# Au-delà, une collection lue (liste de noms) n'est pas observée : le client utilisera un TTL
+MAX_OBSERVED_ELEMENTS = 256
+# Étapes dont Live signale le changement sous un autre nom (ClipSlot.clip : has_clip)
+STEP_LISTENERS = {"clip": "has_clip"}
+# Étapes sans listener qui désignent toujours le même objet (song.view, track.mixer_device...)
+FIXED_STEPS = ("view", "mixer_device", "volume", "panning", "master_track", "track_activator", "crossfader",
+               "cue_volume", "song_tempo")
+
+
+class PathObservers(object):
+    """Listeners à usage unique : préviennent le client dès qu'une valeur qu'il a mise en cache change.
+
+    Un chemin observé écoute chaque étape traversée : attribut intermédiaire (view.selected_track,
+    clip_slot.clip via has_clip), changements de liste des collections (une piste supprimée décale tous
+    les index) et noms de leurs éléments pour une étape par nom. Il écoute aussi son attribut final et,
+    comme un objet lu est servi par son nom, le nom de cet objet ou de chaque élément d'une collection lue.
+    Si une étape n'a pas de listener (hors FIXED_STEPS), le chemin n'est pas observé. Au premier
+    déclenchement, le client reçoit un événement "invalidate" ; les listeners sont retirés au tick
+    suivant, Live n'autorisant pas les modifications pendant une notification.
+    """
+    def __init__(self, resolver, notify):
+        self._resolver, self._notify = resolver, notify
+        self._active = collections.OrderedDict()
+        # Listeners déclenchés (ou abandonnés), plus dans _active, en attente de retrait hors notification
+        self._expired = []
+
+    def observe(self, root, compiled, client):
+        """Pose les listeners du chemin ; False si la valeur n'est pas observable (le client utilisera un TTL).
+
+        True sans rien poser seulement si un listener encore armé couvre déjà ce chemin pour ce client.
+        """
+        key = (client, compiled.source)
+        if key in self._active: return True
+        if compiled.is_multi or compiled.attr is None: return False
+        bindings, fired = [], []
+        def on_change():
+            if fired: return
+            fired.append(True)
+            # Sorti de _active tout de suite : une nouvelle observation avant flush repose des listeners
+            if self._active.get(key) is bindings: self._expired.append(self._active.pop(key))
+            self._notify(client, [compiled.source])
+        try: bound = self._bind_path(root, compiled, on_change, bindings)
+        except _READ_ERRORS: bound = False
+        if not bound:
+            _unbind(bindings)
+            return False
+        self._active[key] = bindings
+        while len(self._active) > MAX_OBSERVED_PATHS:
+            (old_client, old_path), old = self._active.popitem(last=False)
+            _unbind(old)
+            self._notify(old_client, [old_path])
+        return True
+
+    def _bind_path(self, obj, compiled, callback, bindings):
+        for step in compiled.steps:
+            if not _bind_step(obj, step, callback, bindings): return False
+            obj = self._resolver._apply(obj, step)
+        return _bind(obj, STEP_LISTENERS.get(compiled.attr, compiled.attr), callback, bindings) and _bind_names(getattr(obj, compiled.attr), callback, bindings)
+
+    def flush(self):
+        """Retire les listeners déjà déclenchés (à appeler hors notification, ex. update_display)."""
+        while self._expired:
+            _unbind(self._expired.pop())
+
+    def drop_client(self, client):
+        for key in [k for k in self._active if k[0] is client]: self._expired.append(self._active.pop(key))
+
+    def clear(self):
+        for bindings in self._active.values(): _unbind(bindings)
+        self._active.clear()
+        self.flush()
+
+
+def _bind(obj, prop, callback, bindings):
+    add = getattr(obj, "add_" + prop + "_listener", None)
+    if add is None: return False
+    try: add(callback)
+    except Exception: return False
+    bindings.append((obj, prop, callback))
+    return True
+
+def _bind_step(obj, step, callback, bindings):
+    """Listeners d'une étape de navigation ; False si son résultat peut changer sans notification."""
+    kind, name = step[0], step[1]
+    if kind == "attr":
+        return _bind(obj, STEP_LISTENERS.get(name, name), callback, bindings) or name in FIXED_STEPS
+    if not _bind(obj, name, callback, bindings): return False
+    # Étape par nom : un renommage peut changer l'élément désigné sans modifier la liste
+    return kind != "name" or _bind_names(getattr(obj, name), callback, bindings)
+
+def _bind_names(value, callback, bindings):
+    """Listeners de nom de l'objet lu, ou de chaque objet d'une collection lue ; False si l'un manque."""
+    if value is None or isinstance(value, (bool, int, float) + _text_types) or isinstance(value, dict): return True
+    if hasattr(value, "name"): return _bind(value, "name", callback, bindings)
+    if not hasattr(value, "__iter__"): return True
+    items = list(value)
+    if len(items) > MAX_OBSERVED_ELEMENTS: return False
+    return all(_bind(item, "name", callback, bindings) for item in items if hasattr(item, "name"))
+
+def _unbind(bindings):
+    for obj, prop, callback in bindings:
+        try: getattr(obj, "remove_" + prop + "_listener")(callback)
+        except Exception: pass
@@ -0,0 +1,152 @@
+# AbletonMCP/modulation.py
+from __future__ import absolute_import, print_function, unicode_literals
+import math, itertools, time
+from .lom_paths import _ptr
+
+_now = getattr(time, "perf_counter", time.time)
+
+KINDS = ("lfo", "ramp", "steps")
+LFO_SHAPES = ("sine", "triangle", "square", "saw", "saw_down")
+
+
+def _wave(shape, phase):
+    """Forme d'onde entre -1 et 1 pour une phase en tours (0..1)."""
+    phase %= 1.0
+    if shape == "sine": return math.sin(2.0 * math.pi * phase)
+    if shape == "triangle": return 1.0 - 4.0 * abs(phase - 0.5)
+    if shape == "square": return 1.0 if phase < 0.5 else -1.0
+    if shape == "saw": return 2.0 * phase - 1.0
+    if shape == "saw_down": return 1.0 - 2.0 * phase
+    raise ValueError("Unknown LFO shape: " + str(shape))
+
+
+class Modulator(object):
+    """Mouvement d'un paramètre, calculé à partir de la position en temps (beats).
+
+    Les valeurs sont normalisées (0..1 de la plage du paramètre) :
+      lfo   : center + depth * onde(phase + beat / period_beats)
+      ramp  : start -> end sur duration_beats (curve = exposant), puis maintien de end
+      steps : values[i], un pas toutes les step_beats, en boucle
+    """
+    DEFAULTS = {
+        "lfo": {"shape": "sine", "period_beats": 1.0, "center": 0.5, "depth": 0.5, "phase": 0.0},
+        "ramp": {"start": 0.0, "end": 1.0, "duration_beats": 4.0, "curve": 1.0},
+        "steps": {"values": [0.0, 1.0], "step_beats": 0.25},
+    }
+
+    def __init__(self, mod_id, kind, param, device, config, clock, beat):
+        if kind not in KINDS: raise ValueError("Unknown modulation kind: " + str(kind))
+        self.id, self.kind, self.param, self.device, self.clock = mod_id, kind, param, device, clock
+        self.config = dict(self.DEFAULTS[kind])
+        self.update(config)
+        self.origin = beat
+        self.initial = param.value
+        self.last = None
+        self.finished = False
+
+    def update(self, config):
+        # Validation sur une copie : un réglage invalide laisse le modulateur intact
+        c = dict(self.config)
+        for key, value in (config or {}).items():
+            if key in c: c[key] = value
+        if self.kind == "lfo":
+            _wave(c["shape"], 0.0)
+            if float(c["period_beats"]) <= 0: raise ValueError("period_beats must be positive")
+        elif self.kind == "steps":
+            if not c["values"] or float(c["step_beats"]) <= 0: raise ValueError("steps needs values and a positive step_beats")
+        self.config, self.finished = c, False
+
+    def normalized(self, beat):
+        c, elapsed = self.config, beat - self.origin
+        if self.kind == "lfo":
+            return float(c["center"]) + float(c["depth"]) * _wave(c["shape"], float(c["phase"]) + elapsed / float(c["period_beats"]))
+        if self.kind == "ramp":
+            duration = float(c["duration_beats"])
+            x = 1.0 if duration <= 0 else max(0.0, min(1.0, elapsed / duration))
+            if x >= 1.0: self.finished = True
+            return float(c["start"]) + (float(c["end"]) - float(c["start"])) * x ** float(c["curve"])
+        values = c["values"]
+        return float(values[int(elapsed // float(c["step_beats"])) % len(values)])
+
+    def describe(self):
+        return {"id": self.id, "kind": self.kind, "device": self.device.name, "param": self.param.name,
+                "clock": self.clock, "config": dict(self.config), "value": self.param.value, "finished": self.finished}
+
+
+class ModulationEngine(object):
+    """Modulateurs exécutés à chaque rafraîchissement (update_display) sur des DeviceParameter déjà résolus.
+
+    Horloge "song" : position de lecture (current_song_time), le mouvement suit le morceau et s'arrête avec
+    le transport. Horloge "free" : temps réel converti en beats au tempo courant, pour bouger hors lecture.
+    Les modulateurs survivent à la déconnexion du serveur ; un seul modulateur par paramètre.
+    """
+    def __init__(self, get_song, log):
+        self._get_song, self._log = get_song, log
+        self._mods = {}
+        self._ids = itertools.count(1)
+        self._free_beat, self._free_last = 0.0, _now()
+
+    def __len__(self):
+        return len(self._mods)
+
+    def start(self, kind, param, device, config=None, clock="song"):
+        if clock not in ("song", "free"): raise ValueError("Unknown clock: " + str(clock))
+        mod = Modulator(next(self._ids), kind, param, device, config, clock, self._beat(clock))
+        for old in list(self._mods.values()):
+            if _ptr(old.param) == _ptr(param):
+                self.stop(old.id, restore=False)
+                mod.initial = old.initial
+        self._mods[mod.id] = mod
+        self._apply(mod)
+        return mod
+
+    def update(self, mod_id, config=None, restart=False):
+        mod = self._get(mod_id)
+        mod.update(config)
+        if restart: mod.origin = self._beat(mod.clock)
+        self._apply(mod)
+        return mod
+
+    def stop(self, mod_id=None, restore=True):
+        """Arrête un modulateur (ou tous si mod_id est None) ; restore remet la valeur d'avant."""
+        mods = list(self._mods.values()) if mod_id is None else [self._get(mod_id)]
+        for mod in mods:
+            del self._mods[mod.id]
+            if restore:
+                try: mod.param.value = mod.initial
+                except Exception: pass
+        return [mod.id for mod in mods]
+
+    def describe(self):
+        return [mod.describe() for mod in self._mods.values()]
+
+    def tick(self):
+        for mod in list(self._mods.values()):
+            if mod.finished: continue
+            try: self._apply(mod)
+            except Exception as e:
+                # Device supprimé, paramètre devenu invalide : on abandonne ce modulateur
+                self._mods.pop(mod.id, None)
+                self._log("(AbletonMCP) Modulation " + str(mod.id) + " stopped: " + str(e))
+
+    def _apply(self, mod):
+        param = mod.param
+        value = param.min + (param.max - param.min) * max(0.0, min(1.0, mod.normalized(self._beat(mod.clock))))
+        # Pas d'écriture si rien n'a bougé (transport arrêté, pas de séquence maintenu)
+        if value != mod.last:
+            param.value = value
+            mod.last = value
+
+    def _beat(self, clock):
+        song = self._get_song()
+        if clock == "song": return song.current_song_time
+        # Cumul tick par tick : un changement de tempo ne fait pas sauter la phase
+        now = _now()
+        self._free_beat += (now - self._free_last) * song.tempo / 60.0
+        self._free_last = now
+        return self._free_beat
+
+    def _get(self, mod_id):
+        mod = self._mods.get(mod_id)
+        if mod is None: raise ValueError("Unknown modulation: " + str(mod_id))
+        return mod
@@ -0,0 +1,177 @@
+# AbletonMCP/session_state.py
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Nombre de suppressions mémorisées pour les deltas ; au-delà, les clients trop anciens reçoivent un instantané complet
+MAX_TOMBSTONES = 1000
+
+SONG_PROPS = ("tempo", "is_playing", "signature_numerator", "signature_denominator")
+STRUCTURE_PROPS = ("tracks", "return_tracks", "scenes")
+TRACK_PROPS = ("name", "color", "mute", "solo", "arm")
+# Modifications de liste : il faut reposer les listeners des nouveaux éléments
+TRACK_LIST_PROPS = ("devices", "clip_slots")
+CLIP_PROPS = ("name", "looping", "loop_start", "loop_end")
+
+
+def _get(obj, attr, default=None):
+    try: return getattr(obj, attr)
+    except Exception: return default
+
+
+class SessionState(object):
+    """Instantané versionné de la session (pistes, retours, Master, scènes, clips, devices, paramètres).
+
+    Les listeners de Live marquent les éléments modifiés ; l'instantané est recalculé pour ces seuls
+    éléments à la demande suivante. Chaque élément garde la version à laquelle il a changé pour la
+    dernière fois, ce qui permet de ne renvoyer que les changements depuis une version N.
+    """
+    def __init__(self, get_song):
+        self._get_song = get_song
+        self.version = 0
+        self._nodes = {}
+        self._removed = {}
+        self._horizon = 0
+        self._dirty, self._rebind = set(), set()
+        self._structure = True
+        self._bindings = {}
+
+    # --- Requête ---
+    def query(self, since=None):
+        """Instantané complet, ou seulement les éléments modifiés depuis la version `since`."""
+        self._refresh()
+        if since is None or since > self.version or since < self._horizon: return self._full()
+        changes = dict((key, data) for key, (v, data) in self._nodes.items() if v > since)
+        removed = [key for key, v in self._removed.items() if v > since]
+        return {"version": self.version, "since": since, "full": False, "changes": changes, "removed": removed}
+
+    def _full(self):
+        count = lambda prefix: len([k for k in self._nodes if k.startswith(prefix)])
+        node = lambda key: self._nodes[key][1]
+        return {
+            "version": self.version, "full": True,
+            "song": node("song"),
+            "tracks": [node("tracks/%d" % i) for i in range(count("tracks/"))],
+            "return_tracks": [node("returns/%d" % i) for i in range(count("returns/"))],
+            "master_track": node("master"),
+            "scenes": [node("scenes/%d" % i) for i in range(count("scenes/"))],
+        }
+
+    # --- Mise à jour ---
+    def _refresh(self):
+        song = self._get_song()
+        objects = self._objects(song)
+        if self._structure:
+            self._structure = False
+            for key in list(self._bindings): self._unbind(key)
+            self._bind_song(song)
+            for key, obj in objects.items(): self._bind(key, obj)
+            self._dirty.update(objects)
+        else:
+            for key in self._rebind & set(objects):
+                self._unbind(key)
+                self._bind(key, objects[key])
+        self._rebind.clear()
+        changed = {}
+        for key in list(self._nodes):
+            if key not in objects:
+                del self._nodes[key]
+                changed[key] = None
+        for key in self._dirty & set(objects):
+            data = self._read(key, objects[key])
+            if key not in self._nodes or self._nodes[key][1] != data: changed[key] = data
+        self._dirty.clear()
+        if not changed: return
+        self.version += 1
+        for key, data in changed.items():
+            if data is None: self._removed[key] = self.version
+            else:
+                self._nodes[key] = (self.version, data)
+                self._removed.pop(key, None)
+        if len(self._removed) > MAX_TOMBSTONES:
+            oldest = sorted(self._removed.items(), key=lambda kv: kv[1])[:len(self._removed) - MAX_TOMBSTONES]
+            for key, v in oldest: del self._removed[key]
+            self._horizon = max(v for key, v in oldest)
+
+    def _objects(self, song):
+        objects = {"song": song, "master": song.master_track}
+        for i, track in enumerate(song.tracks): objects["tracks/%d" % i] = track
+        for i, track in enumerate(song.return_tracks): objects["returns/%d" % i] = track
+        for i, scene in enumerate(song.scenes): objects["scenes/%d" % i] = scene
+        return objects
+
+    # --- Lecture ---
+    def _read(self, key, obj):
+        if key == "song":
+            data = dict((p, _get(obj, p)) for p in SONG_PROPS)
+            data.update(track_count=len(obj.tracks), return_track_count=len(obj.return_tracks), scene_count=len(obj.scenes))
+            return data
+        if key.startswith("scenes/"): return {"name": obj.name, "color": _get(obj, "color")}
+        return self._track_data(obj, with_slots=key.startswith("tracks/"))
+
+    def _track_data(self, track, with_slots):
+        mixer = track.mixer_device
+        data = dict((p, _get(track, p)) for p in TRACK_PROPS)
+        data["has_midi_input"] = _get(track, "has_midi_input")
+        data["volume"] = mixer.volume.value
+        data["panning"] = mixer.panning.value
+        data["devices"] = [self._device_data(d) for d in track.devices]
+        if with_slots: data["clip_slots"] = [self._slot_data(s) for s in track.clip_slots]
+        return data
+
+    def _device_data(self, device):
+        return {"name": device.name, "class_name": _get(device, "class_name"),
+                "parameters": [{"name": p.name, "value": p.value, "min": p.min, "max": p.max} for p in device.parameters]}
+
+    def _slot_data(self, slot):
+        if not slot.has_clip: return {"has_clip": False}
+        clip = slot.clip
+        data = dict((p, _get(clip, p)) for p in CLIP_PROPS)
+        data.update(has_clip=True, length=_get(clip, "length"), is_midi_clip=_get(clip, "is_midi_clip"))
+        return data
+
+    # --- Listeners ---
+    def _bind_song(self, song):
+        def on_structure():
+            self._structure = True
+        self._listen("song", song, SONG_PROPS, lambda: self._dirty.add("song"))
+        self._listen("song", song, STRUCTURE_PROPS, on_structure)
+
+    def _bind(self, key, obj):
+        mark = lambda: self._dirty.add(key)
+        def mark_rebind():
+            self._dirty.add(key)
+            self._rebind.add(key)
+        if key == "song": return
+        if key.startswith("scenes/"):
+            self._listen(key, obj, ("name", "color"), mark)
+            return
+        self._listen(key, obj, TRACK_PROPS, mark)
+        self._listen(key, obj, TRACK_LIST_PROPS, mark_rebind)
+        self._listen(key, obj.mixer_device.volume, ("value",), mark)
+        self._listen(key, obj.mixer_device.panning, ("value",), mark)
+        for device in obj.devices:
+            self._listen(key, device, ("name",), mark)
+            self._listen(key, device, ("parameters",), mark_rebind)
+            for param in device.parameters: self._listen(key, param, ("value",), mark)
+        if key.startswith("tracks/"):
+            for slot in obj.clip_slots:
+                self._listen(key, slot, ("has_clip",), mark_rebind)
+                if slot.has_clip: self._listen(key, slot.clip, CLIP_PROPS, mark)
+
+    def _listen(self, key, obj, props, callback):
+        for prop in props:
+            add = getattr(obj, "add_%s_listener" % prop, None)
+            if add is None: continue
+            try:
+                add(callback)
+                self._bindings.setdefault(key, []).append((obj, prop, callback))
+            except Exception: pass
+
+    def _unbind(self, key):
+        for obj, prop, callback in self._bindings.pop(key, []):
+            try: getattr(obj, "remove_%s_listener" % prop)(callback)
+            except Exception: pass
+
+    def clear(self):
+        """Retire tous les listeners posés sur Live."""
+        for key in list(self._bindings): self._unbind(key)
+        self._structure = True
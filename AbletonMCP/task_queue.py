@@ -0,0 +1,191 @@
+# AbletonMCP/task_queue.py
+from __future__ import absolute_import, print_function, unicode_literals
+import bisect, collections, heapq, itertools, threading, time
+from .lom_paths import compile_path
+
+# Commandes qui passent par le Browser : Live charge toujours sur la piste sélectionnée
+FOCUS_COMMANDS = ("load_device", "load_sample")
+
+# Voies de priorité, de la plus urgente à la moins urgente (préséance stricte)
+LANES = ("realtime", "interactive", "bulk")
+REALTIME, INTERACTIVE, BULK = range(len(LANES))
+# Transport et lancement (via universal_accessor) : méthodes appelées et propriétés écrites
+TRANSPORT_CALLS = ("fire", "stop", "start_playing", "stop_playing", "continue_playing", "stop_all_clips",
+                   "tap_tempo", "jump_by", "scrub_by", "trigger_session_record", "set_fire_button_state")
+TRANSPORT_PROPERTIES = ("is_playing", "current_song_time", "record_mode", "session_record", "overdub",
+                        "arrangement_overdub", "metronome")
+# Travail de fond : gros volumes de notes, chargements et recherches dans le Browser, instantanés
+BULK_COMMANDS = ("add_midi_notes", "sync_notes", "load_device", "load_sample", "search_browser",
+                 "get_session_info", "add_automation")
+
+# Nombre de tâches en attente examinées (depuis la fin de la voie) pour fusionner une écriture
+COALESCE_WINDOW = 64
+
+def needs_focus(task):
+    return task.cmd_type in FOCUS_COMMANDS and task.params.get("track_index") is not None
+
+def classify(cmd_type, params, requested=None):
+    """Voie d'une commande : celle demandée ("priority") si elle est valide, sinon déduite de la commande.
+
+    Les commandes à focus ne passent jamais en temps réel : doubler le lot à focus en cours changerait
+    la piste sélectionnée sous ses chargements.
+    """
+    if requested in LANES and not (requested == "realtime" and cmd_type in FOCUS_COMMANDS): return LANES.index(requested)
+    if cmd_type == "universal_accessor":
+        attr = (params.get("path") or "").rsplit(".", 1)[-1]
+        action = params.get("action")
+        if (action == "call" and attr in TRANSPORT_CALLS) or (action == "set" and attr in TRANSPORT_PROPERTIES): return REALTIME
+        return INTERACTIVE
+    return BULK if cmd_type in BULK_COMMANDS else INTERACTIVE
+
+# Étapes dont la cible dépend d'un autre objet (vue, parent) : même chemin, cible variable ou partagée
+INDIRECT_STEPS = ("view", "canonical_parent")
+
+def _retargets(name):
+    """Attribut dont l'écriture change ce que désignent d'autres chemins (sélection, noms)."""
+    return name == "name" or name.startswith("selected_")
+
+def _indirect(step):
+    """Étape dont le texte ne fixe pas seul la cible : par nom, via la vue ou un parent, index négatif."""
+    return step[0] == "name" or step[1] in INDIRECT_STEPS or _retargets(step[1]) or (step[0] == "index" and step[2] < 0)
+
+def write_key(cmd_type, params):
+    """Cible d'une écriture fusionnable : chemin LOM compilé, ou (piste, device, paramètre) ; None sinon.
+
+    None fait barrière. C'est le cas de toute écriture qui peut changer la cible d'un autre chemin
+    (selected_*, name), et de tout chemin dont la cible dépend de la sélection, d'un nom ou d'un autre
+    objet (view.selected_track..., tracks["Bass"]..., tracks[-1]...) : le texte du chemin ne garantit
+    plus la même cible. Deux clés de chemin différentes désignent donc des cibles différentes.
+    """
+    if cmd_type == "universal_accessor" and params.get("action") == "set":
+        try: compiled = compile_path(params.get("path") or "")
+        except Exception: return None
+        if compiled.attr is None or compiled.is_multi or _retargets(compiled.attr): return None
+        if any(_indirect(step) for step in compiled.steps): return None
+        return ("path", compiled.root, compiled.steps, compiled.attr)
+    if cmd_type == "set_device_param" and params.get("track_index") is not None and params.get("device_name") and params.get("param_name"):
+        return ("param", params["track_index"], params["device_name"].lower(), params["param_name"].lower())
+    return None
+
+def may_alias(key, other):
+    """Deux écritures de clés différentes peuvent-elles toucher la même cible ?
+
+    Devices et paramètres sont trouvés par nom partiel ("Auto" trouve "Auto Filter") : deux écritures
+    par nom sur la même piste peuvent viser le même paramètre, et un chemin qui écrit .value peut
+    désigner un paramètre écrit par nom.
+    """
+    if key[0] == other[0]: return key[0] == "param" and key[1] == other[1]
+    return (key if key[0] == "path" else other)[3] == "value"
+
+class TaskQueue(object):
+    """File thread-safe des tâches : une FIFO par voie de priorité, extraction groupée par piste des
+    commandes à focus, retrait des tâches annulées ou dont l'échéance est passée.
+
+    Chaque tâche reçoit un numéro d'arrivée (seq). Hors voie temps réel, aucune tâche ne double une
+    commande à focus arrivée avant elle : le device ou l'échantillon chargé est souvent la cible des
+    commandes suivantes (load_device puis set_device_param sur ce device).
+
+    Une écriture dont la cible a déjà une écriture en attente (même client, même voie) est fusionnée
+    avec elle : la dernière valeur l'emporte, à la place de l'écriture la plus ancienne. Toute autre
+    commande fait barrière : on ne fusionne jamais par-dessus une lecture, un appel, un changement de
+    sélection ou un renommage (voir write_key), ni par-dessus une écriture qui pourrait viser la même
+    cible sous une autre clé (voir may_alias).
+    """
+    def __init__(self):
+        self._lanes = tuple(collections.deque() for _ in LANES)
+        self._lock = threading.Lock()
+        self._next_deadline = None
+        self._seq = itertools.count()
+        # Numéros d'arrivée (triés) des commandes à focus en file
+        self._focus_seqs = []
+
+    def put(self, task):
+        """Met la tâche en file ; renvoie la tâche en attente qui l'a absorbée (écriture fusionnée), ou None."""
+        with self._lock:
+            task.seq = next(self._seq)
+            lane = self._lanes[task.lane]
+            if task.write_key is not None:
+                for i in range(1, min(len(lane), COALESCE_WINDOW) + 1):
+                    queued = lane[-i]
+                    if queued.write_key is None: break
+                    if queued.write_key == task.write_key:
+                        if queued.client is not task.client: break
+                        queued.absorb(task)
+                        return queued
+                    if may_alias(queued.write_key, task.write_key): break
+            lane.append(task)
+            if needs_focus(task): self._focus_seqs.append(task.seq)
+            if task.deadline is not None and (self._next_deadline is None or task.deadline < self._next_deadline):
+                self._next_deadline = task.deadline
+        return None
+
+    def put_front(self, task):
+        """Remet en tête de sa voie une tâche retirée par get (elle garde son numéro d'arrivée)."""
+        with self._lock:
+            self._lanes[task.lane].appendleft(task)
+            if needs_focus(task): bisect.insort(self._focus_seqs, task.seq)
+
+    def get(self, max_lane=BULK, before=None):
+        """Retire la tâche de tête de la voie la plus urgente, jusqu'à max_lane (None si rien ne peut passer).
+
+        Une tête arrivée après la plus ancienne commande à focus en file attend derrière elle. Avec before
+        (lot à focus qui attend la sélection), seules passent les tâches arrivées avant ce numéro.
+        """
+        with self._lock:
+            limit = self._focus_seqs[0] if self._focus_seqs else None
+            if before is not None and (limit is None or before <= limit): limit = before - 1
+            for i, lane in enumerate(self._lanes[:max_lane + 1]):
+                if lane and (i == REALTIME or limit is None or lane[0].seq <= limit): return self._pop(lane)
+            return None
+
+    def take_focus_run(self, first):
+        """Retire les commandes à focus de la même piste arrivées juste après first, sans autre tâche entre
+        elles (voie temps réel exceptée) : le lot ne fait passer aucune tâche devant une autre."""
+        track_index = first.params.get("track_index")
+        with self._lock:
+            later = heapq.merge(*[((t.seq, t) for t in lane if t.seq > first.seq) for lane in self._lanes[INTERACTIVE:]])
+            run = [t for _, t in itertools.takewhile(lambda e: needs_focus(e[1]) and e[1].params.get("track_index") == track_index, later)]
+            for t in run: self._discard(t)
+        return run
+
+    def remove(self, match):
+        """Retire et renvoie les tâches pour lesquelles match(tâche) est vrai, voie par voie."""
+        removed = []
+        with self._lock:
+            for lane in self._lanes:
+                if not any(match(t) for t in lane): continue
+                kept = []
+                for t in lane: (removed if match(t) else kept).append(t)
+                lane.clear()
+                lane.extend(kept)
+            gone = set(t.seq for t in removed if needs_focus(t))
+            if gone: self._focus_seqs = [seq for seq in self._focus_seqs if seq not in gone]
+        return removed
+
+    def pop_expired(self, now=None):
+        """Retire les tâches dont l'échéance est passée (parcours seulement si la plus proche est dépassée)."""
+        now = time.time() if now is None else now
+        if self._next_deadline is None or now < self._next_deadline: return []
+        expired = self.remove(lambda t: t.deadline is not None and t.deadline < now)
+        with self._lock:
+            deadlines = [t.deadline for lane in self._lanes for t in lane if t.deadline is not None]
+            self._next_deadline = min(deadlines) if deadlines else None
+        return expired
+
+    def _pop(self, lane):
+        task = lane.popleft()
+        if needs_focus(task): self._focus_seqs.remove(task.seq)
+        return task
+
+    def _discard(self, task):
+        self._lanes[task.lane].remove(task)
+        self._focus_seqs.remove(task.seq)
+
+    def empty(self):
+        return not any(self._lanes)
+
+    def qsize(self):
+        return sum(len(lane) for lane in self._lanes)
+
+    def depths(self):
+        return dict((name, len(lane)) for name, lane in zip(LANES, self._lanes))
@@ -0,0 +1,50 @@
+# AbletonMCP/transaction.py
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Commandes interdites dans une transaction (elles n'ont de sens qu'au niveau de la connexion)
+EXCLUDED_COMMANDS = ("transaction", "hello", "ping", "cancel", "subscribe", "unsubscribe")
+
+
+def normalize_op(op, index):
+    """Opération -> (type de commande, params, alias, condition).
+
+    Formes acceptées : {"type": ..., "params": {...}} comme une commande isolée, ou les raccourcis
+    LOM {"get": chemin}, {"set": chemin, "value": v}, {"call": chemin, "value": v}.
+    "as" nomme le résultat pour les références suivantes, "when" conditionne l'exécution.
+    """
+    if not isinstance(op, dict): raise ValueError("Operation " + str(index) + " is not an object")
+    for action in ("get", "set", "call"):
+        if action in op:
+            cmd_type, params = "universal_accessor", {"action": action, "path": op[action], "value": op.get("value")}
+            break
+    else:
+        cmd_type, params = op.get("type") or op.get("command"), dict(op.get("params") or {})
+    if not cmd_type: raise ValueError("Operation " + str(index) + " has no type")
+    if cmd_type in EXCLUDED_COMMANDS: raise ValueError("Command not allowed in a transaction: " + str(cmd_type))
+    return cmd_type, params, op.get("as"), op.get("when", True)
+
+
+def resolve_refs(value, results, named):
+    """Remplace les {"$ref": "alias.clé.0"} (ou {"$ref": index}) par les résultats des opérations précédentes."""
+    if isinstance(value, dict):
+        if len(value) == 1 and "$ref" in value: return lookup(value["$ref"], results, named)
+        return dict((k, resolve_refs(v, results, named)) for k, v in value.items())
+    if isinstance(value, list): return [resolve_refs(v, results, named) for v in value]
+    return value
+
+
+def lookup(ref, results, named):
+    if isinstance(ref, int): head, rest = ref, []
+    else:
+        parts = str(ref).split(".")
+        head, rest = parts[0], parts[1:]
+        if head not in named and head.isdigit(): head = int(head)
+    if isinstance(head, int):
+        if not 0 <= head < len(results): raise ValueError("Reference to a later or unknown operation: " + str(ref))
+        value = results[head]
+    elif head in named: value = named[head]
+    else: raise ValueError("Unknown reference: " + str(ref))
+    for key in rest:
+        try: value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, ValueError, TypeError): raise ValueError("Invalid reference: " + str(ref))
+    return value
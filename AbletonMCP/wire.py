@@ -0,0 +1,150 @@
+# AbletonMCP/wire.py
+from __future__ import absolute_import, print_function, unicode_literals
+import array, json, struct, sys
+
+# Trame : longueur du message (4 octets, big-endian) puis le message lui-même
+HEADER = struct.Struct(">I")
+_BRACE = 123
+
+
+def encode_frame(payload):
+    return HEADER.pack(len(payload)) + payload
+
+
+class FrameDecoder(object):
+    """Découpe incrémentale d'un flux d'octets en messages, en temps linéaire.
+
+    Le mode est détecté sur le premier octet : "{" désigne un ancien client qui envoie du JSON
+    délimité par des retours à la ligne, tout le reste une trame préfixée par sa longueur.
+    """
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+        self._scan = 0
+        self.legacy = None
+
+    def feed(self, data):
+        """Ajoute des octets reçus ; retourne la liste des messages complets (bytes)."""
+        self._buf += data
+        frames = []
+        while self._pos < len(self._buf):
+            if self.legacy is None: self.legacy = self._buf[self._pos] == _BRACE
+            frame = self._next_line() if self.legacy else self._next_frame()
+            if frame is None: break
+            if frame: frames.append(frame)
+        # On ne recopie le tampon que lorsque la partie consommée en représente l'essentiel
+        if self._pos and self._pos * 2 >= len(self._buf):
+            del self._buf[:self._pos]
+            self._scan -= self._pos
+            self._pos = 0
+        return frames
+
+    def _next_frame(self):
+        start = self._pos + HEADER.size
+        if len(self._buf) < start: return None
+        end = start + HEADER.unpack_from(self._buf, self._pos)[0]
+        if len(self._buf) < end: return None
+        self._pos = end
+        return bytes(self._buf[start:end])
+
+    def _next_line(self):
+        # _scan évite de relire la partie déjà parcourue d'une longue ligne reçue en plusieurs morceaux
+        end = self._buf.find(b"\n", max(self._scan, self._pos))
+        if end < 0:
+            self._scan = len(self._buf)
+            return None
+        line = bytes(self._buf[self._pos:end]).strip()
+        self._pos = self._scan = end + 1
+        return line
+
+
+# --- Encodage binaire (négocié par "hello") ---
+# Premier octet d'un message binaire (jamais le début d'un JSON)
+BINARY_MAGIC = b"\xb1"
+# 3 : clés "$..." échappées, listes mixtes entiers/flottants laissées en JSON
+WIRE_PROTOCOL = 3
+# En dessous, le descripteur coûte plus que les nombres écrits en JSON
+MIN_PACKED_LEN = 8
+_HEAD_LEN = struct.Struct("<I")
+_INT_KINDS = (("B", 0, 255), ("b", -128, 127), ("h", -2 ** 15, 2 ** 15 - 1), ("i", -2 ** 31, 2 ** 31 - 1))
+_BIG_ENDIAN = sys.byteorder == "big"
+
+try: _integer_types = (int, long)
+except NameError: _integer_types = (int,)
+
+
+def encode_message(msg, binary=False):
+    """Message -> octets : JSON, ou binaire si le pair l'accepte et que le message contient des listes numériques.
+
+    Binaire : BINARY_MAGIC, longueur de l'en-tête (uint32 LE), en-tête JSON où chaque liste numérique
+    est remplacée par {"$a": [type, offset, nombre]}, puis les tableaux little-endian bout à bout.
+    Dans l'en-tête, les clés du message qui commencent par "$" en reçoivent un de plus ("$a" -> "$$a") :
+    un dict du message ne peut jamais être pris pour un descripteur.
+    """
+    if binary:
+        blobs = []
+        header = _pack(msg, blobs, [0])
+        if blobs:
+            head = json.dumps(header).encode("utf-8")
+            return BINARY_MAGIC + _HEAD_LEN.pack(len(head)) + head + b"".join(blobs)
+    return json.dumps(msg).encode("utf-8")
+
+
+def decode_message(frame):
+    if frame[:1] != BINARY_MAGIC: return json.loads(frame.decode("utf-8"))
+    body = _HEAD_LEN.size + 1 + _HEAD_LEN.unpack_from(frame, 1)[0]
+    header = json.loads(frame[_HEAD_LEN.size + 1:body].decode("utf-8"))
+    return _unpack(header, frame, body)
+
+
+def _array_kind(values):
+    """Type de tableau le plus étroit qui restitue exactement les valeurs (None : rester en JSON)."""
+    if len(values) < MIN_PACKED_LEN: return None
+    kinds = set(type(v) for v in values)
+    if kinds == set([bool]): return "?"
+    if bool in kinds: return None
+    if all(issubclass(k, _integer_types) for k in kinds):
+        low, high = min(values), max(values)
+        return next((code for code, lo, hi in _INT_KINDS if lo <= low and high <= hi), None)
+    # Une liste mixte entiers/flottants reviendrait tout en flottants : elle reste en JSON
+    if kinds == set([float]):
+        return "f" if array.array(str("f"), values).tolist() == list(values) else "d"
+    return None
+
+
+def _escape(key):
+    return "$" + key if key.startswith("$") else key
+
+
+def _unescape(key):
+    return key[1:] if key.startswith("$$") else key
+
+
+def _pack(obj, blobs, offset):
+    if isinstance(obj, dict): return dict((_escape(k), _pack(v, blobs, offset)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        kind = _array_kind(obj)
+        if kind is None: return [_pack(v, blobs, offset) for v in obj]
+        arr = array.array(str("B" if kind == "?" else kind), obj)
+        if _BIG_ENDIAN: arr.byteswap()
+        data = arr.tobytes() if hasattr(arr, "tobytes") else arr.tostring()
+        blobs.append(data)
+        ref = {"$a": [kind, offset[0], len(obj)]}
+        offset[0] += len(data)
+        return ref
+    return obj
+
+
+def _unpack(obj, frame, body):
+    if isinstance(obj, dict):
+        if len(obj) == 1 and "$a" in obj:
+            kind, start, count = obj["$a"]
+            arr = array.array(str("B" if kind == "?" else kind))
+            data = frame[body + start:body + start + count * arr.itemsize]
+            if hasattr(arr, "frombytes"): arr.frombytes(data)
+            else: arr.fromstring(data)
+            if _BIG_ENDIAN: arr.byteswap()
+            return [bool(v) for v in arr] if kind == "?" else arr.tolist()
+        return dict((_unescape(k), _unpack(v, frame, body)) for k, v in obj.items())
+    if isinstance(obj, list): return [_unpack(v, frame, body) for v in obj]
+    return obj
@@ -0,0 +1,71 @@
+# ableton-mcp-server/breaker.py
+import time
+from typing import Any, Dict, Optional
+
+# Délai avant la première nouvelle tentative, doublé à chaque échec consécutif
+DEFAULT_BASE_DELAY = 0.5
+# Plafond du délai entre deux tentatives (s)
+DEFAULT_MAX_DELAY = 30.0
+
+
+class CircuitBreaker:
+    """Disjoncteur de la connexion vers le Remote Script.
+
+    Fermé : les commandes passent. Après un échec (connexion refusée, battement de cœur sans réponse,
+    connexion coupée), il s'ouvre : les outils échouent immédiatement jusqu'à `retry_at`, puis une
+    seule tentative est autorisée (semi-ouvert). Le délai double à chaque échec consécutif, jusqu'à
+    `max_delay`, et revient à `base_delay` dès qu'une tentative réussit.
+    """
+
+    def __init__(self, base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error: Optional[str] = None
+        self._trial = False
+        self._stats = {"trips": 0, "rejected": 0}
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures > 0
+
+    def delay(self) -> float:
+        """Délai (s) imposé après l'échec courant."""
+        return min(self.max_delay, self.base_delay * 2 ** max(0, self.failures - 1))
+
+    def remaining(self) -> float:
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def allow(self) -> bool:
+        """Une commande peut-elle tenter sa chance ? (toujours si fermé, une seule à la fois une fois le délai écoulé)."""
+        if not self.is_open:
+            return True
+        if self._trial or self.remaining() > 0:
+            self._stats["rejected"] += 1
+            return False
+        self._trial = True
+        return True
+
+    def release(self):
+        """Rend la tentative semi-ouverte sans verdict (appelant annulé pendant la connexion) : une autre
+        commande pourra la retenter, sans allonger le délai."""
+        self._trial = False
+
+    def record_success(self):
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error = None
+        self._trial = False
+
+    def record_failure(self, error: Any):
+        if not self.is_open:
+            self._stats["trips"] += 1
+        self.failures += 1
+        self.retry_at = time.monotonic() + self.delay()
+        self.last_error = str(error)
+        self._trial = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": "open" if self.is_open else "closed", "failures": self.failures,
+                "retry_in": round(self.remaining(), 2), "last_error": self.last_error, **self._stats}
@@ -0,0 +1,408 @@
+# ableton-mcp-server/connection.py
+import asyncio
+import itertools
+import logging
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Union
+
+from streams import StreamStore
+from lom_cache import LomCache
+from breaker import CircuitBreaker
+from perf import PerfRecorder
+from wire import FrameDecoder, encode_frame, encode_message, decode_message, WIRE_PROTOCOL
+
+logger = logging.getLogger("AbletonUniversalServer")
+
+# Battement de cœur : intervalle entre deux "ping" et délai de réponse au-delà duquel la liaison est déclarée morte (s)
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 2.0
+# Battements consécutifs sans avancée du thread principal de Live (alors que des commandes attendent) avant alerte
+STALL_WARN_BEATS = 3
+
+# Au-delà de ce nombre de notes, la progression de l'insertion est journalisée
+NOTE_PROGRESS_LOG_MIN = 2000
+
+def note_columns(notes: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Liste de notes {"pitch", "start", "dur", "vel", "mute"} -> colonnes parallèles."""
+    return {
+        "pitch": [int(n["pitch"]) for n in notes],
+        "start": [float(n["start"]) for n in notes],
+        "dur": [float(n["dur"]) for n in notes],
+        "vel": [int(n.get("vel", 100)) for n in notes],
+        "mute": [bool(n.get("mute", False)) for n in notes],
+    }
+
+@dataclass
+class AbletonConnection:
+    """Connexion TCP persistante et multiplexée vers le Remote Script, pilotée par la boucle asyncio du serveur.
+
+    Chaque commande reçoit un identifiant unique ; une tâche lectrice associe chaque réponse
+    à la requête en attente. Les outils attendent leur réponse sans bloquer la boucle : des
+    appels indépendants avancent en parallèle, sans verrou global.
+    Les lectures simples passent par get_value() et un cache invalidé par le Remote Script
+    (cache_enabled=False pour toujours interroger Live). À la connexion, un "hello" négocie
+    l'encodage binaire des listes numériques (binary=False pour rester en JSON).
+    Avec un PerfRecorder dans perf, chaque commande est tracée étape par étape des deux côtés
+    (perf=None : aucune mesure, aucun champ en plus sur le fil).
+    supervise() surveille la liaison par battements de cœur et la rétablit ; tant qu'Ableton est
+    injoignable, le disjoncteur (breaker) fait échouer les commandes immédiatement.
+    """
+    host: str
+    port: int
+    timeout: float = 10.0
+    cache_enabled: bool = True
+    binary: bool = True
+    _writer: Optional[asyncio.StreamWriter] = field(default=None, init=False, repr=False)
+    _pending: Dict[int, asyncio.Future] = field(default_factory=dict, init=False, repr=False)
+    _progress: Dict[int, Callable[[Dict[str, Any]], None]] = field(default_factory=dict, init=False, repr=False)
+    _ids: Any = field(default_factory=lambda: itertools.count(1), init=False, repr=False)
+    _connect_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+    _send_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+    _reader_task: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker, init=False, repr=False)
+    heartbeat: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _stalled: int = field(default=0, init=False, repr=False)
+    perf: Optional[PerfRecorder] = field(default=None, init=False, repr=False)
+    streams: StreamStore = field(default_factory=StreamStore, init=False, repr=False)
+    cache: Optional[LomCache] = field(default=None, init=False, repr=False)
+    _binary_wire: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.cache_enabled:
+            self.cache = LomCache()
+
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        """Ouvre la connexion persistante si besoin (une seule fois pour toutes les tâches)."""
+        if self._writer is not None:
+            return self._writer
+        # Disjoncteur ouvert : si allow() accepte, cet appel détient la seule tentative autorisée
+        trial = self.breaker.is_open
+        if not self.breaker.allow():
+            raise self._unreachable()
+        try:
+            async with self._connect_lock:
+                if self._writer is not None:
+                    return self._writer
+                # Une autre tâche vient d'échouer pendant qu'on attendait le verrou : inutile de réessayer
+                if self.breaker.remaining() > 0:
+                    raise self._unreachable()
+                try:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+                except (OSError, asyncio.TimeoutError) as e:
+                    self._trip(e)
+                    raise self._unreachable() from e
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._writer = writer
+                self._binary_wire = False
+                self._reader_task = asyncio.create_task(self._reader_loop(reader, writer))
+                if self.breaker.is_open:
+                    logger.info(f"✅ Remote Script AbletonMCP détecté sur le port {self.port}")
+                self.breaker.record_success()
+                logger.info(f"🔌 Connexion persistante ouverte vers {self.host}:{self.port}")
+        except BaseException:
+            # Annulé (délai d'un outil, client) pendant la tentative : sans verdict, elle est rendue
+            if trial:
+                self.breaker.release()
+            raise
+        if self.binary:
+            await self._negotiate()
+        return writer
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    def _unreachable(self) -> ConnectionError:
+        return ConnectionError(f"Ableton injoignable ({self.breaker.last_error}) ; "
+                               f"nouvelle tentative dans {self.breaker.remaining():.1f}s")
+
+    def _trip(self, error: Any):
+        """Ouvre (ou maintient ouvert) le disjoncteur ; seule la première défaillance est signalée."""
+        if not self.breaker.is_open:
+            logger.warning(f"⚠️ Liaison avec Ableton interrompue : {error}")
+        self.breaker.record_failure(error)
+        logger.debug(f"Nouvelle tentative dans {self.breaker.delay():.1f}s (échec n°{self.breaker.failures})")
+
+    async def supervise(self):
+        """Tâche de fond : battement de cœur sur la connexion existante, reconnexion avec attente exponentielle."""
+        while True:
+            if self._writer is None:
+                # Le délai du disjoncteur sert d'attente exponentielle entre deux tentatives
+                await asyncio.sleep(max(self.breaker.remaining(), 0.05))
+                try:
+                    await self._ensure_connected()
+                except Exception:
+                    continue
+            await self._heartbeat()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def _heartbeat(self):
+        writer = self._writer
+        if writer is None:
+            return
+        sent = time.monotonic()
+        try:
+            res = await self.send_command("ping", timeout=HEARTBEAT_TIMEOUT)
+        except Exception as e:
+            if self._writer is writer:
+                self._drop_connection(writer, ConnectionError(f"Ableton ne répond plus (battement de cœur manqué : {e})"))
+            return
+        # Le Remote Script répond depuis son thread réseau : un compteur de ticks figé signale un thread principal bloqué
+        stalled = res.get("queued", 0) > 0 and res.get("ticks") == self.heartbeat.get("ticks")
+        self._stalled = self._stalled + 1 if stalled else 0
+        if self._stalled == STALL_WARN_BEATS:
+            logger.warning(f"🐢 Live ne traite plus les commandes ({res.get('queued')} en attente)")
+        self.heartbeat = {"rtt_ms": round((time.monotonic() - sent) * 1000.0, 2), "ticks": res.get("ticks"),
+                          "queued": res.get("queued"), "busy": res.get("busy"), "at": time.time()}
+
+    async def _negotiate(self):
+        """Annonce les encodages acceptés ; un Remote Script plus ancien (refus de "hello", autre version de
+        l'encodage binaire) garde le JSON."""
+        try:
+            res = await self.send_command("hello", {"encodings": ["binary", "json"], "protocol": WIRE_PROTOCOL},
+                                          timeout=min(self.timeout, 2.0))
+            self._binary_wire = "binary" in res.get("encodings", []) and res.get("protocol") == WIRE_PROTOCOL
+        except Exception:
+            self._binary_wire = False
+        logger.info(f"🧬 Encodage négocié : {'binaire' if self._binary_wire else 'JSON'}")
+
+    async def _reader_loop(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Distribue les réponses d'Ableton aux requêtes en attente, selon leur id."""
+        decoder = FrameDecoder()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for frame in decoder.feed(data):
+                    self._dispatch(frame)
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        self._drop_connection(writer, ConnectionError("Connexion perdue avec Ableton"))
+
+    def _dispatch(self, frame: bytes):
+        try:
+            response = decode_message(frame)
+        except (ValueError, struct.error):
+            logger.warning("Réponse illisible reçue d'Ableton")
+            return
+        if response.get("event") == "stream":
+            self.streams.ingest(response)
+            return
+        if response.get("event") == "progress":
+            callback = self._progress.get(response.get("id"))
+            if callback is not None:
+                callback(response)
+            return
+        if response.get("event") == "invalidate":
+            if self.cache is not None:
+                self.cache.invalidate(response.get("paths", []))
+            return
+        future = self._pending.pop(response.get("id"), None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def _drop_connection(self, writer: asyncio.StreamWriter, error: Exception):
+        """Ferme la connexion et fait échouer toutes les requêtes encore en vol."""
+        if self._writer is writer:
+            self._writer = None
+            self.streams.reset()
+            if self.cache is not None:
+                self.cache.clear()
+            self._trip(error)
+        writer.close()
+        for req_id in list(self._pending):
+            future = self._pending.pop(req_id, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+
+    async def send_command(self, command_type: str, params: Dict[str, Any] = None, wait_result: bool = True, timeout: Optional[float] = None,
+                           on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                           priority: Optional[str] = None, tag: Optional[str] = None) -> Dict[str, Any]:
+        """Envoie une commande sur la connexion persistante et attend sa réponse.
+
+        wait_result=True : la réponse arrive une fois la commande exécutée par Live (résultat ou erreur).
+        wait_result=False : simple accusé de réception ("queued") dès la mise en file.
+        timeout : délai maximal (secondes) ; au-delà, Live abandonne la commande si elle n'a pas encore tourné.
+        Pour une tâche longue (insertion de notes par morceaux), chaque événement de progression
+        relance le délai et est transmis à on_progress.
+        priority : voie de la file de Live ("realtime", "interactive", "bulk") ; par défaut, Live la déduit
+        de la commande (transport et lancement en temps réel, notes et Browser en tâche de fond).
+        tag : étiquette permettant d'annuler un groupe de commandes en attente (cancel).
+        Si l'appel est abandonné (délai dépassé, tâche annulée), Live est prié de ne pas l'exécuter.
+        """
+        # SÉCURITÉ ANTI-NONE : On vérifie que la commande a un nom
+        if not command_type:
+            logger.error("Tentative d'envoi d'une commande vide (None)")
+            raise ValueError("Le type de commande ne peut pas être vide")
+
+        req_id = next(self._ids)
+        timeout = timeout or self.timeout
+        command = {"id": req_id, "type": str(command_type), "params": params or {},
+                   "reply": "result" if wait_result else "ack", "timeout": timeout}
+        if priority is not None:
+            command["priority"] = priority
+        if tag is not None:
+            command["tag"] = tag
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        last_progress = [time.monotonic()]
+        def progress(event: Dict[str, Any]):
+            last_progress[0] = time.monotonic()
+            if on_progress is not None:
+                on_progress(event)
+        self._progress[req_id] = progress
+        perf, response = self.perf, None
+        if perf is not None:
+            command["trace"] = True
+            stages, t0 = {}, time.perf_counter()
+        try:
+            writer = await self._ensure_connected()
+            if perf is not None:
+                stages["connect_ms"] = (time.perf_counter() - t0) * 1000.0
+                t1 = time.perf_counter()
+
+            # Logging de la commande sortante
+            if command_type not in ("get_session_info", "hello", "ping"):
+                logger.info(f"📤 [ENVOI] {command_type} | Piste: {(params or {}).get('track_index', '?')}")
+
+            payload = encode_frame(encode_message(command, self._binary_wire))
+            try:
+                async with self._send_lock:
+                    writer.write(payload)
+                    await writer.drain()
+            except OSError as e:
+                self._drop_connection(writer, ConnectionError(str(e)))
+                raise
+            if perf is not None:
+                stages["send_ms"] = (time.perf_counter() - t1) * 1000.0
+
+            while True:
+                remaining = last_progress[0] + timeout - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Pas de réponse d'Ableton après {timeout}s ({command_type})")
+                try:
+                    response = await asyncio.wait_for(asyncio.shield(future), remaining)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            if response.get("status") == "error":
+                raise Exception(response.get("message"))
+
+            return response.get("result", response)
+
+        except asyncio.CancelledError:
+            self._abandon(command_type, req_id)
+            raise
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                self._abandon(command_type, req_id)
+            logger.error(f"💥 Erreur de communication Ableton : {str(e)}")
+            raise e
+        finally:
+            self._pending.pop(req_id, None)
+            self._progress.pop(req_id, None)
+            if perf is not None:
+                stages["total_ms"] = (time.perf_counter() - t0) * 1000.0
+                ok = response is not None and response.get("status") != "error"
+                perf.record(str(command_type), stages, response.get("timing") if response else None, ok)
+
+    async def cancel(self, ids: Optional[List[int]] = None, tag: Optional[str] = None,
+                     lanes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Annule des commandes envoyées par cette connexion : par identifiant, ou par étiquette et/ou voie.
+        Live répond sans attendre sa file ; les tâches longues en cours s'arrêtent à leur prochaine tranche."""
+        params: Dict[str, Any] = {}
+        if ids:
+            params["ids"] = list(ids)
+        if tag is not None:
+            params["tag"] = tag
+        if lanes is not None:
+            params["lanes"] = list(lanes)
+        return await self.send_command("cancel", params, timeout=min(self.timeout, 2.0))
+
+    def _abandon(self, command_type: str, req_id: int):
+        """Requête sans réponse abandonnée par le serveur : Live la retire de sa file (ou arrête la tâche longue)."""
+        if command_type in ("hello", "ping", "cancel") or not self.connected:
+            return
+        async def cancel():
+            try:
+                await self.cancel(ids=[req_id])
+            except Exception as e:
+                logger.debug(f"Annulation de la requête {req_id} non transmise : {e}")
+        asyncio.ensure_future(cancel())
+
+    async def get_value(self, path: str) -> Any:
+        """Lecture d'une propriété du LOM via le cache (aller-retour vers Live seulement en cas d'absence)."""
+        if self.cache is None:
+            return await self.send_command("universal_accessor", {"action": "get", "path": path})
+        hit, value = self.cache.get(path)
+        if hit:
+            return value
+        epoch = self.cache.begin()
+        res = await self.send_command("universal_accessor", {"action": "get", "path": path, "observe": True})
+        self.cache.put(path, res["value"], res["observed"], epoch)
+        return res["value"]
+
+    async def set_value(self, path: str, value: Any) -> Any:
+        """Écriture d'une propriété ; l'entrée en cache est retirée avant même la notification de Live."""
+        if self.cache is not None:
+            self.cache.invalidate([path])
+        return await self.send_command("universal_accessor", {"action": "set", "path": path, "value": value})
+
+    async def add_notes(self, track_index: int, clip_index: int, notes: Union[List[Dict[str, Any]], Dict[str, List[Any]]],
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Ajoute des notes à un clip, envoyées en colonnes parallèles (pitch/start/dur/vel/mute).
+
+        Live les insère par morceaux répartis sur plusieurs ticks ; notes peut être une liste de dicts
+        par note ou directement un dict de colonnes.
+        """
+        columns = notes if isinstance(notes, dict) else note_columns(notes)
+        total = len(columns.get("pitch", []))
+        if on_progress is None and total > NOTE_PROGRESS_LOG_MIN:
+            on_progress = lambda p: logger.info(f"🎼 Notes insérées : {p['done']}/{p['total']}")
+        return await self.send_command("add_midi_notes", {"track_index": track_index, "clip_index": clip_index, "notes": columns},
+                                       on_progress=on_progress)
+
+    async def sync_notes(self, track_index: int, clip_index: int, notes: Union[List[Dict[str, Any]], Dict[str, List[Any]]],
+                         region: Optional[Dict[str, float]] = None,
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Remplace les notes d'un clip (ou d'une zone {"pitch_low", "pitch_high", "start", "end"}) par cet
+        ensemble : Live n'applique que les différences (ajouts, suppressions, modifications)."""
+        columns = notes if isinstance(notes, dict) else note_columns(notes)
+        params = {"track_index": track_index, "clip_index": clip_index, "notes": columns}
+        if region:
+            params["region"] = {k: v for k, v in region.items() if v is not None}
+        return await self.send_command("sync_notes", params, on_progress=on_progress)
+
+    async def transaction(self, ops: List[Dict[str, Any]], stop_on_error: bool = True) -> Dict[str, Any]:
+        """Exécute une liste d'opérations en une seule passe côté Live (un seul aller-retour, un seul pas d'annulation).
+
+        Chaque opération : {"type": commande, "params": {...}} ou raccourci {"get"/"set"/"call": chemin, "value": v},
+        avec "as" pour nommer son résultat et "when" pour la conditionner ; {"$ref": "nom.clé"} dans les
+        paramètres reprend un résultat précédent. Retourne {"results": [...], "completed": n, "failed": index|None}.
+        """
+        if self.cache is not None:
+            self.cache.invalidate([op["set"] for op in ops if "set" in op])
+        return await self.send_command("transaction", {"ops": ops, "stop_on_error": stop_on_error})
+
+    async def subscribe(self, key: str, paths: List[str], rate_hz: float = 10.0) -> int:
+        """Abonnement (idempotent par clé) à des propriétés poussées en continu dans self.streams."""
+        sub_id = self.streams.subscription(key)
+        if sub_id is not None:
+            return sub_id
+        res = await self.send_command("subscribe", {"paths": paths, "rate_hz": rate_hz})
+        self.streams.register(key, res["subscription"], paths)
+        logger.info(f"📡 Abonnement '{key}' ({len(paths)} propriétés à {res['rate_hz']} Hz)")
+        return res["subscription"]
+
+    async def unsubscribe(self, key: str) -> bool:
+        sub_id = self.streams.forget(key)
+        if sub_id is None:
+            return False
+        await self.send_command("unsubscribe", {"subscription": sub_id})
+        return True
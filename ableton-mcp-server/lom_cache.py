@@ -0,0 +1,88 @@
+# ableton-mcp-server/lom_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Taille maximale du cache (éviction LRU au-delà)
+DEFAULT_MAX_ENTRIES = 2048
+# Durée de vie (s) des valeurs que le Remote Script ne peut pas observer (pas de listener Live)
+DEFAULT_TTL = 2.0
+# Nombre d'invalidations mémorisées pour écarter les lectures arrivées après coup
+_MAX_INVALIDATIONS = 4096
+
+
+class LomCache:
+    """Cache LRU des valeurs du LOM, indexé par chemin.
+
+    Une valeur "observée" reste valide jusqu'à l'événement d'invalidation envoyé par le Remote Script ;
+    les autres expirent après `ttl` secondes. Une lecture en vol peut croiser une invalidation : on
+    note l'époque au départ (begin) et put() ignore la valeur si le chemin a été invalidé entre-temps.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._floor = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, path: str) -> Tuple[bool, Any]:
+        """(True, valeur) si le chemin est en cache et valide, sinon (False, None)."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                del self._entries[path]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(path)
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def begin(self) -> int:
+        """Époque courante, à passer à put() pour une lecture qui commence."""
+        with self._lock:
+            return self._epoch
+
+    def put(self, path: str, value: Any, observed: bool, epoch: int):
+        with self._lock:
+            if epoch < self._floor or self._invalidated.get(path, -1) >= epoch:
+                return
+            self._entries[path] = (value, None if observed else time.monotonic() + self.ttl)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, paths: Iterable[str]):
+        with self._lock:
+            for path in paths:
+                if self._entries.pop(path, None) is not None:
+                    self._stats["invalidations"] += 1
+                self._invalidated[path] = self._epoch
+                self._invalidated.move_to_end(path)
+            self._epoch += 1
+            while len(self._invalidated) > _MAX_INVALIDATIONS:
+                _, epoch = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, epoch + 1)
+
+    def clear(self):
+        """Vide le cache (connexion perdue : les listeners du Remote Script n'existent plus)."""
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._invalidated.clear()
+            self._epoch += 1
+            self._floor = self._epoch
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, size=len(self._entries), max_entries=self.max_entries, ttl=self.ttl,
+                        hit_rate=round(self._stats["hits"] / lookups, 3) if lookups else None)
@@ -13,23 +13,21 @@ logger = logging.getLogger("AbletonUniversal.Arrangement")
 def register_tools(mcp, get_conn):
     
     @mcp.tool()
-    def build_song_skeleton(sections: list) -> str:
+    async def build_song_skeleton(sections: list) -> str:
         """Construit la structure du morceau en nommant les scènes de la vue Session."""
         logger.info(f"🏗️ Création du squelette du morceau : {sections}")
         conn = get_conn()
         try:
             logger.debug("-> Étape 1 : Récupération du nombre de scènes actuelles via LOM")
-            scenes_raw = conn.send_command("universal_accessor", {"action": "get", "path": "song.scenes"})
+            scenes_raw = await conn.get_value("song.scenes")
             current_scene_count = len(scenes_raw) if isinstance(scenes_raw, list) else 1
             
-            logger.debug(f"-> Étape 2 : Création des scènes manquantes (Actuel: {current_scene_count}, Cible: {len(sections)})")
-            while current_scene_count < len(sections):
-                conn.send_command("universal_accessor", {"action": "call", "path": "song.create_scene", "value": -1})
-                current_scene_count += 1
-            
-            logger.debug("-> Étape 3 : Renommage de chaque scène")
-            for i, name in enumerate(sections):
-                conn.send_command("universal_accessor", {"action": "set", "path": f"song.scenes[{i}].name", "value": str(name)})
+            logger.debug(f"-> Étape 2 : Création des scènes manquantes et renommage en une transaction (Actuel: {current_scene_count}, Cible: {len(sections)})")
+            ops = [{"call": "song.create_scene", "value": -1}] * max(0, len(sections) - current_scene_count)
+            ops += [{"set": f"song.scenes[{i}].name", "value": str(name)} for i, name in enumerate(sections)]
+            res = await conn.transaction(ops)
+            if res["failed"] is not None:
+                raise Exception(res["results"][res["failed"]]["error"])
                 
             return f"✅ Structure créée avec {len(sections)} sections : {', '.join(sections)}."
         except Exception as e:
@@ -37,38 +35,29 @@ def register_tools(mcp, get_conn):
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def create_variation_from_scene(source_scene_index: int, new_scene_name: str, tracks_to_clear: list) -> str:
+    async def create_variation_from_scene(source_scene_index: int, new_scene_name: str, tracks_to_clear: list) -> str:
         """Duplique une scène pleine pour créer une variation."""
         logger.info(f"✂️ Duplication de la scène {source_scene_index} -> '{new_scene_name}'")
         logger.debug(f"-> Pistes à nettoyer (Mute) : {tracks_to_clear}")
         
         conn = get_conn()
         try:
-            logger.debug("-> Action LOM : Duplication de la scène source")
-            conn.send_command("universal_accessor", {"action": "call", "path": "song.duplicate_scene", "value": source_scene_index})
-            
             new_scene_index = source_scene_index + 1
-            
-            logger.debug(f"-> Action LOM : Renommage de la nouvelle scène (index {new_scene_index}) en '{new_scene_name}'")
-            conn.send_command("universal_accessor", {"action": "set", "path": f"song.scenes[{new_scene_index}].name", "value": new_scene_name})
-            
-            cleared_count = 0
+
+            # Une seule transaction : duplication, renommage, puis suppression des clips présents
+            logger.debug(f"-> Transaction LOM : duplication, renommage (index {new_scene_index}), nettoyage des pistes {tracks_to_clear}")
+            ops = [
+                {"call": "song.duplicate_scene", "value": source_scene_index},
+                {"set": f"song.scenes[{new_scene_index}].name", "value": new_scene_name},
+            ]
             for t_idx in tracks_to_clear:
-                logger.debug(f"-> Action LOM : Vérification de présence de clip sur la piste {t_idx}")
-                has_clip = conn.send_command("universal_accessor", {
-                    "action": "get", 
-                    "path": f"song.tracks[{t_idx}].clip_slots[{new_scene_index}].has_clip"
-                })
-                
-                if str(has_clip).lower() == "true":
-                    logger.debug(f"   ↳ Clip trouvé sur piste {t_idx} ! Action LOM : Suppression du clip.")
-                    conn.send_command("universal_accessor", {
-                        "action": "call", 
-                        "path": f"song.tracks[{t_idx}].clip_slots[{new_scene_index}].delete_clip"
-                    })
-                    cleared_count += 1
-                else:
-                    logger.debug(f"   ↳ Aucun clip sur piste {t_idx}, on ignore.")
+                slot = f"song.tracks[{t_idx}].clip_slots[{new_scene_index}]"
+                ops.append({"get": f"{slot}.has_clip", "as": f"has_clip_{t_idx}"})
+                ops.append({"call": f"{slot}.delete_clip", "when": {"$ref": f"has_clip_{t_idx}"}})
+            res = await conn.transaction(ops)
+            if res["failed"] is not None:
+                raise Exception(res["results"][res["failed"]]["error"])
+            cleared_count = sum(1 for op, item in zip(ops, res["results"]) if "delete_clip" in op.get("call", "") and item.get("ok"))
             
             return f"✅ Variation '{new_scene_name}' créée. {cleared_count} instruments supprimés."
         except Exception as e:
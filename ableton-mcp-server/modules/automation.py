@@ -4,20 +4,25 @@
 #           "Mets une forme 'glitch' sur le paramètre 'Pan' (panoramique) pour que le son saute de gauche à droite de façon aléatoire."
 
 import logging
-import math
-import random
+
+import numpy as np
 
 logger = logging.getLogger("AbletonUniversalServer.Automation")
 
+SHAPES = ("sweep_up", "sweep_down", "wobble", "gater", "expo_riser", "glitch")
+# Décalage (en temps) entre les deux points d'un front vertical : Live interpole entre deux points
+EDGE = 0.01
+
 def register_tools(mcp, get_conn):
-    
+
     @mcp.tool()
-    def draw_automation_shape(track_index: int, clip_index: int, device_name: str, param_name: str, shape: str, length_beats: float = 4.0) -> str:
+    async def draw_automation_shape(track_index: int, clip_index: int, device_name: str, param_name: str, shape: str, length_beats: float = 4.0,
+                              points_per_beat: int = 64, tolerance: float = 0.005) -> str:
         """
         Génère une courbe d'automation sur un paramètre d'effet ou d'instrument.
         device_name: Nom de l'effet (ex: "Auto Filter", "Utility").
         param_name: Nom du paramètre (ex: "Frequency", "Gain").
-        shape: Forme de la courbe parmi : 
+        shape: Forme de la courbe parmi :
                "sweep_up" (Ouverture progressive),
                "sweep_down" (Fermeture progressive),
                "wobble" (LFO en triangle, monte et descend),
@@ -25,78 +30,83 @@ def register_tools(mcp, get_conn):
                "expo_riser" (Montée exponentielle pour les drops),
                "glitch" (Valeurs aléatoires Sample & Hold).
         length_beats: Longueur de la boucle d'automation en temps (ex: 4.0 = 1 mesure).
+        points_per_beat: Résolution de calcul de la courbe avant réduction.
+        tolerance: Écart maximal toléré (0..1 de la plage du paramètre) entre la courbe et les points envoyés.
         """
         shape = shape.lower()
         logger.info(f"📈 Génération automation '{shape}' sur {device_name} > {param_name}")
-        
-        points = []
-        
-        # 1. Ouverture classique (Min vers Max)
-        if shape == "sweep_up":
-            points = [
-                {"time": 0.0, "value": 0.0},
-                {"time": length_beats, "value": 1.0}
-            ]
-            
-        # 2. Fermeture classique (Max vers Min)
-        elif shape == "sweep_down":
-            points = [
-                {"time": 0.0, "value": 1.0},
-                {"time": length_beats, "value": 0.0}
-            ]
-            
-        # 3. Wobble LFO (Triangle qui monte et descend à la noire)
-        elif shape == "wobble":
-            steps = int(length_beats) # 1 bosse par temps
-            for i in range(steps + 1):
-                # Alterne entre 0.1 et 0.9
-                val = 0.9 if i % 2 != 0 else 0.1
-                points.append({"time": float(i), "value": val})
-                
-        # 4. Trance Gater (Hachage binaire en croches)
-        elif shape == "gater":
-            steps = int(length_beats * 2) # Croches
-            for i in range(steps):
-                time_start = float(i) * 0.5
-                time_end = time_start + 0.25 # Laisse un silence de 0.25
-                points.append({"time": time_start, "value": 1.0})
-                points.append({"time": time_end, "value": 1.0})
-                points.append({"time": time_end + 0.01, "value": 0.0}) # Chute instantanée
-                points.append({"time": time_start + 0.49, "value": 0.0})
-                
-        # 5. Expo Riser (Montée exponentielle lente puis rapide)
-        elif shape == "expo_riser":
-            resolution = 16 # Nombre de points pour dessiner la courbe
-            for i in range(resolution + 1):
-                time = (i / resolution) * length_beats
-                # Math.pow crée la courbe exponentielle
-                val = math.pow(i / resolution, 3) 
-                points.append({"time": time, "value": val})
-                
-        # 6. Random Glitch (Valeurs aléatoires en doubles croches)
-        elif shape == "glitch":
-            steps = int(length_beats * 4) # Doubles croches
-            for i in range(steps):
-                time = float(i) * 0.25
-                # Valeur aléatoire maintenue jusqu'au prochain point (Sample & Hold)
-                val = random.uniform(0.1, 0.9)
-                points.append({"time": time, "value": val})
-                points.append({"time": time + 0.24, "value": val}) # Maintient la valeur plateau
-                
-        else:
-            return f"❌ Forme inconnue : {shape}. Choisis parmi : sweep_up, sweep_down, wobble, gater, expo_riser, glitch."
+
+        if shape not in SHAPES:
+            return f"❌ Forme inconnue : {shape}. Choisis parmi : {', '.join(SHAPES)}."
+
+        times, values = envelope_shape(shape, float(length_beats), max(1, int(points_per_beat)))
+        keep = decimate(times, values, tolerance)
+        logger.info(f"  ↳ {int(keep.sum())} points conservés sur {len(times)} (tolérance {tolerance})")
 
         # Envoi de la commande à Ableton
         try:
             conn = get_conn()
-            res = conn.send_command("add_automation", {
+            res = await conn.send_command("add_automation", {
                 "track_index": track_index,
                 "clip_index": clip_index,
                 "device_name": device_name,
                 "param_name": param_name,
-                "points": points
+                "points": {"time": times[keep].tolist(), "value": values[keep].tolist()}
             })
-            return f"✅ Automation '{shape}' générée avec succès : {res}"
+            return f"✅ Automation '{shape}' générée avec succès : {res['points']} points sur {res['device']} > {res['param']} (courbe calculée sur {len(times)} points)"
         except Exception as e:
             logger.error(f"Erreur d'automation : {str(e)}")
-            return f"Erreur : {str(e)}"
\ No newline at end of file
+            return f"Erreur : {str(e)}"
+
+def envelope_shape(shape: str, length: float, points_per_beat: int):
+    """Courbe (temps, valeurs 0..1) échantillonnée à points_per_beat ; les formes en escalier
+    sont décrites directement par leurs fronts (deux points par transition)."""
+    if shape == "gater":
+        # Hachage binaire en croches : ouvert sur la première double croche de chaque croche
+        starts = np.arange(0.0, length, 0.5)
+        times = np.stack([starts, starts + 0.25, starts + 0.25 + EDGE, starts + 0.5 - EDGE], axis=1).ravel()
+        values = np.tile([1.0, 1.0, 0.0, 0.0], len(starts))
+        return times, values
+    if shape == "glitch":
+        # Valeurs aléatoires en doubles croches, maintenues jusqu'au pas suivant (Sample & Hold)
+        starts = np.arange(0.0, length, 0.25)
+        held = np.random.uniform(0.1, 0.9, len(starts))
+        return np.stack([starts, starts + 0.25 - EDGE], axis=1).ravel(), np.repeat(held, 2)
+
+    times = np.linspace(0.0, length, int(round(length * points_per_beat)) + 1)
+    x = times / length if length else times
+    if shape == "sweep_up":
+        values = x
+    elif shape == "sweep_down":
+        values = 1.0 - x
+    elif shape == "wobble":
+        # Triangle à la noire : 0.1 sur les temps pairs, 0.9 sur les temps impairs
+        values = 0.1 + 0.8 * (1.0 - np.abs(np.mod(times, 2.0) - 1.0))
+    else:  # expo_riser : montée lente puis rapide
+        values = x ** 3
+    return times, values
+
+def decimate(times: np.ndarray, values: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer–Douglas–Peucker sur l'écart vertical : masque des points à garder pour que l'interpolation
+    linéaire entre eux reste à moins de `tolerance` de la courbe d'origine."""
+    n = len(times)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        t, v = times[first + 1:last], values[first + 1:last]
+        dt = times[last] - times[first]
+        ratio = (t - times[first]) / dt if dt else np.zeros_like(t)
+        error = np.abs(v - (values[first] + (values[last] - values[first]) * ratio))
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
@@ -0,0 +1,42 @@
+# modules/browser.py
+# Exemple : "Trouve-moi une reverb type 'hall' et mets-la sur la piste 2."
+#           Claude appellera search_browser("hall reverb"), choisira un candidat puis load_browser_item(2, "<id>").
+
+import json
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger("AbletonUniversalServer.Browser")
+
+# Catégories du Browser qui contiennent des fichiers audio (chargés via load_sample)
+SAMPLE_CATEGORIES = ("samples", "user_library", "user_folders")
+
+def register_tools(mcp, get_conn):
+
+    @mcp.tool()
+    async def search_browser(query: str, categories: Optional[List[str]] = None, limit: int = 10) -> str:
+        """
+        Recherche floue et classée dans le Browser d'Ableton (effets, instruments, kits, samples...).
+        Retourne les meilleurs candidats avec score, catégorie, chemin et un identifiant "id"
+        à passer à load_browser_item pour charger exactement cet élément.
+        categories: filtre optionnel parmi "audio_effects", "instruments", "drums", "packs",
+                    "samples", "user_library", "user_folders".
+        """
+        logger.info(f"🔎 Recherche Browser : '{query}'")
+        try:
+            results = await get_conn().send_command("search_browser", {"query": query, "categories": categories, "limit": limit})
+            if not results:
+                return f"Aucun élément trouvé pour '{query}'."
+            return json.dumps(results, indent=2, ensure_ascii=False)
+        except Exception as e:
+            return f"Erreur de recherche : {str(e)}"
+
+    @mcp.tool()
+    async def load_browser_item(track_index: int, item_id: str) -> str:
+        """Charge sur une piste l'élément du Browser désigné par son "id" (résultat de search_browser)."""
+        try:
+            command = "load_sample" if item_id.split(":", 1)[0] in SAMPLE_CATEGORIES else "load_device"
+            res = await get_conn().send_command(command, {"track_index": track_index, "item_id": item_id})
+            return f"Élément chargé : {res.get('loaded', item_id)}"
+        except Exception as e:
+            return f"Erreur de chargement : {str(e)}"
@@ -21,13 +21,17 @@ CHORD_TYPES = {
 def register_tools(mcp, get_conn):
     
     @mcp.tool()
-    def generate_chord_progression(track_index: int, clip_index: int, genre: str, root_note: int = 60, num_chords: int = 4, beats_per_chord: float = 2.0) -> str:
+    async def generate_chord_progression(track_index: int, clip_index: int, genre: str, root_note: int = 60, num_chords: int = 4, beats_per_chord: float = 2.0, replace: bool = False) -> str:
         """
         Génère une progression d'accords MIDI selon un genre musical.
         genre: "jazz", "pop", "hip-hop", "r&b", "rock", "trip-hop".
         root_note: Note fondamentale (ex: 60 = Do central, 62 = Ré).
         num_chords: Nombre total d'accords à générer (la progression bouclera si nécessaire).
         beats_per_chord: Durée de chaque accord en temps (ex: 2.0 = une blanche, 4.0 = une ronde).
+        replace: Remplace les notes déjà présentes sur la durée de la progression, dans la tessiture
+                 des accords générés (seules les notes qui changent sont réécrites) ; les notes plus
+                 graves ou plus aiguës (basse, mélodie) sont conservées. False (défaut) ajoute les
+                 accords par-dessus.
         """
         genre_key = genre.lower()
         logger.info(f"🎹 Génération progression {genre_key} ({num_chords} accords) sur piste {track_index}, base {root_note}")
@@ -47,7 +51,8 @@ def register_tools(mcp, get_conn):
             return f"❌ Genre non reconnu : {genre}. Essaie 'jazz', 'pop', 'hip-hop', 'r&b', 'rock', ou 'trip-hop'."
             
         base_pattern = patterns[genre_key]
-        notes_to_send = []
+        # Colonnes parallèles (une entrée par note) : format attendu par add_midi_notes
+        notes_to_send = {"pitch": [], "start": [], "dur": [], "vel": [], "mute": []}
         
         # On génère le nombre d'accords demandé (en bouclant le pattern si besoin)
         for i in range(num_chords):
@@ -71,22 +76,23 @@ def register_tools(mcp, get_conn):
                 if pitch > root_note + 15 and chord_type not in ["min9", "maj9"]:
                     pitch -= 12
                     
-                notes_to_send.append({
-                    "pitch": pitch,
-                    "start": start_time,
-                    "dur": duration,
-                    "vel": base_vel,
-                    "mute": False
-                })
+                notes_to_send["pitch"].append(pitch)
+                notes_to_send["start"].append(start_time)
+                notes_to_send["dur"].append(duration)
+                notes_to_send["vel"].append(base_vel)
+                notes_to_send["mute"].append(False)
 
         try:
             conn = get_conn()
-            res = conn.send_command("add_midi_notes", {
-                "track_index": track_index,
-                "clip_index": clip_index,
-                "notes": notes_to_send
-            })
-            return f"✅ Progression {genre_key} ({num_chords} accords, {beats_per_chord} temps/accord) générée avec succès !"
+            if replace:
+                res = await conn.sync_notes(track_index, clip_index, notes_to_send, {"start": 0.0, "end": num_chords * beats_per_chord,
+                                                                             "pitch_low": min(notes_to_send["pitch"]),
+                                                                             "pitch_high": max(notes_to_send["pitch"])})
+                detail = f"{res['added']} ajoutées, {res['removed']} supprimées, {res['modified']} modifiées, {res['unchanged']} inchangées"
+            else:
+                res = await conn.add_notes(track_index, clip_index, notes_to_send)
+                detail = f"{res['added']} notes"
+            return f"✅ Progression {genre_key} ({num_chords} accords, {detail}, {beats_per_chord} temps/accord) générée avec succès !"
         except Exception as e:
             logger.error(f"Erreur Chord Gen: {str(e)}")
             return f"Erreur : {str(e)}"
\ No newline at end of file
@@ -1,8 +1,7 @@
 # modules/core_tools.py
 import json
-import time
 import logging
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Union
 
 logger = logging.getLogger("AbletonUniversalServer.CoreTools")
 
@@ -10,104 +9,114 @@ def register_tools(mcp, get_conn):
     """Module de base : Fournit des raccourcis simples et des macros à Claude."""
 
     @mcp.tool()
-    def batch_multiple_ableton_actions(actions: List[Dict[str, Any]]) -> str:
+    async def batch_multiple_ableton_actions(actions: List[Dict[str, Any]], stop_on_error: bool = False) -> str:
+        """
+        Exécute plusieurs actions en une seule transaction (un aller-retour, un seul Ctrl+Z dans Live).
+        Chaque action : {"command": ..., "params": {...}}, ou raccourci LOM {"get"/"set"/"call": chemin, "value": v}.
+        "as": "nom" nomme le résultat ; {"$ref": "nom.clé"} dans les params le réutilise ;
+        "when": {"$ref": "nom"} n'exécute l'action que si ce résultat est vrai.
+        """
+        try:
+            res = await get_conn().transaction(actions, stop_on_error=stop_on_error)
+        except Exception as e:
+            return f"Erreur : {str(e)}"
+
         results = []
-        conn = get_conn()
-        
-        for i, action in enumerate(actions):
-            cmd = action.get("command") or action.get("type")
-            p = action.get("params", {})
-            
-            try:
-                # Pour CHAQUE action de chargement, on impose un délai de sécurité
-                # Cela laisse le temps au Remote Script de finir son cycle schedule_message
-                if cmd in ["load_device", "load_sample"]:
-                    time.sleep(0.5) # Pause cruciale pour laisser l'UI d'Ableton respirer 
-                
-                res = conn.send_command(cmd, p)
-                results.append(f"[{i+1}] {cmd}: {res}")
-                
-                # Pause après l'action pour stabiliser le focus
-                time.sleep(0.2) 
-                
-            except Exception as e:
-                results.append(f"[{i+1}] {cmd} ERREUR: {str(e)}")
-                
+        for i, (action, item) in enumerate(zip(actions, res["results"])):
+            cmd = action.get("command") or action.get("type") or next((a for a in ("get", "set", "call") if a in action), "?")
+            if item.get("skipped"):
+                results.append(f"[{i+1}] {cmd}: ignorée")
+            elif item.get("ok"):
+                results.append(f"[{i+1}] {cmd}: {item['result']}")
+            else:
+                results.append(f"[{i+1}] {cmd} ERREUR: {item['error']}")
         return "\n".join(results)
         
     @mcp.tool()
-    def create_midi_track(index: int = -1) -> str:
+    async def create_midi_track(index: int = -1) -> str:
         """Crée une nouvelle piste MIDI dans Ableton."""
         try:
-            get_conn().send_command("universal_accessor", {"action": "call", "path": "song.create_midi_track", "value": index})
+            await get_conn().send_command("universal_accessor", {"action": "call", "path": "song.create_midi_track", "value": index})
             return "Piste MIDI créée."
         except Exception as e: 
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def create_audio_track(index: int = -1) -> str:
+    async def create_audio_track(index: int = -1) -> str:
         """Crée une nouvelle piste Audio dans Ableton."""
         try:
-            get_conn().send_command("universal_accessor", {"action": "call", "path": "song.create_audio_track", "value": index})
+            await get_conn().send_command("universal_accessor", {"action": "call", "path": "song.create_audio_track", "value": index})
             return "Piste Audio créée."
         except Exception as e: 
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def create_clip(track_index: int, clip_index: int, length: float = 4.0) -> str:
+    async def create_clip(track_index: int, clip_index: int, length: float = 4.0) -> str:
         """Crée un clip MIDI (Piste MIDI uniquement)."""
         try:
             path = f"song.tracks[{track_index}].clip_slots[{clip_index}].create_clip"
-            get_conn().send_command("universal_accessor", {"action": "call", "path": path, "value": float(length)})
+            await get_conn().send_command("universal_accessor", {"action": "call", "path": path, "value": float(length)})
             return f"Clip créé (T:{track_index} C:{clip_index})"
         except Exception as e: 
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def set_tempo(tempo: float) -> str:
+    async def set_tempo(tempo: float) -> str:
         """Modifie le tempo global."""
         try:
-            get_conn().send_command("universal_accessor", {"action": "set", "path": "song.tempo", "value": float(tempo)})
+            await get_conn().set_value("song.tempo", float(tempo))
             return f"BPM : {tempo}"
         except Exception as e: 
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def get_clip_length(track_index: int, clip_index: int) -> str:
+    async def get_clip_length(track_index: int, clip_index: int) -> str:
         """Retourne la longueur du clip en beats."""
         try:
             path = f"song.tracks[{track_index}].clip_slots[{clip_index}].clip.length"
-            res = get_conn().send_command("universal_accessor", {"action": "get", "path": path})
+            res = await get_conn().get_value(path)
             return f"Longueur : {res} beats"
         except Exception as e: 
             return f"Erreur : {str(e)}"
             
     @mcp.tool()
-    def add_notes_to_clip(track_index: int, clip_index: int, notes: List[Dict[str, Union[int, float, bool]]]) -> str:
+    async def add_notes_to_clip(track_index: int, clip_index: int, notes: List[Dict[str, Union[int, float, bool]]]) -> str:
         """Ajoute des notes MIDI à un clip existant."""
         try:
-            get_conn().send_command("add_midi_notes", {"track_index": track_index, "clip_index": clip_index, "notes": notes})
-            return f"{len(notes)} notes ajoutées."
+            res = await get_conn().add_notes(track_index, clip_index, notes)
+            return f"{res['added']} notes ajoutées."
         except Exception as e: 
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def clear_midi_notes(track_index: int, clip_index: int) -> str:
+    async def sync_notes_in_clip(track_index: int, clip_index: int, notes: List[Dict[str, Union[int, float, bool]]],
+                           start: Optional[float] = None, end: Optional[float] = None,
+                           pitch_low: Optional[int] = None, pitch_high: Optional[int] = None) -> str:
+        """Remplace les notes d'un clip par cette liste sans tout effacer : seules les notes qui diffèrent sont
+        ajoutées, supprimées ou modifiées. start/end (beats) et pitch_low/pitch_high limitent la zone concernée ;
+        les notes hors zone ne sont pas touchées."""
+        try:
+            region = {"start": start, "end": end, "pitch_low": pitch_low, "pitch_high": pitch_high}
+            res = await get_conn().sync_notes(track_index, clip_index, notes, region)
+            return f"Notes synchronisées : {res['added']} ajoutées, {res['removed']} supprimées, {res['modified']} modifiées, {res['unchanged']} inchangées."
+        except Exception as e:
+            return f"Erreur : {str(e)}"
+
+    @mcp.tool()
+    async def clear_midi_notes(track_index: int, clip_index: int) -> str:
         """Efface les notes d'un clip."""
         try:
-            return get_conn().send_command("clear_midi_notes", {"track_index": track_index, "clip_index": clip_index})
+            res = await get_conn().send_command("clear_midi_notes", {"track_index": track_index, "clip_index": clip_index})
+            return f"{res['removed']} notes effacées."
         except Exception as e: 
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def load_instrument(track_index: int, instrument_name: str) -> str:
+    async def load_instrument(track_index: int, instrument_name: str) -> str:
         """Charge un instrument sur une piste spécifique."""
         try:
-            # On force le focus même hors macro pour la cohérence
-            get_conn().send_command("universal_accessor", {
-                "action": "set", "path": "song.view.selected_track", "value": track_index
-            })
-            time.sleep(0.1)
-            return get_conn().send_command("load_device", {"track_index": track_index, "device_name": instrument_name})
+            # Le Remote Script sélectionne lui-même la piste avant le chargement
+            res = await get_conn().send_command("load_device", {"track_index": track_index, "device_name": instrument_name})
+            return f"Instrument chargé : {res.get('loaded', instrument_name)}"
         except Exception as e: 
             return f"Erreur : {str(e)}"
\ No newline at end of file
@@ -1,68 +1,106 @@
 # modules/mixing.py
 # Exemple : "Tu peux faire une analyse de mon mixage ?"
 
+import asyncio
 import logging
 import json
 
 logger = logging.getLogger("AbletonUniversalServer.Mixing")
 
+# Mètres suivis en continu (flux poussé par le Remote Script dans les tampons circulaires du serveur)
+MASTER_METER = "song.master_track.output_meter_level"
+TRACKS_METER = "song.tracks[*].output_meter_level"
+METER_RATE_HZ = 10.0
+
 def register_tools(mcp, get_conn):
-    
+    meter_users = {"count": 0}
+
     @mcp.tool()
-    def analyze_mix() -> str:
+    async def analyze_mix(window_seconds: float = 3.0) -> str:
         """
         Analyse les niveaux de mixage actuels de toutes les pistes et du Master.
         Détecte les faders réglés trop hauts (risque de saturation) et les déséquilibres.
+        Les crêtes sont mesurées sur une fenêtre glissante (window_seconds) : crête maintenue,
+        niveau moyen et facteur de crête (écart crête/RMS en dB, faible = son très compressé).
         Demande à l'utilisateur de lancer la lecture du morceau avant d'utiliser cet outil pour obtenir les crêtes audio (peaks).
         """
         logger.info("🎛️ Analyse du mixage en cours...")
         conn = get_conn()
         report = []
-        
+
         try:
-            # 1. Obtenir le nombre de pistes
-            session_info = conn.send_command("get_session_info")
-            track_count = session_info.get("tracks", 0)
-            
-            # 2. Analyser le Master
-            master_vol = conn.send_command("universal_accessor", {
-                "action": "get", "path": "song.master_track.mixer_device.volume.value"
-            })
-            master_peak = conn.send_command("universal_accessor", {
-                "action": "get", "path": "song.master_track.output_meter_level"
-            })
-            
-            report.append(f"👑 MASTER - Fader Volume: {float(master_vol):.2f} (Max 1.0) | Crête audio actuelle: {float(master_peak):.2f}")
+            # 1. Lecture groupée : noms et faders du Master et de toutes les pistes en un seul aller-retour
+            master_path = "song.master_track.mixer_device.volume.value"
+            tracks_path = "song.tracks[*].{name,mixer_device.volume.value}"
+            values = await conn.send_command("batch_get", {"paths": [master_path, tracks_path]})
+            for path in (master_path, tracks_path):
+                if isinstance(values.get(path), dict) and "error" in values[path]:
+                    raise Exception(values[path]["error"])
+
+            # 2. Mètres : abonnement le temps de la fenêtre seulement (partagé entre analyses simultanées,
+            # résilié par la dernière) ; la fenêtre est remplie par des trames postérieures à l'abonnement
+            meter_users["count"] += 1
+            try:
+                await conn.subscribe("mix_meters", [MASTER_METER, TRACKS_METER], rate_hz=METER_RATE_HZ)
+                missing = window_seconds - conn.streams.span(TRACKS_METER, window_seconds)
+                if missing > 0:
+                    await asyncio.sleep(missing + 1.0 / METER_RATE_HZ)
+                master_stats = conn.streams.stats(MASTER_METER, window_seconds)
+                track_stats = conn.streams.stats(TRACKS_METER, window_seconds)
+            finally:
+                meter_users["count"] -= 1
+                if not meter_users["count"]:
+                    await _release_meters(conn)
+            if not track_stats.get("frames"):
+                raise Exception("Aucune mesure reçue du Remote Script")
+
+            # 3. Analyser le Master
+            master_vol = values[master_path]
+            master_peak = _column(master_stats, "peak", 0) or 0.0
+
+            report.append(f"👑 MASTER - Fader Volume: {float(master_vol):.2f} (Max 1.0) | Crête maintenue ({window_seconds:g}s): {master_peak:.2f} | {_dynamics(master_stats, 0)}")
             if float(master_peak) >= 0.99:
                 report.append("  ⚠️ ALERTE : Le Master sature ou est dangereusement proche du 0 dB !")
 
-            # 3. Analyser chaque piste individuelle
-            for i in range(track_count):
-                name = conn.send_command("universal_accessor", {
-                    "action": "get", "path": f"song.tracks[{i}].name"
-                })
-                vol = conn.send_command("universal_accessor", {
-                    "action": "get", "path": f"song.tracks[{i}].mixer_device.volume.value"
-                })
-                peak = conn.send_command("universal_accessor", {
-                    "action": "get", "path": f"song.tracks[{i}].output_meter_level"
-                })
-                
-                track_status = f"Piste {i} ({name}) - Fader: {float(vol):.2f} | Crête audio: {float(peak):.2f}"
-                
+            # 4. Analyser chaque piste individuelle
+            for i, track in enumerate(values[tracks_path]):
+                name = track["name"]
+                vol = track["mixer_device.volume.value"] or 0.0
+                peak = _column(track_stats, "peak", i) or 0.0
+
+                track_status = f"Piste {i} ({name}) - Fader: {float(vol):.2f} | Crête maintenue: {float(peak):.2f} | {_dynamics(track_stats, i)}"
+
                 # Détection de déséquilibre / saturation
                 if float(vol) > 0.85:
                     track_status += " ⚠️ Fader très haut (Baisse le gain de l'instrument)"
                 if float(peak) >= 0.95:
                     track_status += " 🚨 PIC DÉTECTÉ (Saturation possible)"
-                    
+
                 report.append(track_status)
 
             # Formatage du retour pour Claude
             final_report = "\n".join(report)
             logger.info("✅ Analyse de mixage terminée.")
-            return f"Rapport de mixage :\n{final_report}\n\nNote: Si les crêtes audio sont toutes à 0.00, demande à l'utilisateur de lancer la lecture (Play) et relance l'analyse."
-            
+            return f"Rapport de mixage ({track_stats['frames']} mesures sur {track_stats['seconds']:.1f}s) :\n{final_report}\n\nNote: Si les crêtes audio sont toutes à 0.00, demande à l'utilisateur de lancer la lecture (Play) et relance l'analyse."
+
         except Exception as e:
             logger.error(f"Erreur lors de l'analyse du mix: {str(e)}")
-            return f"Erreur d'analyse : {str(e)}"
\ No newline at end of file
+            return f"Erreur d'analyse : {str(e)}"
+
+async def _release_meters(conn):
+    """Résilie l'abonnement aux mètres ; un échec (connexion perdue) ne doit pas masquer le résultat."""
+    try:
+        await conn.unsubscribe("mix_meters")
+    except Exception as e:
+        logger.warning(f"⚠️ Résiliation des mètres impossible : {e}")
+
+def _column(stats: dict, name: str, i: int):
+    col = stats.get(name) or []
+    return col[i] if i < len(col) else None
+
+def _dynamics(stats: dict, i: int) -> str:
+    """Niveau moyen et facteur de crête d'une colonne de statistiques de flux."""
+    mean, crest = _column(stats, "mean", i), _column(stats, "crest_db", i)
+    mean_txt = f"{mean:.2f}" if mean is not None else "n/a"
+    crest_txt = f"{crest:.1f} dB" if crest is not None else "n/a"
+    return f"Moyenne: {mean_txt} | Facteur de crête: {crest_txt}"
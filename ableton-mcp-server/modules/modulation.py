@@ -0,0 +1,61 @@
+# modules/modulation.py
+# Exemple : "Fais onduler la Frequency de l'Auto Filter de la piste 2 à la noire pointée pendant que je joue."
+#           Claude appellera modulate_parameter(2, "Auto Filter", "Frequency", "lfo", {"shape": "sine", "period_beats": 1.5}),
+#           puis stop_modulation(id) quand l'utilisateur veut arrêter le mouvement.
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("AbletonUniversalServer.Modulation")
+
+def register_tools(mcp, get_conn):
+
+    @mcp.tool()
+    async def modulate_parameter(track_index: int, device_name: str, param_name: str, kind: str = "lfo",
+                           config: Optional[Dict[str, Any]] = None, clock: str = "song") -> str:
+        """
+        Fait bouger un paramètre en continu, calculé dans Ableton à chaque rafraîchissement (aucun trafic réseau).
+        Valeurs normalisées entre 0 et 1 (plage du paramètre).
+        kind / config :
+          "lfo"   : shape ("sine", "triangle", "square", "saw", "saw_down"), period_beats, center, depth, phase
+          "ramp"  : start, end, duration_beats, curve (exposant : >1 montée lente puis rapide), puis maintien
+          "steps" : values (liste de valeurs 0..1), step_beats (ex: 0.25 = doubles croches)
+        clock : "song" (suit la lecture, immobile à l'arrêt) ou "free" (tourne au tempo, même à l'arrêt).
+        Un nouveau modulateur sur le même paramètre remplace le précédent.
+        """
+        try:
+            res = await get_conn().send_command("start_modulation", {
+                "track_index": track_index, "device_name": device_name, "param_name": param_name,
+                "kind": kind, "config": config or {}, "clock": clock,
+            })
+            logger.info(f"🌀 Modulation {res['id']} ({kind}) sur {res['device']} > {res['param']}")
+            return f"Modulation {res['id']} active : {kind} sur {res['device']} > {res['param']} ({json.dumps(res['config'])})"
+        except Exception as e:
+            return f"Erreur : {str(e)}"
+
+    @mcp.tool()
+    async def update_modulation(modulation_id: int, config: Dict[str, Any], restart: bool = False) -> str:
+        """Modifie les réglages d'un modulateur en cours (restart=True repart du début, utile pour une rampe)."""
+        try:
+            res = await get_conn().send_command("update_modulation", {"id": modulation_id, "config": config, "restart": restart})
+            return f"Modulation {res['id']} mise à jour : {json.dumps(res['config'])}"
+        except Exception as e:
+            return f"Erreur : {str(e)}"
+
+    @mcp.tool()
+    async def stop_modulation(modulation_id: Optional[int] = None, restore: bool = True) -> str:
+        """Arrête un modulateur (ou tous si aucun id) ; restore=True remet la valeur d'origine du paramètre."""
+        try:
+            res = await get_conn().send_command("stop_modulation", {"id": modulation_id, "restore": restore})
+            return f"Modulations arrêtées : {res['stopped']}"
+        except Exception as e:
+            return f"Erreur : {str(e)}"
+
+    @mcp.tool()
+    async def list_modulations() -> str:
+        """Liste les modulateurs actifs (paramètre, type, réglages, valeur courante)."""
+        try:
+            return json.dumps(await get_conn().send_command("list_modulations"), indent=2)
+        except Exception as e:
+            return f"Erreur : {str(e)}"
@@ -0,0 +1,46 @@
+# modules/monitoring.py
+# Exemple : "Surveille la position de lecture et le volume de la piste 2 pendant que je joue."
+#           Claude appellera watch_properties(["song.current_song_time", "song.tracks[2].mixer_device.volume.value"]),
+#           puis get_stream_stats("song.tracks[2].mixer_device.volume.value", 5.0) quelques secondes plus tard.
+
+import json
+import logging
+from typing import List
+
+logger = logging.getLogger("AbletonUniversalServer.Monitoring")
+
+def register_tools(mcp, get_conn):
+
+    @mcp.tool()
+    async def watch_properties(paths: List[str], rate_hz: float = 10.0) -> str:
+        """
+        Demande au Remote Script de pousser en continu des propriétés du LOM (mètres, position de
+        lecture, is_playing, valeurs de paramètres...) sans interrogation répétée. Les jokers sont
+        acceptés ("song.tracks[*].output_meter_level"). Cadence maximale : 10 Hz.
+        """
+        try:
+            key = "watch:" + "|".join(paths)
+            sub_id = await get_conn().subscribe(key, paths, rate_hz=rate_hz)
+            return f"Suivi actif (abonnement {sub_id}) : {', '.join(paths)}"
+        except Exception as e:
+            return f"Erreur d'abonnement : {str(e)}"
+
+    @mcp.tool()
+    async def get_stream_stats(path: str, window_seconds: float = 5.0) -> str:
+        """
+        Statistiques d'une propriété suivie (watch_properties ou analyze_mix) sur une fenêtre glissante :
+        crête maintenue, moyenne, RMS et facteur de crête (dB), une valeur par élément pour un joker.
+        """
+        stats = get_conn().streams.stats(path, window_seconds)
+        if not stats.get("frames"):
+            return f"Aucune donnée pour '{path}'. Lance d'abord watch_properties sur ce chemin."
+        return json.dumps(stats, indent=2)
+
+    @mcp.tool()
+    async def stop_watching(paths: List[str]) -> str:
+        """Arrête le suivi lancé par watch_properties pour cette liste de chemins."""
+        try:
+            removed = await get_conn().unsubscribe("watch:" + "|".join(paths))
+            return "Suivi arrêté." if removed else "Aucun suivi actif pour ces chemins."
+        except Exception as e:
+            return f"Erreur : {str(e)}"
@@ -10,12 +10,12 @@ logger = logging.getLogger("AbletonUniversalServer.SoundDesign")
 def register_tools(mcp, get_conn):
     
     @mcp.tool()
-    def add_audio_effect(track_index: int, effect_name: str) -> str:
+    async def add_audio_effect(track_index: int, effect_name: str) -> str:
         """Charge un effet audio natif Ableton."""
         try:
             conn = get_conn()
             # On doit s'assurer que "load_device" est écrit en DUR ici
-            res = conn.send_command("load_device", {
+            res = await conn.send_command("load_device", {
                 "track_index": track_index,
                 "device_name": effect_name
             })
@@ -24,7 +24,7 @@ def register_tools(mcp, get_conn):
             return f"Erreur : {str(e)}"
 
     @mcp.tool()
-    def tweak_effect_parameter(track_index: int, device_name: str, param_name: str, value: float) -> str:
+    async def tweak_effect_parameter(track_index: int, device_name: str, param_name: str, value: float) -> str:
         """
         Modifie un paramètre spécifique d'un effet audio.
         device_name: Le nom de l'effet (ex: "Auto Filter", "Reverb").
@@ -34,18 +34,18 @@ def register_tools(mcp, get_conn):
         logger.info(f"🎚️ Réglage: Piste {track_index} > {device_name} > {param_name} = {value}")
         try:
             conn = get_conn()
-            res = conn.send_command("set_device_param", {
+            res = await conn.send_command("set_device_param", {
                 "track_index": track_index,
                 "device_name": device_name,
                 "param_name": param_name,
                 "value": value
             })
-            return res
+            return f"{res.get('device')} > {res.get('param')} = {res.get('value')}"
         except Exception as e:
             return f"Erreur de paramétrage : {str(e)}"
 
     @mcp.tool()
-    def apply_lowpass_filter(track_index: int, cutoff_hz: float = 500.0, resonance: float = 0.5) -> str:
+    async def apply_lowpass_filter(track_index: int, cutoff_hz: float = 500.0, resonance: float = 0.5) -> str:
         """
         Outil macro : Ajoute un Auto Filter et le configure immédiatement en passe-bas (Lowpass).
         cutoff_hz: Fréquence de coupure (ex: 200 pour étouffer le son, 2000 pour l'ouvrir).
@@ -54,28 +54,18 @@ def register_tools(mcp, get_conn):
         logger.info(f"🎛️ Application Macro Lowpass (Cutoff: {cutoff_hz}Hz) sur piste {track_index}")
         try:
             conn = get_conn()
-            
-            # 1. On charge l'Auto Filter
-            add_res = conn.send_command("load_device", {
-                "track_index": track_index,
-                "device_name": "Auto Filter"
-            })
-            
-            # 2. On règle la fréquence
-            freq_res = conn.send_command("set_device_param", {
-                "track_index": track_index,
-                "device_name": "Auto Filter",
-                "param_name": "Frequency",
-                "value": cutoff_hz
-            })
-            
-            # 3. On règle la résonance
-            res_res = conn.send_command("set_device_param", {
-                "track_index": track_index,
-                "device_name": "Auto Filter",
-                "param_name": "Resonance",
-                "value": resonance
-            })
+            filter_param = lambda name, value: {"type": "set_device_param", "params": {
+                "track_index": track_index, "device_name": "Auto Filter", "param_name": name, "value": value}}
+
+            # Chargement de l'Auto Filter puis réglage fréquence et résonance, en une seule transaction
+            res = await conn.transaction([
+                {"type": "load_device", "params": {"track_index": track_index, "device_name": "Auto Filter"}},
+                filter_param("Frequency", cutoff_hz),
+                filter_param("Resonance", resonance),
+            ])
+            if res["failed"] is not None:
+                raise Exception(res["results"][res["failed"]]["error"])
+            add_res, freq_res, res_res = (item["result"] for item in res["results"])
             
             return f"Macro Lowpass appliquée : {add_res} | {freq_res} | {res_res}"
         except Exception as e:
@@ -0,0 +1,105 @@
+# ableton-mcp-server/perf.py
+import json
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Histogrammes à seaux logarithmiques : chaque seau couvre +10 % (erreur relative des centiles < 5 %)
+_MIN_MS = 0.01
+_GROWTH = math.log(1.1)
+_BUCKETS = 200
+
+# Étapes mesurées pour chaque commande (ms), côté serveur puis côté Live
+STAGES = ("connect_ms", "send_ms", "queue_ms", "exec_ms", "live_ms", "transport_ms", "total_ms")
+COUNTERS = ("requeues", "focus_waits", "ticks")
+
+
+class LatencyHistogram:
+    """Histogramme de durées (ms) de taille fixe : enregistrement en O(1), centiles approchés."""
+
+    def __init__(self):
+        self._counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float):
+        index = 0 if ms <= _MIN_MS else min(_BUCKETS - 1, int(math.log(ms / _MIN_MS) / _GROWTH) + 1)
+        self._counts[index] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q: float) -> float:
+        rank, seen = q * self.count, 0
+        for index, n in enumerate(self._counts):
+            seen += n
+            if n and seen >= rank:
+                # Borne haute du seau, sans dépasser le maximum réellement observé
+                return min(self.max, _MIN_MS * math.exp(index * _GROWTH))
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {"p50": round(self.percentile(0.5), 3), "p95": round(self.percentile(0.95), 3),
+                "p99": round(self.percentile(0.99), 3), "max": round(self.max, 3),
+                "mean": round(self.total / self.count, 3) if self.count else 0.0}
+
+
+class PerfRecorder:
+    """Latences par type de commande, étape par étape (connexion, envoi, attente en file dans Live,
+    exécution sur le thread principal, transport retour), plus les compteurs de remises en file.
+
+    export_path : chaque commande mesurée est aussi ajoutée en JSON lines dans ce fichier.
+    """
+
+    def __init__(self, export_path: Optional[str] = None):
+        self.export_path = export_path
+        self._lock = threading.Lock()
+        self._commands: Dict[str, Dict[str, Any]] = {}
+        self._export = open(export_path, "a", encoding="utf-8", buffering=1) if export_path else None
+        self.started = time.time()
+
+    def record(self, command_type: str, stages: Dict[str, float], timing: Optional[Dict[str, Any]], ok: bool):
+        """stages : durées mesurées par le serveur ; timing : durées renvoyées par le Remote Script (ou None)."""
+        stages = dict(stages)
+        if timing:
+            stages.update((k, float(timing[k])) for k in ("queue_ms", "exec_ms", "live_ms") if k in timing)
+            if "live_ms" in stages and "total_ms" in stages:
+                stages["transport_ms"] = max(0.0, stages["total_ms"] - stages.get("connect_ms", 0.0) - stages["live_ms"])
+        with self._lock:
+            entry = self._commands.get(command_type)
+            if entry is None:
+                entry = self._commands[command_type] = {"count": 0, "errors": 0, "stages": {}, "counters": dict.fromkeys(COUNTERS, 0)}
+            entry["count"] += 1
+            entry["errors"] += 0 if ok else 1
+            for stage, ms in stages.items():
+                entry["stages"].setdefault(stage, LatencyHistogram()).record(ms)
+            for key in COUNTERS:
+                entry["counters"][key] += int((timing or {}).get(key, 0))
+            if self._export is not None:
+                self._export.write(json.dumps({"t": time.time(), "type": command_type, "ok": ok,
+                                               **{k: round(v, 3) for k, v in stages.items()},
+                                               **{k: (timing or {}).get(k, 0) for k in COUNTERS}}) + "\n")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "since": self.started,
+                "export_path": self.export_path,
+                "commands": {
+                    name: {"count": e["count"], "errors": e["errors"], "counters": dict(e["counters"]),
+                           "stages": {s: e["stages"][s].summary() for s in STAGES if s in e["stages"]}}
+                    for name, e in sorted(self._commands.items())
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._commands.clear()
+            self.started = time.time()
+
+    def close(self):
+        if self._export is not None:
+            self._export.close()
+            self._export = None
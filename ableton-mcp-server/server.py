@@ -1,21 +1,21 @@
 # ableton-mcp-server/server.py
-from mcp.server.fastmcp import FastMCP
-import socket
+from mcp.server.fastmcp import Context, FastMCP
+import asyncio
 import json
 import logging
-import time
 import os
-import importlib
-import threading
 import sys
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
 # --- INFORMATIONS DU PROGRAMME ---
 APP_NAME = "AbletonMCP Server"
 VERSION = "5.2.1"
 APP_AUTHOR = "François SENELLART"
 DEBUG_MODE = False
+# Mesure des latences par étape (ABLETON_MCP_PERF=1), avec export JSON lines optionnel (ABLETON_MCP_PERF_EXPORT=chemin)
+PERF_TRACING = os.environ.get("ABLETON_MCP_PERF", "") not in ("", "0")
+PERF_EXPORT = os.environ.get("ABLETON_MCP_PERF_EXPORT") or None
 
 # Configuration logging
 log_level = logging.DEBUG if DEBUG_MODE else logging.INFO
@@ -29,132 +29,153 @@ logger = logging.getLogger("AbletonUniversalServer")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, BASE_DIR)
 
-# --- VERROU GLOBAL RÉSEAU ---
-# Empêche Claude d'envoyer deux ordres en même temps dans le même socket
-_ableton_lock = threading.Lock()
+from connection import AbletonConnection
+from perf import PerfRecorder
+from tool_loader import ToolLoader
 
-@dataclass
-class AbletonConnection:
-    host: str
-    port: int
-    
-    def check_connection(self) -> bool:
-        """Vérifie si le Remote Script est actif."""
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(1.0)
-            s.connect((self.host, self.port))
-            s.close()
-            return True
-        except:
-            return False
-
-    def receive_full_response(self, sock, buffer_size=8192):
-        """Lit la réponse JSON complète envoyée par Ableton."""
-        chunks = []
-        sock.settimeout(5.0)
-        while True:
-            try:
-                chunk = sock.recv(buffer_size)
-                if not chunk: break 
-                chunks.append(chunk)
-                try:
-                    data = b''.join(chunks)
-                    json.loads(data.decode('utf-8'))
-                    return data
-                except json.JSONDecodeError: 
-                    continue
-            except socket.timeout: 
-                break
-            except Exception: 
-                break
-            
-        if chunks: 
-            return b''.join(chunks)
-        raise Exception("Aucune donnée reçue d'Ableton")
-
-    def send_command(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Envoie une commande unique et sécurisée au Remote Script."""
-        with _ableton_lock:
-            # SÉCURITÉ ANTI-NONE : On vérifie que la commande a un nom
-            if not command_type:
-                logger.error("Tentative d'envoi d'une commande vide (None)")
-                raise ValueError("Le type de commande ne peut pas être vide")
-
-            command = {"type": str(command_type), "params": params or {}}
-            
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10.0) # Temps suffisant pour les actions lourdes
-            try:
-                sock.connect((self.host, self.port))
-                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                
-                # Logging de la commande sortante
-                if command_type != "get_session_info":
-                    logger.info(f"📤 [ENVOI] {command_type} | Piste: {params.get('track_index', '?')}")
-                
-                sock.sendall(json.dumps(command).encode('utf-8'))
-                
-                # Récupération de la réponse
-                response_data = self.receive_full_response(sock)
-                response = json.loads(response_data.decode('utf-8'))
-                
-                if response.get("status") == "error":
-                    raise Exception(response.get("message"))
-                
-                return response.get("result", response)
-                
-            except Exception as e:
-                logger.error(f"💥 Erreur de communication Ableton : {str(e)}")
-                raise e
-            finally:
-                sock.close()
+# --- SURVEILLANCE DE LA LIAISON ---
+@asynccontextmanager
+async def lifespan(server):
+    """Battement de cœur et reconnexion en tâche de fond, le temps que le serveur MCP tourne."""
+    supervisor = asyncio.create_task(get_conn().supervise())
+    try:
+        yield {}
+    finally:
+        supervisor.cancel()
 
 # --- INITIALISATION MCP ---
-mcp = FastMCP("AbletonMCP_Modular")
+mcp = FastMCP("AbletonMCP_Modular", lifespan=lifespan)
 _connection = None
 
 def get_conn():
     global _connection
     if _connection is None:
         _connection = AbletonConnection(host="localhost", port=9877)
+        if PERF_TRACING or PERF_EXPORT:
+            _connection.perf = PerfRecorder(PERF_EXPORT)
     return _connection
 
 # --- OUTILS CORE ---
 @mcp.tool()
-def access_lom(action: str, path: str, value_json_str: Optional[str] = None) -> str:
+async def access_lom(action: str, path: str, value_json_str: Optional[str] = None) -> str:
     """Accès universel au Live Object Model (LOM)."""
     try:
         actual_val = json.loads(value_json_str) if value_json_str else None
-        res = get_conn().send_command("universal_accessor", {"action": action, "path": path, "value": actual_val})
+        conn = get_conn()
+        if action == "get":
+            res = await conn.get_value(path)
+        elif action == "set":
+            res = await conn.set_value(path, actual_val)
+        else:
+            res = await conn.send_command("universal_accessor", {"action": action, "path": path, "value": actual_val})
         return json.dumps(res, indent=2)
     except Exception as e:
         return f"Erreur LOM: {e}"
 
 @mcp.tool()
-def get_session_info() -> str:
-    """Résumé rapide de la session Ableton."""
+async def batch_get(paths: List[str]) -> str:
+    """Lecture groupée du LOM en un seul aller-retour.
+    Accepte les jokers et projections : "song.tracks[*].mixer_device.volume.value",
+    "song.tracks[*].{name,arm,output_meter_level}". Retourne un dict chemin -> valeur
+    (ou {"error": ...} pour un chemin invalide)."""
+    try:
+        return json.dumps(await get_conn().send_command("batch_get", {"paths": paths}), indent=2)
+    except Exception as e:
+        return f"Erreur LOM: {e}"
+
+@mcp.tool()
+async def get_session_info(since_version: Optional[int] = None) -> str:
+    """Instantané structuré de la session Ableton (pistes, retours, Master, scènes, clips, devices, paramètres).
+    Chaque réponse porte un numéro de "version" : en le repassant dans since_version, on ne reçoit
+    que les éléments modifiés ("changes") et supprimés ("removed") depuis cette version."""
     try:
-        return json.dumps(get_conn().send_command("get_session_info"), indent=2)
+        params = {"since_version": since_version} if since_version is not None else {}
+        return json.dumps(await get_conn().send_command("get_session_info", params), indent=2)
     except Exception as e:
         return str(e)
 
-# --- BOUCLE DE SURVEILLANCE ---
-def connection_monitor():
+@mcp.tool()
+async def get_cache_stats() -> str:
+    """Statistiques du cache de lectures LOM (succès, échecs, expirations, évictions, invalidations)."""
+    cache = get_conn().cache
+    if cache is None:
+        return "Cache LOM désactivé."
+    return json.dumps(cache.stats(), indent=2)
+
+@mcp.tool()
+async def get_connection_status() -> str:
+    """État de la liaison avec Ableton : disjoncteur (ouvert = commandes refusées sans attendre),
+    dernier battement de cœur (aller-retour, ticks et file d'attente du Remote Script)."""
+    conn = get_conn()
+    return json.dumps({"connected": conn.connected, "breaker": conn.breaker.stats(),
+                       "heartbeat": conn.heartbeat}, indent=2)
+
+@mcp.tool()
+async def cancel_queued_commands(tag: Optional[str] = None, lanes: Optional[List[str]] = None) -> str:
+    """Annule les commandes en attente dans la file de Live (et arrête les tâches longues visées).
+    Filtres : tag (étiquette donnée à l'envoi) et/ou lanes parmi "realtime", "interactive", "bulk".
+    Sans filtre, annule tout le travail de fond ("bulk" : notes, Browser, instantanés)."""
+    try:
+        res = await get_conn().cancel(tag=tag, lanes=lanes if lanes or tag is not None else ["bulk"])
+        return json.dumps(res, indent=2)
+    except Exception as e:
+        return f"Erreur d'annulation : {e}"
+
+@mcp.tool()
+async def get_performance_stats(reset: bool = False) -> str:
+    """Latences par type de commande (p50/p95/p99 en ms) étape par étape : connexion, envoi, attente dans
+    la file de Live, exécution sur le thread principal, transport ; remises en file (budget, focus).
+    Ajoute les mesures du planificateur de Live (temps passé et profondeur de file par tick).
+    reset=True remet les compteurs à zéro après lecture."""
+    conn = get_conn()
+    if conn.perf is None:
+        return "Mesures désactivées : appelle configure_performance_tracing(True) ou lance le serveur avec ABLETON_MCP_PERF=1."
+    stats = conn.perf.snapshot()
+    try:
+        stats["live_scheduler"] = await conn.send_command("configure_scheduler", {"reset_peaks": reset})
+    except Exception as e:
+        stats["live_scheduler"] = {"error": str(e)}
+    if reset:
+        conn.perf.reset()
+    return json.dumps(stats, indent=2)
+
+@mcp.tool()
+async def configure_performance_tracing(enabled: bool, export_path: Optional[str] = None) -> str:
+    """Active ou coupe la mesure des latences ; export_path ajoute chaque commande mesurée (JSON lines) à ce fichier."""
     conn = get_conn()
-    was_connected = False
-    while True:
-        is_connected = conn.check_connection()
-        if is_connected and not was_connected:
-            logger.info(f"✅ Remote Script AbletonMCP détecté sur le port {conn.port}")
-            was_connected = True
-        elif not is_connected and was_connected:
-            logger.warning("⚠️ Connexion perdue avec Ableton")
-            was_connected = False
-        time.sleep(5)
+    if conn.perf is not None:
+        conn.perf.close()
+    conn.perf = PerfRecorder(export_path) if enabled else None
+    return f"Mesures {'activées' if enabled else 'désactivées'}" + (f" (export : {export_path})" if enabled and export_path else "")
 
 # --- CHARGEMENT DYNAMIQUE DES MODULES ---
+_loader = None
+
+@mcp.tool()
+async def get_module_stats() -> str:
+    """Modules de fonctionnalités : état ("deferred" = outils annoncés depuis le manifeste, module pas encore
+    importé ; "loaded" ; "error"), durées d'import et d'enregistrement (ms), origine du chargement
+    (démarrage, premier outil appelé, rechargement) et outils fournis."""
+    return json.dumps(_loader.stats(), indent=2)
+
+@mcp.tool()
+async def reload_module(module_name: Optional[str] = None, ctx: Context = None) -> str:
+    """Recharge un module de fonctionnalités modifié sans redémarrer le serveur MCP.
+    Sans nom, recharge tous les modules dont le fichier a changé (et charge les nouveaux).
+    Retourne, par module, les durées d'import et les outils ajoutés, modifiés ou retirés."""
+    try:
+        report = _loader.reload(module_name)
+    except Exception as e:
+        return f"Erreur de rechargement : {e}"
+    if ctx is not None and any(r.get("added") or r.get("updated") or r.get("removed") for r in report.values()):
+        try:
+            await ctx.session.send_tool_list_changed()
+        except Exception as e:
+            logger.debug(f"Notification tools/list_changed non envoyée : {e}")
+    return json.dumps(report, indent=2) if report else "Aucun module modifié."
+
 def load_modules():
+    global _loader
     logger.info("📦 Chargement des modules de fonctionnalités...")
     modules_dir = os.path.join(BASE_DIR, "modules")
     
@@ -162,24 +183,12 @@ def load_modules():
         os.makedirs(modules_dir)
         with open(os.path.join(modules_dir, "__init__.py"), "w") as f: pass
 
-    loaded = 0
-    for filename in os.listdir(modules_dir):
-        if filename.endswith(".py") and not filename.startswith("__"):
-            module_name = filename[:-3]
-            try:
-                module = importlib.import_module(f"modules.{module_name}")
-                if hasattr(module, "register_tools"):
-                    module.register_tools(mcp, get_conn)
-                    logger.info(f"  ↳ ✅ {module_name}")
-                    loaded += 1
-            except Exception as e:
-                logger.error(f"  ↳ ❌ Erreur dans {module_name}: {str(e)}")
-    logger.info(f"🏁 Serveur MCP prêt ({loaded} modules)")
+    # Les outils des modules inchangés sont annoncés depuis le manifeste ; le module n'est importé qu'au premier appel
+    _loader = ToolLoader(mcp, get_conn, modules_dir, os.path.join(BASE_DIR, "tool_manifest.json"))
+    _loader.load()
 
 def main():
     load_modules()
-    monitor_thread = threading.Thread(target=connection_monitor, daemon=True)
-    monitor_thread.start()
     
     try:
         mcp.run()
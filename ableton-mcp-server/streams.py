@@ -0,0 +1,135 @@
+# streams.py
+# Tampons circulaires des flux poussés par le Remote Script (mètres, position de lecture, paramètres...)
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ~100 s d'historique à 10 Hz
+DEFAULT_CAPACITY = 1024
+
+
+class RingBuffer:
+    """Tampon circulaire de taille fixe : un horodatage et une ligne de valeurs par trame."""
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity, self.width = capacity, width
+        self._t = np.full(capacity, np.nan)
+        self._v = np.full((capacity, width), np.nan)
+        self._count = 0
+
+    def append(self, t: float, row: np.ndarray):
+        i = self._count % self.capacity
+        self._t[i] = t
+        self._v[i] = row
+        self._count += 1
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Horodatages et valeurs, du plus ancien au plus récent."""
+        n = len(self)
+        if self._count <= self.capacity:
+            return self._t[:n], self._v[:n]
+        start = self._count % self.capacity
+        return np.roll(self._t, -start), np.roll(self._v, -start, axis=0)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        t, v = self.ordered()
+        mask = t >= (now or time.time()) - seconds
+        return t[mask], v[mask]
+
+    def span(self) -> float:
+        """Durée (s) couverte par les données présentes."""
+        t, _ = self.ordered()
+        return float(t[-1] - t[0]) if len(t) > 1 else 0.0
+
+
+def _to_row(value: Any) -> np.ndarray:
+    items = value if isinstance(value, list) else [value]
+    return np.array([float(x) if isinstance(x, (int, float)) else np.nan for x in items])
+
+
+class StreamStore:
+    """Abonnements actifs et un tampon circulaire par propriété suivie.
+
+    Une propriété avec joker (song.tracks[*].output_meter_level) occupe une colonne par élément ;
+    si le nombre d'éléments change, son tampon repart de zéro.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._buffers: Dict[str, RingBuffer] = {}
+        self._subscriptions: Dict[int, List[str]] = {}
+        self._by_key: Dict[str, int] = {}
+
+    def register(self, key: str, sub_id: int, paths: List[str]):
+        with self._lock:
+            self._subscriptions[sub_id] = list(paths)
+            self._by_key[key] = sub_id
+
+    def subscription(self, key: str) -> Optional[int]:
+        return self._by_key.get(key)
+
+    def forget(self, key: str) -> Optional[int]:
+        with self._lock:
+            sub_id = self._by_key.pop(key, None)
+            self._subscriptions.pop(sub_id, None)
+            return sub_id
+
+    def reset(self):
+        """Les abonnements disparaissent avec la connexion ; les données déjà reçues sont gardées
+        (les fenêtres ne retiennent que les trames récentes, voir span)."""
+        with self._lock:
+            self._subscriptions.clear()
+            self._by_key.clear()
+
+    def ingest(self, event: Dict[str, Any]):
+        paths = self._subscriptions.get(event.get("subscription"))
+        if not paths:
+            return
+        t = float(event.get("t") or time.time())
+        with self._lock:
+            for path, value in zip(paths, event.get("values", [])):
+                row = _to_row(value)
+                buf = self._buffers.get(path)
+                if buf is None or buf.width != len(row):
+                    buf = self._buffers[path] = RingBuffer(self.capacity, len(row))
+                buf.append(t, row)
+
+    def span(self, path: str, seconds: Optional[float] = None) -> float:
+        """Durée (s) couverte par les trames reçues ; avec seconds, seulement par celles de cette fenêtre
+        (après une coupure, les trames d'avant ne comptent plus)."""
+        with self._lock:
+            buf = self._buffers.get(path)
+            if buf is None:
+                return 0.0
+            if seconds is None:
+                return buf.span()
+            t, _ = buf.window(seconds)
+            return float(t[-1] - t[0]) if len(t) > 1 else 0.0
+
+    def window(self, path: str, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            buf = self._buffers.get(path)
+            if buf is None:
+                return np.empty(0), np.empty((0, 0))
+            t, v = buf.window(seconds)
+            return t.copy(), v.copy()
+
+    def stats(self, path: str, seconds: float) -> Dict[str, Any]:
+        """Crête maintenue, moyenne, RMS et facteur de crête (dB) par colonne sur la fenêtre."""
+        t, v = self.window(path, seconds)
+        if len(t) == 0:
+            return {"frames": 0}
+        with np.errstate(all="ignore"):
+            peak = np.nanmax(v, axis=0)
+            mean = np.nanmean(v, axis=0)
+            rms = np.sqrt(np.nanmean(v * v, axis=0))
+            crest_db = np.where(rms > 0, 20.0 * np.log10(peak / rms), np.nan)
+        as_list = lambda a: [None if np.isnan(x) else round(float(x), 4) for x in a]
+        return {"frames": int(len(t)), "seconds": float(t[-1] - t[0]), "peak": as_list(peak),
+                "mean": as_list(mean), "rms": as_list(rms), "crest_db": as_list(crest_db)}
@@ -0,0 +1,303 @@
+# ableton-mcp-server/tool_loader.py
+import asyncio
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+import typing
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("AbletonUniversalServer")
+
+# Format du manifeste : à incrémenter si la description des outils change
+MANIFEST_VERSION = 1
+# Noms autorisés dans les annotations sérialisées (les modules n'utilisent que des types simples)
+_ANNOTATION_NAMES = {name: getattr(typing, name) for name in ("Any", "Dict", "List", "Optional", "Tuple", "Union")}
+_ANNOTATION_NAMES.update(str=str, int=int, float=float, bool=bool, list=list, dict=dict, NoneType=type(None))
+
+
+class _ToolCapture:
+    """Tient le rôle de l'instance FastMCP pendant register_tools : collecte les fonctions décorées par @mcp.tool()."""
+
+    def __init__(self):
+        self.tools: Dict[str, Any] = {}
+
+    def tool(self, name: Optional[str] = None, description: Optional[str] = None, **kwargs):
+        def decorator(fn):
+            self.tools[name or fn.__name__] = (fn, description)
+            return fn
+        return decorator
+
+
+def _annotation(annotation) -> Optional[str]:
+    return None if annotation is inspect.Parameter.empty else inspect.formatannotation(annotation)
+
+
+def _evaluate(annotation: Optional[str]):
+    return inspect.Parameter.empty if annotation is None else eval(annotation, {"__builtins__": {}}, _ANNOTATION_NAMES)
+
+
+def _describe(name: str, fn, description: Optional[str]) -> Dict[str, Any]:
+    """Schéma d'un outil sous forme JSON : nom, description, paramètres (annotation, défaut) et type de retour."""
+    signature = inspect.signature(fn)
+    params = []
+    for p in signature.parameters.values():
+        param = {"name": p.name, "kind": p.kind.name, "annotation": _annotation(p.annotation)}
+        if p.default is not p.empty:
+            param["default"] = p.default
+        params.append(param)
+    return {"name": name, "doc": description or fn.__doc__ or "", "params": params,
+            "returns": _annotation(signature.return_annotation)}
+
+
+def _signature(spec: Dict[str, Any]) -> inspect.Signature:
+    """Reconstruit la signature d'un outil à partir du manifeste, sans importer son module."""
+    params = [inspect.Parameter(p["name"], getattr(inspect.Parameter, p["kind"]),
+                                default=p.get("default", inspect.Parameter.empty),
+                                annotation=_evaluate(p["annotation"]))
+              for p in spec["params"]]
+    return inspect.Signature(params, return_annotation=_evaluate(spec["returns"]))
+
+
+def _cacheable(spec: Dict[str, Any], fn) -> bool:
+    """Vrai si le schéma survit à un aller-retour JSON (sinon le module est toujours importé au démarrage)."""
+    try:
+        return _signature(json.loads(json.dumps(spec))) == inspect.signature(fn)
+    except Exception:
+        return False
+
+
+class ToolLoader:
+    """Chargement différé des modules de fonctionnalités (modules/*.py).
+
+    Le manifeste (tool_manifest.json) garde, pour chaque module, l'empreinte de son fichier et le schéma
+    de ses outils. Au démarrage, un module dont l'empreinte n'a pas changé n'est pas importé : ses outils
+    sont annoncés à FastMCP depuis le manifeste, via des mandataires qui importent le module au premier
+    appel. Un module nouveau ou modifié est importé tout de suite et le manifeste mis à jour.
+    Les outils enregistrés sont toujours des mandataires : reload() remplace les fonctions sans redémarrer
+    le processus, et ne réenregistre auprès de FastMCP que les outils dont le schéma a changé.
+    """
+
+    def __init__(self, mcp, get_conn, modules_dir: str, manifest_path: str):
+        self.mcp = mcp
+        self.get_conn = get_conn
+        self.modules_dir = modules_dir
+        self.manifest_path = manifest_path
+        self.package = os.path.basename(modules_dir)
+        self._manifest: Dict[str, Any] = self._read_manifest()
+        self._dirty = False
+        self._modules: Dict[str, Dict[str, Any]] = {}
+        self._functions: Dict[str, Dict[str, Any]] = {}
+        self._registered: Dict[str, List[Dict[str, Any]]] = {}
+        self._owners: Dict[str, str] = {}
+        self._import_locks: Dict[str, asyncio.Lock] = {}
+
+    # --- Manifeste ---
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION and data.get("python") == list(sys.version_info[:2]):
+                return data.get("modules", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Manifeste des outils illisible, reconstruction : {e}")
+        return {}
+
+    def _write_manifest(self):
+        if not self._dirty:
+            return
+        data = {"version": MANIFEST_VERSION, "python": list(sys.version_info[:2]), "modules": self._manifest}
+        try:
+            tmp = self.manifest_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.manifest_path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"⚠️ Manifeste des outils non enregistré : {e}")
+
+    def discover(self) -> List[str]:
+        return sorted(f[:-3] for f in os.listdir(self.modules_dir) if f.endswith(".py") and not f.startswith("__"))
+
+    def _digest(self, module_name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.modules_dir, module_name + ".py"), "rb") as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    # --- Chargement ---
+    def load(self):
+        """Annonce les outils de tous les modules : depuis le manifeste si possible, sinon par import."""
+        names = self.discover()
+        for stale in set(self._manifest) - set(names):
+            del self._manifest[stale]
+            self._dirty = True
+        deferred = 0
+        for module_name in names:
+            digest = self._digest(module_name)
+            entry = self._manifest.get(module_name)
+            if entry and entry["digest"] == digest and entry["cacheable"]:
+                try:
+                    self._sync_tools(module_name, entry["tools"], {s["name"]: _signature(s) for s in entry["tools"]})
+                    self._modules[module_name] = {"state": "deferred", "digest": digest, "loads": 0}
+                    if entry["tools"]:
+                        logger.info(f"  ↳ 💤 {module_name} (différé, {len(entry['tools'])} outils)")
+                        deferred += 1
+                    continue
+                except Exception as e:
+                    logger.warning(f"⚠️ Entrée du manifeste invalide pour {module_name} : {e}")
+            self._load_now(module_name, trigger="startup")
+        self._write_manifest()
+        loaded = sum(1 for name in names if self._manifest.get(name, {}).get("tools"))
+        logger.info(f"🏁 Serveur MCP prêt ({loaded} modules, dont {deferred} différés)")
+
+    def _import(self, module_name: str, reload: bool) -> Dict[str, Any]:
+        """Importe (ou recharge) un module et collecte ses outils. Ne touche pas à l'état du chargeur :
+        peut tourner dans un thread de travail."""
+        qualified = f"{self.package}.{module_name}"
+        digest = self._digest(module_name)
+        started = time.perf_counter()
+        module = sys.modules.get(qualified)
+        module = importlib.reload(module) if reload and module is not None else importlib.import_module(qualified)
+        imported = time.perf_counter()
+        capture = _ToolCapture()
+        if hasattr(module, "register_tools"):
+            module.register_tools(capture, self.get_conn)
+        registered = time.perf_counter()
+        functions = {name: fn for name, (fn, _) in capture.tools.items()}
+        specs = [_describe(name, fn, description) for name, (fn, description) in capture.tools.items()]
+        return {"digest": digest, "functions": functions, "specs": specs,
+                "cacheable": all(_cacheable(spec, functions[spec["name"]]) for spec in specs),
+                "import_ms": round((imported - started) * 1000.0, 3),
+                "register_ms": round((registered - imported) * 1000.0, 3)}
+
+    def _apply(self, module_name: str, result: Dict[str, Any], trigger: str) -> Dict[str, Any]:
+        """Installe les fonctions importées, met à jour FastMCP et le manifeste ; renvoie les outils modifiés."""
+        functions = result["functions"]
+        signatures = {name: inspect.signature(fn) for name, fn in functions.items()}
+        changes = self._sync_tools(module_name, result["specs"], signatures)
+        self._functions[module_name] = functions
+        previous = self._modules.get(module_name, {})
+        self._modules[module_name] = {"state": "loaded", "digest": result["digest"], "trigger": trigger,
+                                      "loads": previous.get("loads", 0) + 1, "loaded_at": time.time(),
+                                      "import_ms": result["import_ms"], "register_ms": result["register_ms"]}
+        entry = {"digest": result["digest"], "cacheable": result["cacheable"], "tools": result["specs"],
+                 "import_ms": result["import_ms"]}
+        if self._manifest.get(module_name) != entry:
+            self._manifest[module_name] = entry
+            self._dirty = True
+        return changes
+
+    def _load_now(self, module_name: str, trigger: str, reload: bool = False) -> Optional[Dict[str, Any]]:
+        try:
+            result = self._import(module_name, reload)
+        except Exception as e:
+            self._modules[module_name] = {"state": "error", "error": str(e), "trigger": trigger,
+                                          "digest": self._digest(module_name)}
+            logger.error(f"  ↳ ❌ Erreur dans {module_name}: {str(e)}")
+            return None
+        changes = self._apply(module_name, result, trigger)
+        if result["specs"]:
+            logger.info(f"  ↳ ✅ {module_name} ({result['import_ms']:.1f} ms import, {result['register_ms']:.1f} ms enregistrement)")
+        return changes
+
+    async def resolve(self, module_name: str, tool_name: str):
+        """Fonction réelle d'un outil ; importe son module au premier appel (dans un thread, sans bloquer la boucle)."""
+        functions = self._functions.get(module_name)
+        if functions is None:
+            lock = self._import_locks.setdefault(module_name, asyncio.Lock())
+            async with lock:
+                functions = self._functions.get(module_name)
+                if functions is None:
+                    result = await asyncio.to_thread(self._import, module_name, False)
+                    self._apply(module_name, result, trigger=tool_name)
+                    self._write_manifest()
+                    logger.info(f"📦 Import à la demande de {module_name} par {tool_name} ({result['import_ms']:.1f} ms)")
+                    functions = self._functions[module_name]
+        fn = functions.get(tool_name)
+        if fn is None:
+            raise RuntimeError(f"L'outil {tool_name} n'existe plus dans le module {module_name}")
+        return fn
+
+    # --- Enregistrement auprès de FastMCP ---
+    def _proxy(self, module_name: str, tool_name: str, doc: str, signature: inspect.Signature):
+        loader = self
+
+        async def proxy(**kwargs):
+            result = (await loader.resolve(module_name, tool_name))(**kwargs)
+            return await result if inspect.isawaitable(result) else result
+        proxy.__name__ = tool_name
+        proxy.__doc__ = doc
+        proxy.__signature__ = signature
+        return proxy
+
+    def _sync_tools(self, module_name: str, specs: List[Dict[str, Any]], signatures: Dict[str, inspect.Signature]) -> Dict[str, List[str]]:
+        """Aligne les outils annoncés par FastMCP sur specs : ajoute, remplace (schéma modifié) ou retire."""
+        previous = {spec["name"]: spec for spec in self._registered.get(module_name, [])}
+        changes = {"added": [], "updated": [], "removed": []}
+        for spec in specs:
+            name = spec["name"]
+            old = previous.pop(name, None)
+            if old == spec:
+                continue
+            owner = self._owners.get(name)
+            if owner is not None and owner != module_name:
+                logger.warning(f"⚠️ Outil {name} déjà fourni par {owner}, ignoré dans {module_name}")
+                continue
+            if old is not None:
+                self.mcp.remove_tool(name)
+            self.mcp.add_tool(self._proxy(module_name, name, spec["doc"], signatures[name]), name=name, description=spec["doc"])
+            self._owners[name] = module_name
+            changes["updated" if old is not None else "added"].append(name)
+        for name in previous:
+            self.mcp.remove_tool(name)
+            self._owners.pop(name, None)
+            changes["removed"].append(name)
+        self._registered[module_name] = [spec for spec in specs if self._owners.get(spec["name"]) == module_name]
+        return changes
+
+    # --- Rechargement et statistiques ---
+    def reload(self, module_name: Optional[str] = None) -> Dict[str, Any]:
+        """Recharge un module (ou, sans nom, tous les modules dont le fichier a changé, et les nouveaux)."""
+        if module_name is not None:
+            if module_name not in self.discover():
+                raise ValueError(f"Module inconnu : {module_name}")
+            targets = [module_name]
+        else:
+            targets = [name for name in self.discover()
+                       if name not in self._modules or self._modules[name].get("digest") != self._digest(name)]
+        report = {}
+        for removed in set(self._registered) - set(self.discover()):
+            report[removed] = self._sync_tools(removed, [], {})
+            self._functions.pop(removed, None)
+            self._modules.pop(removed, None)
+            self._manifest.pop(removed, None)
+            self._dirty = True
+        for name in targets:
+            changes = self._load_now(name, trigger="reload", reload=True)
+            state = self._modules[name]
+            report[name] = {"error": state["error"]} if changes is None else \
+                {"import_ms": state["import_ms"], "register_ms": state["register_ms"], **changes}
+        self._write_manifest()
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        modules = {}
+        for name, state in sorted(self._modules.items()):
+            entry = self._manifest.get(name, {})
+            info = dict(state, tools=[spec["name"] for spec in self._registered.get(name, [])])
+            if state["state"] == "deferred" and "import_ms" in entry:
+                info["last_import_ms"] = entry["import_ms"]
+            modules[name] = info
+        return {"manifest": self.manifest_path,
+                "deferred": sum(1 for s in self._modules.values() if s["state"] == "deferred"),
+                "loaded": sum(1 for s in self._modules.values() if s["state"] == "loaded"),
+                "import_ms_total": round(sum(s.get("import_ms", 0.0) for s in self._modules.values()), 3),
+                "modules": modules}
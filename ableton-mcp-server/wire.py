@@ -0,0 +1,134 @@
+# ableton-mcp-server/wire.py
+import array
+import json
+import struct
+import sys
+from typing import Any, List, Optional
+
+# Trame : longueur du message (4 octets, big-endian) puis le message lui-même
+HEADER = struct.Struct(">I")
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return HEADER.pack(len(payload)) + payload
+
+
+class FrameDecoder:
+    """Découpe incrémentale du flux reçu d'Ableton en messages complets.
+
+    Chaque octet n'est copié qu'une fois dans le tampon : le décodage reste linéaire quelle que
+    soit la taille des réponses, et il n'y a ni plafond de taille ni délai d'abandon.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buf += data
+        frames = []
+        while len(self._buf) - self._pos >= HEADER.size:
+            start = self._pos + HEADER.size
+            end = start + HEADER.unpack_from(self._buf, self._pos)[0]
+            if len(self._buf) < end:
+                break
+            frames.append(bytes(self._buf[start:end]))
+            self._pos = end
+        if self._pos and self._pos * 2 >= len(self._buf):
+            del self._buf[:self._pos]
+            self._pos = 0
+        return frames
+
+
+# --- Encodage binaire (négocié par "hello") ---
+# Premier octet d'un message binaire (jamais le début d'un JSON)
+BINARY_MAGIC = b"\xb1"
+# Version de l'encodage binaire attendue du Remote Script (voir AbletonMCP/wire.py)
+WIRE_PROTOCOL = 3
+# En dessous, le descripteur coûte plus que les nombres écrits en JSON
+MIN_PACKED_LEN = 8
+_HEAD_LEN = struct.Struct("<I")
+_INT_KINDS = (("B", 0, 255), ("b", -128, 127), ("h", -2 ** 15, 2 ** 15 - 1), ("i", -2 ** 31, 2 ** 31 - 1))
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def encode_message(msg: Any, binary: bool = False) -> bytes:
+    """Message -> octets : JSON, ou binaire si le pair l'accepte et que le message contient des listes numériques.
+
+    Binaire : BINARY_MAGIC, longueur de l'en-tête (uint32 LE), en-tête JSON où chaque liste numérique
+    est remplacée par {"$a": [type, offset, nombre]}, puis les tableaux little-endian bout à bout.
+    Dans l'en-tête, les clés du message qui commencent par "$" en reçoivent un de plus ("$a" -> "$$a") :
+    un dict du message ne peut jamais être pris pour un descripteur.
+    """
+    if binary:
+        blobs: List[bytes] = []
+        header = _pack(msg, blobs, [0])
+        if blobs:
+            head = json.dumps(header).encode("utf-8")
+            return BINARY_MAGIC + _HEAD_LEN.pack(len(head)) + head + b"".join(blobs)
+    return json.dumps(msg).encode("utf-8")
+
+
+def decode_message(frame: bytes) -> Any:
+    if frame[:1] != BINARY_MAGIC:
+        return json.loads(frame.decode("utf-8"))
+    body = 1 + _HEAD_LEN.size + _HEAD_LEN.unpack_from(frame, 1)[0]
+    header = json.loads(frame[1 + _HEAD_LEN.size:body].decode("utf-8"))
+    return _unpack(header, memoryview(frame), body)
+
+
+def _array_kind(values: list) -> Optional[str]:
+    """Type de tableau le plus étroit qui restitue exactement les valeurs (None : rester en JSON)."""
+    if len(values) < MIN_PACKED_LEN:
+        return None
+    kinds = set(map(type, values))
+    if kinds == {bool}:
+        return "?"
+    if kinds <= {int}:
+        low, high = min(values), max(values)
+        return next((code for code, lo, hi in _INT_KINDS if lo <= low and high <= hi), None)
+    # Une liste mixte entiers/flottants reviendrait tout en flottants : elle reste en JSON
+    if kinds == {float}:
+        return "f" if array.array("f", values).tolist() == list(values) else "d"
+    return None
+
+
+def _escape(key: str) -> str:
+    return "$" + key if key.startswith("$") else key
+
+
+def _unescape(key: str) -> str:
+    return key[1:] if key.startswith("$$") else key
+
+
+def _pack(obj: Any, blobs: List[bytes], offset: List[int]) -> Any:
+    if isinstance(obj, dict):
+        return {_escape(k): _pack(v, blobs, offset) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        kind = _array_kind(obj)
+        if kind is None:
+            return [_pack(v, blobs, offset) for v in obj]
+        arr = array.array("B" if kind == "?" else kind, obj)
+        if _BIG_ENDIAN:
+            arr.byteswap()
+        data = arr.tobytes()
+        blobs.append(data)
+        ref = {"$a": [kind, offset[0], len(obj)]}
+        offset[0] += len(data)
+        return ref
+    return obj
+
+
+def _unpack(obj: Any, frame: memoryview, body: int) -> Any:
+    if isinstance(obj, dict):
+        if len(obj) == 1 and "$a" in obj:
+            kind, start, count = obj["$a"]
+            arr = array.array("B" if kind == "?" else kind)
+            arr.frombytes(frame[body + start:body + start + count * arr.itemsize])
+            if _BIG_ENDIAN:
+                arr.byteswap()
+            return [bool(v) for v in arr] if kind == "?" else arr.tolist()
+        return {_unescape(k): _unpack(v, frame, body) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_unpack(v, frame, body) for v in obj]
+    return obj
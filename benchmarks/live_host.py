@@ -0,0 +1,374 @@
+# benchmarks/live_host.py
+# Mesure le Remote Script et les outils MCP réels contre un hôte Live simulé (voir simlive/) :
+# débit de la file de commandes, coût des chemins LOM et des chargements depuis le Browser,
+# latence de send_command et de chaque outil, temps de blocage du thread principal par tick.
+# Usage : python benchmarks/live_host.py [--tracks 200] [--scenes 64] [--browser-items 100000]
+#                                        [--tick-ms 10] [--iterations 20] [--json resultats.json]
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import threading
+import time
+
+import simlive
+
+import AbletonMCP  # noqa: E402  (chemin ajouté par simlive)
+
+from connection import AbletonConnection  # noqa: E402  (chemin ajouté par simlive)
+from lom_cache import LomCache  # noqa: E402
+from perf import LatencyHistogram  # noqa: E402
+
+PORT = 9877
+
+
+class _ToolRegistry:
+    """Remplace FastMCP : collecte les outils déclarés par register_tools() de chaque module."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self, *args, **kwargs):
+        def decorator(fn):
+            self.tools[fn.__name__] = fn
+            return fn
+        return decorator
+
+
+class _SinkClient:
+    """Client factice branché directement sur le Remote Script : compte les réponses reçues."""
+    alive, binary, legacy = True, False, False
+
+    def __init__(self):
+        self.replies = 0
+        self.errors = 0
+        self.done = threading.Event()
+        self.expected = 0
+
+    def send(self, msg):
+        if msg.get("event"):
+            return
+        self.replies += 1
+        self.errors += msg.get("status") == "error"
+        if self.replies >= self.expected:
+            self.done.set()
+
+
+def _summary(samples_ms):
+    hist = LatencyHistogram()
+    for ms in samples_ms:
+        hist.record(ms)
+    return hist.summary()
+
+
+def _timed(fn, number):
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - started) / number * 1e6
+
+
+# --- Remote Script, sans réseau ---
+def bench_paths(host, number=20000):
+    surface, results = host.surface, {}
+    deep = len(host.song.tracks) * 3 // 4
+    paths = ("song.tempo", "song.tracks[%d].name" % deep, "song.tracks[%d].devices[2].parameters[5].value" % deep,
+             "song.tracks[0].clip_slots[3].has_clip", "song.master_track.mixer_device.volume.value")
+    for path in paths:
+        results[path] = host.run_on_main(lambda: _timed(lambda: surface._navigate_and_execute(path), number))
+    results["song.tracks[*].{name,mixer_device.volume.value} (read)"] = host.run_on_main(
+        lambda: _timed(lambda: surface._read_path("song.tracks[*].{name,mixer_device.volume.value}"), 200))
+    return results
+
+
+def check_path_observers(host):
+    """Modifie tour à tour chaque étape de chemins observés (sélection, clip remplacé, renommages, liste de
+    devices, valeur finale) : l'entrée correspondante du cache serveur doit être invalidée."""
+    surface, song, cache = host.surface, host.song, LomCache()
+    a, b, ia = song.tracks[-2], song.tracks[-1], len(song.tracks) - 2
+    slot = a.clip_slots[0]
+    saved = (song.view.selected_track, a.name, b.name, list(a.devices), slot.clip, slot.has_clip)
+
+    class _Invalidations:
+        alive = True
+
+        def send(self, msg):
+            cache.invalidate(msg.get("paths", ()))
+
+    def select(track):
+        song.view.selected_track = track
+
+    def rename(track, name):
+        track.name = name
+
+    def replace_clip():
+        if slot.has_clip:
+            slot.delete_clip()
+        slot.create_clip(16.0)
+
+    cases = [
+        ("song.view.selected_track.name", lambda: select(b)),
+        ("song.view.selected_track.name", lambda: rename(b, "Observed B")),
+        ("song.view.selected_track", lambda: rename(b, "Observed B2")),
+        ('song.tracks["Observed B2"].mute', lambda: rename(a, "Observed B2")),
+        ("song.tracks[%d].clip_slots[0].clip.length" % ia, replace_clip),
+        ("song.tracks[%d].clip_slots[0].clip.name" % ia, lambda: slot.delete_clip()),
+        ("song.tracks", lambda: rename(a, "Observed A")),
+        ("song.tracks[%d].devices[0].parameters[1].value" % ia, lambda: setattr(a, "devices", a.devices[1:])),
+        ("song.tracks[%d].mixer_device.volume.value" % ia, lambda: setattr(a.mixer_device.volume, "value", 0.3)),
+    ]
+
+    def run():
+        client, stale = _Invalidations(), []
+        select(a)
+        replace_clip()
+        for path, change in cases:
+            epoch = cache.begin()
+            observed = surface._observers.observe(song, surface._lom.compile(path), client)
+            cache.put(path, surface._read_path(path), observed, epoch)
+            change()
+            if not observed or cache.get(path)[0]:
+                stale.append(path)
+        surface._observers.drop_client(client)
+        surface._observers.flush()
+        song.view.selected_track, a.name, b.name, a.devices = saved[:4]
+        slot.clip, slot.has_clip = saved[4:]
+        return stale
+    stale = host.run_on_main(run)
+    if stale:
+        raise AssertionError("Chemins observés restés en cache : " + ", ".join(stale))
+    return {"checked": len(cases), "invalidated": len(cases)}
+
+
+def bench_browser(host):
+    surface, song = host.surface, host.song
+    started = time.perf_counter()
+    host.run_on_main(lambda: list(surface._browser_index.building()))
+    results = {"index_build_ms": (time.perf_counter() - started) * 1000.0, "items": len(surface._browser_index.entries)}
+    # Les devices chargés s'empilent sur la piste sélectionnée : on travaille sur la dernière piste, vidée ensuite
+    scratch = song.tracks[-1]
+    previous, song.view.selected_track = song.view.selected_track, scratch
+    load = surface._load_device_by_name
+    # Chargements et recherches sont des tâches longues (générateurs) : on les déroule jusqu'au bout
+    results["load_device_exact_us"] = host.run_on_main(lambda: _timed(lambda: list(load({"device_name": "Auto Filter"})), 200))
+    results["load_device_partial_us"] = host.run_on_main(lambda: _timed(lambda: list(load({"device_name": "glassy"})), 20))
+    results["load_sample_us"] = host.run_on_main(lambda: _timed(lambda: list(surface._load_sample({"sample_name": "Kick 01"})), 200))
+    results["search_browser_us"] = host.run_on_main(
+        lambda: _timed(lambda: list(surface._search_browser({"query": "warm pad", "limit": 10})), 50))
+    scratch.devices, song.view.selected_track = [], previous
+    results["cache_roundtrip"] = check_cache_roundtrip(host)
+    return results
+
+
+def check_cache_roundtrip(host, sample=500):
+    """Écrit le cache disque de l'index, le relit dans un index neuf et résout des entrées depuis ce cache :
+    chaque entrée doit redonner le même BrowserItem que le parcours du Browser."""
+    index = host.surface._browser_index
+    host.run_on_main(lambda: index._write_cache(background=False))
+    fresh = AbletonMCP.browser_index.BrowserIndex(index._get_browser, host.log, cache_path=index._cache_path)
+    fresh._read_cache()
+    host.run_on_main(fresh._adopt_cache)
+    step = max(1, len(index.entries) // sample)
+    entries = index.entries[::step]
+    resolved = host.run_on_main(lambda: sum(
+        1 for e in entries if fresh.resolve(fresh.find(AbletonMCP.entry_id(e))) is index._items[(e[1], e[2])]))
+    if resolved != len(entries):
+        raise AssertionError(f"Cache du Browser : {len(entries) - resolved}/{len(entries)} entrées non résolues")
+    return {"checked": len(entries), "resolved": resolved}
+
+
+def bench_queue(host, count=5000):
+    """Débit de _process_queue : requêtes injectées comme si elles arrivaient du réseau."""
+    surface, client = host.surface, _SinkClient()
+    client.expected = count
+    tracks = min(100, len(host.song.tracks))
+    requests = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            requests.append({"type": "universal_accessor", "params": {"action": "get", "path": "song.tracks[%d].name" % (i % tracks)}})
+        elif kind == 1:
+            requests.append({"type": "universal_accessor", "params": {"action": "set", "value": 0.5 + (i % 10) / 100.0,
+                                                                      "path": "song.tracks[%d].mixer_device.volume.value" % (i % tracks)}})
+        else:
+            requests.append({"type": "batch_get", "params": {"paths": ["song.tempo", "song.tracks[%d].devices[0].parameters[1].value" % (i % tracks)]}})
+    host.reset_tick_stats()
+    ticks, started = host.ticks, time.perf_counter()
+    for i, req in enumerate(requests):
+        req.update(id=i, reply="result")
+        surface._process_request(client, req)
+    client.done.wait(120.0)
+    elapsed = time.perf_counter() - started
+    return {"commands": count, "errors": client.errors, "seconds": elapsed, "commands_per_sec": count / elapsed,
+            "ticks": host.ticks - ticks, "main_thread": host.tick_stats()}
+
+
+# --- Serveur MCP, de bout en bout ---
+async def bench_send_command(host, conn, sequential=500, concurrent=2000):
+    results, tracks = {}, min(100, len(host.song.tracks))
+    samples = []
+    for i in range(sequential):
+        started = time.perf_counter()
+        await conn.send_command("universal_accessor", {"action": "get", "path": "song.tracks[%d].name" % (i % tracks)})
+        samples.append((time.perf_counter() - started) * 1000.0)
+    results["get_sequential"] = _summary(samples)
+
+    host.reset_tick_stats()
+    started = time.perf_counter()
+    await asyncio.gather(*[conn.send_command("universal_accessor", {"action": "get", "path": "song.tracks[%d].name" % (i % tracks)})
+                           for i in range(concurrent)])
+    elapsed = time.perf_counter() - started
+    results["get_concurrent"] = {"commands": concurrent, "commands_per_sec": concurrent / elapsed, "main_thread": host.tick_stats()}
+
+    for label, params in (("get_session_info_full", {}), ("get_session_info_delta", None)):
+        samples = []
+        for _ in range(10):
+            if params is None:
+                version = (await conn.send_command("get_session_info"))["version"]
+                started = time.perf_counter()
+                await conn.send_command("get_session_info", {"since_version": version})
+            else:
+                started = time.perf_counter()
+                await conn.send_command("get_session_info", params)
+            samples.append((time.perf_counter() - started) * 1000.0)
+        results[label] = _summary(samples)
+    return results
+
+
+def _prepare_song(song, scenes):
+    """Pistes 0 à 3 vidées de leurs clips, puis les clips attendus par les outils mesurés."""
+    for track in song.tracks[:4]:
+        for slot in track.clip_slots:
+            if slot.has_clip:
+                slot.delete_clip()
+    song.tracks[0].clip_slots[0].create_clip(16.0)
+    song.tracks[0].clip_slots[1].create_clip(16.0)
+    song.tracks[0].clip_slots[2].create_clip(16.0)
+    song.tracks[1].clip_slots[0].create_clip(8.0)
+
+
+def tool_cases(scenes):
+    notes = [{"pitch": 36 + (i * 7) % 48, "start": i * 0.25, "dur": 0.2, "vel": 100} for i in range(64)]
+    sync = lambda i: [{"pitch": 48 + (j + i) % 24, "start": j * 0.0625, "dur": 0.05, "vel": 90} for j in range(256)]
+    actions = [{"get": "song.tempo"}] + [{"set": "song.tracks[%d].mixer_device.volume.value" % t, "value": 0.7} for t in range(9)]
+    return [
+        ("core_tools", "set_tempo", lambda i: (120.0 + i % 8,)),
+        ("core_tools", "get_clip_length", lambda i: (0, 0)),
+        ("core_tools", "create_clip", lambda i: (2, (3 + i) % scenes, 4.0)),
+        ("core_tools", "add_notes_to_clip", lambda i: (0, 0, notes)),
+        ("core_tools", "sync_notes_in_clip", lambda i: (0, 1, sync(i))),
+        ("core_tools", "clear_midi_notes", lambda i: (0, 0)),
+        ("core_tools", "batch_multiple_ableton_actions", lambda i: (actions,)),
+        ("core_tools", "load_instrument", lambda i: (3, "Operator")),
+        ("browser", "search_browser", lambda i: ("warm pad",)),
+        ("sound_design", "add_audio_effect", lambda i: (3, "Reverb")),
+        ("sound_design", "tweak_effect_parameter", lambda i: (1, "Auto Filter", "Frequency", (i % 10) / 10.0)),
+        ("sound_design", "apply_lowpass_filter", lambda i: (3, 800.0, 0.3)),
+        ("chords", "generate_chord_progression", lambda i: (0, 2, ("jazz", "pop", "trip-hop")[i % 3])),
+        ("automation", "draw_automation_shape", lambda i: (1, 0, "Auto Filter", "Frequency", "wobble", 8.0)),
+        ("modulation", "modulate_parameter", lambda i: (1, "Auto Filter", "Resonance", "lfo")),
+        ("arrangement", "create_variation_from_scene", lambda i: (0, "Variation %d" % i, [0, 1])),
+        ("audio", "load_sample", lambda i: (2, 0, "Kick 01")),
+    ]
+
+
+async def bench_tools(host, conn, iterations):
+    registry = _ToolRegistry()
+    for module in sorted({case[0] for case in tool_cases(1)}):
+        importlib.import_module("modules." + module).register_tools(registry, lambda: conn)
+    _prepare_song(host.song, len(host.song.scenes))
+    results = {}
+    for module, name, args in tool_cases(len(host.song.scenes)):
+        tool, samples, errors = registry.tools[name], [], 0
+        host.reset_tick_stats()
+        started = time.perf_counter()
+        for i in range(iterations):
+            t0 = time.perf_counter()
+            out = await tool(*args(i))
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            errors += "Erreur" in str(out) or str(out).startswith("❌")
+        elapsed = time.perf_counter() - started
+        results[name] = {"module": module, "calls": iterations, "errors": errors, "calls_per_sec": iterations / elapsed,
+                         "latency_ms": _summary(samples), "main_thread": host.tick_stats()}
+    await conn.send_command("stop_modulation", {"restore": True})
+    return results
+
+
+async def bench_server(host, iterations):
+    conn = AbletonConnection("localhost", PORT, cache_enabled=False)
+    return {"send_command": await bench_send_command(host, conn), "tools": await bench_tools(host, conn, iterations)}
+
+
+# --- Rapport ---
+def print_report(report):
+    setup = report["setup"]
+    print(f"Hôte simulé : {setup['tracks']} pistes × {setup['scenes']} scènes, Browser {setup['browser_items']} éléments, "
+          f"tick {setup['tick_ms']:g} ms (construction {setup['build_s']:.2f} s)")
+
+    print("\n_navigate_and_execute / lecture (µs par appel)")
+    for path, us in report["paths"].items():
+        print(f"  {path:<62}{us:>10.2f}")
+
+    observers = report["observers"]
+    print(f"  chemins observés : {observers['invalidated']}/{observers['checked']} invalidés à chaque étape modifiée")
+
+    browser = report["browser"]
+    print(f"\nBrowser : index de {browser['items']} éléments construit en {browser['index_build_ms']:.0f} ms")
+    for key in ("load_device_exact_us", "load_device_partial_us", "load_sample_us", "search_browser_us"):
+        print(f"  {key:<40}{browser[key]:>12.1f} µs")
+    print(f"  cache disque relu : {browser['cache_roundtrip']['resolved']}/{browser['cache_roundtrip']['checked']} entrées résolues")
+
+    queue = report["queue"]
+    main = queue["main_thread"]
+    print(f"\n_process_queue : {queue['commands']} commandes en {queue['seconds']:.2f} s ({queue['commands_per_sec']:.0f}/s, "
+          f"{queue['ticks']} ticks, {queue['errors']} erreurs) | tick p50 {main['p50_ms']:.2f} ms, p99 {main['p99_ms']:.2f} ms, "
+          f"max {main['max_ms']:.2f} ms")
+
+    send = report["server"]["send_command"]
+    print("\nsend_command (ms)")
+    for key in ("get_sequential", "get_session_info_full", "get_session_info_delta"):
+        s = send[key]
+        print(f"  {key:<28}p50 {s['p50']:>8.3f}  p95 {s['p95']:>8.3f}  p99 {s['p99']:>8.3f}  max {s['max']:>8.3f}")
+    conc = send["get_concurrent"]
+    print(f"  {'get_concurrent':<28}{conc['commands_per_sec']:.0f} commandes/s (tick max {conc['main_thread']['max_ms']:.2f} ms)")
+
+    print(f"\n{'outil':<32}{'appels/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'tick max':>10}{'blocage':>10}{'err':>5}")
+    for name, r in report["server"]["tools"].items():
+        lat, main = r["latency_ms"], r["main_thread"]
+        print(f"{name:<32}{r['calls_per_sec']:>10.1f}{lat['p50']:>10.2f}{lat['p95']:>10.2f}{lat['p99']:>10.2f}"
+              f"{main.get('max_ms', 0.0):>10.2f}{main.get('total_ms', 0.0):>10.1f}{r['errors']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tracks", type=int, default=200)
+    parser.add_argument("--scenes", type=int, default=64)
+    parser.add_argument("--browser-items", type=int, default=100000)
+    parser.add_argument("--tick-ms", type=float, default=10.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", help="écrit aussi les résultats dans ce fichier")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    started = time.perf_counter()
+    song = simlive.build_song(tracks=args.tracks, scenes=args.scenes)
+    browser = simlive.build_browser(items=args.browser_items)
+    report = {"setup": {"tracks": args.tracks, "scenes": args.scenes, "browser_items": args.browser_items,
+                        "tick_ms": args.tick_ms, "build_s": time.perf_counter() - started}}
+
+    with simlive.SimulatedHost(song, browser, tick_ms=args.tick_ms) as host:
+        report["paths"] = bench_paths(host)
+        report["observers"] = check_path_observers(host)
+        report["browser"] = bench_browser(host)
+        report["queue"] = bench_queue(host)
+        report["server"] = asyncio.run(bench_server(host, args.iterations))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# benchmarks/simlive/__init__.py
+# Hôte Live simulé pour mesurer le Remote Script et le serveur MCP sans Ableton.
+import os
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(_HERE, "..", ".."))
+for _path in (os.path.join(_HERE, "stubs"), ROOT, os.path.join(ROOT, "ableton-mcp-server")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from .lom import build_song, build_browser  # noqa: E402
+from .host import SimulatedHost  # noqa: E402
+
+__all__ = ["SimulatedHost", "build_song", "build_browser"]
@@ -0,0 +1,139 @@
+# benchmarks/simlive/host.py
+# Hôte Live simulé : démarre le vrai Remote Script sur un LOM synthétique et l'anime avec une horloge de ticks.
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from . import lom
+
+import Live  # module de remplacement (simlive/stubs), placé dans sys.path par simlive/__init__.py
+
+
+class _CInstance(object):
+    """c_instance minimal transmis par Live au Remote Script."""
+
+    def __init__(self, host):
+        self._host = host
+
+    def song(self):
+        return self._host.song
+
+    def application(self):
+        return Live.Application.get_application()
+
+    def log_message(self, message):
+        self._host.log(message)
+
+
+class SimulatedHost(object):
+    """Remote Script AbletonMCP exécuté hors de Live.
+
+    Un thread joue le rôle du thread principal : toutes les `tick_ms` millisecondes il exécute les
+    messages programmés (schedule_message) puis update_display, et mesure le temps passé dans chaque
+    tick (temps pendant lequel Live serait bloqué). L'index du Browser est mis en cache dans un
+    dossier temporaire, jamais dans celui de l'utilisateur.
+    """
+
+    def __init__(self, song=None, browser=None, tick_ms=10.0, verbose=False):
+        self.song = song if song is not None else lom.build_song()
+        self.browser = browser if browser is not None else lom.build_browser()
+        self.browser.song = self.song
+        self.tick_interval = tick_ms / 1000.0
+        self.verbose = verbose
+        self.surface = None
+        self.ticks = 0
+        self.tick_times = []
+        self._calls = []
+        self._calls_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._cache_dir = None
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    # --- Cycle de vie ---
+    def start(self):
+        import AbletonMCP
+        self._cache_dir = tempfile.mkdtemp(prefix="abletonmcp-bench-")
+        AbletonMCP.BrowserIndex = functools.partial(AbletonMCP.browser_index.BrowserIndex,
+                                                    cache_path=os.path.join(self._cache_dir, "browser_index.json"))
+        Live.Application._app = lom.LomObject(browser=self.browser)
+        self.surface = AbletonMCP.create_instance(_CInstance(self))
+        self._running = True
+        self._thread = threading.Thread(target=self._main_loop, name="LiveMainThread")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        if self.surface is not None:
+            self.surface.disconnect()
+            self.surface = None
+        if self._cache_dir is not None:
+            shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Thread principal simulé ---
+    def _main_loop(self):
+        next_tick = time.perf_counter()
+        while self._running:
+            started = time.perf_counter()
+            with self._calls_lock:
+                calls, self._calls = self._calls, []
+            for call in calls:
+                call()
+            self.surface.tick()
+            spent = time.perf_counter() - started
+            self.ticks += 1
+            self.tick_times.append(spent)
+            next_tick += self.tick_interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+            # Un tick trop long décale l'horloge au lieu d'enchaîner des ticks en rafale
+            next_tick = max(next_tick, time.perf_counter() - self.tick_interval)
+
+    def run_on_main(self, fn, timeout=120.0):
+        """Exécute fn() au début du prochain tick, sur le thread principal simulé, et renvoie son résultat."""
+        done, box = threading.Event(), {}
+
+        def call():
+            try:
+                box["value"] = fn()
+            except Exception as e:
+                box["error"] = e
+            done.set()
+        with self._calls_lock:
+            self._calls.append(call)
+        if not done.wait(timeout):
+            raise TimeoutError("Main thread did not run the call")
+        if "error" in box:
+            raise box["error"]
+        return box["value"]
+
+    def wait_ticks(self, count=1):
+        target = self.ticks + count
+        while self.ticks < target:
+            time.sleep(self.tick_interval / 4)
+
+    def reset_tick_stats(self):
+        self.tick_times = []
+
+    def tick_stats(self):
+        """Temps passé par tick sur le thread principal (ms) : centiles, maximum, total et nombre de ticks."""
+        times = sorted(t * 1000.0 for t in self.tick_times)
+        if not times:
+            return {"ticks": 0}
+        pick = lambda q: times[min(len(times) - 1, int(q * len(times)))]
+        return {"ticks": len(times), "p50_ms": pick(0.5), "p99_ms": pick(0.99), "max_ms": times[-1], "total_ms": sum(times)}
@@ -0,0 +1,279 @@
+# benchmarks/simlive/lom.py
+# Live Object Model synthétique : morceau (pistes, scènes, clips, devices) et Browser de grande taille.
+import itertools
+import random
+
+_ptrs = itertools.count(1)
+_note_ids = itertools.count(1)
+
+
+class LomObject(object):
+    """Objet du LOM simulé : chaque propriété est observable (add_<prop>_listener...) comme dans Live."""
+
+    def __init__(self, **props):
+        object.__setattr__(self, "_listeners", {})
+        object.__setattr__(self, "_live_ptr", next(_ptrs))
+        for key, value in props.items():
+            object.__setattr__(self, key, value)
+
+    def __getattr__(self, name):
+        listeners = self.__dict__["_listeners"]
+        if name.startswith("add_") and name.endswith("_listener"):
+            return lambda cb, prop=name[4:-9]: listeners.setdefault(prop, []).append(cb)
+        if name.startswith("remove_") and name.endswith("_listener"):
+            return lambda cb, prop=name[7:-9]: listeners.get(prop, []).remove(cb)
+        if name.endswith("_has_listener"):
+            return lambda cb, prop=name[:-13]: cb in listeners.get(prop, ())
+        raise AttributeError(name)
+
+    def __setattr__(self, key, value):
+        object.__setattr__(self, key, value)
+        for cb in list(self._listeners.get(key, ())):
+            cb()
+
+
+class DeviceParameter(LomObject):
+    pass
+
+
+class Device(LomObject):
+    pass
+
+
+class Note(object):
+    __slots__ = ("note_id", "pitch", "start_time", "duration", "velocity", "mute")
+
+    def __init__(self, spec):
+        self.note_id = next(_note_ids)
+        self.pitch, self.start_time, self.duration = spec.pitch, spec.start_time, spec.duration
+        self.velocity, self.mute = float(spec.velocity), bool(spec.mute)
+
+
+class Envelope(object):
+    def __init__(self):
+        self.steps = []
+
+    def insert_step(self, time, duration, value):
+        self.steps.append((time, duration, value))
+
+
+class Clip(LomObject):
+    def __init__(self, **props):
+        LomObject.__init__(self, **props)
+        object.__setattr__(self, "_notes", [])
+        object.__setattr__(self, "_envelopes", {})
+
+    def add_new_notes(self, specs):
+        notes = [Note(s) for s in specs]
+        self._notes.extend(notes)
+        self.notes = None
+        return [n.note_id for n in notes]
+
+    def get_notes_extended(self, from_pitch, pitch_span, from_time, time_span):
+        return [n for n in self._notes if from_pitch <= n.pitch < from_pitch + pitch_span
+                and from_time <= n.start_time < from_time + time_span]
+
+    def remove_notes_extended(self, from_pitch, pitch_span, from_time, time_span):
+        doomed = set(id(n) for n in self.get_notes_extended(from_pitch, pitch_span, from_time, time_span))
+        self._notes[:] = [n for n in self._notes if id(n) not in doomed]
+        self.notes = None
+
+    def remove_notes_by_id(self, note_ids):
+        doomed = set(note_ids)
+        self._notes[:] = [n for n in self._notes if n.note_id not in doomed]
+        self.notes = None
+
+    def apply_note_modifications(self, notes):
+        self.notes = None
+
+    def automation_envelope(self, param):
+        return self._envelopes.get(param._live_ptr)
+
+    def create_automation_envelope(self, param):
+        envelope = self._envelopes[param._live_ptr] = Envelope()
+        return envelope
+
+    def clear_envelope(self, param):
+        self._envelopes.pop(param._live_ptr, None)
+
+    def fire(self):
+        pass
+
+
+class ClipSlot(LomObject):
+    def create_clip(self, length):
+        if self.has_clip:
+            raise RuntimeError("Clip slot already has a clip")
+        self.clip = Clip(name="", length=float(length), is_midi_clip=True, looping=True, loop_start=0.0,
+                         loop_end=float(length), warping=False, pitch_coarse=0)
+        self.has_clip = True
+
+    def delete_clip(self):
+        self.clip, self.has_clip = None, False
+
+    def fire(self):
+        pass
+
+
+class Track(LomObject):
+    pass
+
+
+class Scene(LomObject):
+    pass
+
+
+class Song(LomObject):
+    def begin_undo_step(self):
+        pass
+
+    def end_undo_step(self):
+        pass
+
+    def create_midi_track(self, index=-1):
+        self._insert_track(index, midi=True)
+
+    def create_audio_track(self, index=-1):
+        self._insert_track(index, midi=False)
+
+    def _insert_track(self, index, midi):
+        tracks = list(self.tracks)
+        index = len(tracks) if index is None or index < 0 else index
+        tracks.insert(index, make_track(len(tracks), len(self.scenes), midi=midi))
+        self.tracks = tracks
+
+    def create_scene(self, index=-1):
+        index = len(self.scenes) if index is None or index < 0 else index
+        self.scenes = self.scenes[:index] + [Scene(name="", color=0)] + self.scenes[index:]
+        for track in self.tracks:
+            track.clip_slots = track.clip_slots[:index] + [ClipSlot(has_clip=False, clip=None)] + track.clip_slots[index:]
+
+    def duplicate_scene(self, index):
+        source = self.scenes[index]
+        self.scenes = self.scenes[:index + 1] + [Scene(name=source.name, color=source.color)] + self.scenes[index + 1:]
+        for track in self.tracks:
+            slot = track.clip_slots[index]
+            copy = ClipSlot(has_clip=False, clip=None)
+            if slot.has_clip:
+                copy.create_clip(slot.clip.length)
+            track.clip_slots = track.clip_slots[:index + 1] + [copy] + track.clip_slots[index + 1:]
+
+
+# --- Morceau synthétique ---
+DEVICE_TEMPLATES = (
+    ("Auto Filter", "AutoFilter", ("Frequency", "Resonance", "Filter Type", "LFO Amount", "LFO Rate", "Dry/Wet")),
+    ("EQ Eight", "Eq8", ("1 Frequency A", "1 Gain A", "2 Frequency A", "2 Gain A", "Output Gain", "Scale")),
+    ("Compressor", "Compressor2", ("Threshold", "Ratio", "Attack", "Release", "Output Gain", "Dry/Wet")),
+    ("Reverb", "Reverb", ("Decay Time", "Predelay", "Room Size", "High Cut", "Diffusion", "Dry/Wet")),
+    ("Operator", "Operator", ("Volume", "Transpose", "Filter Freq", "Filter Res", "Tone", "Spread")),
+)
+
+
+def make_device(name, class_name, param_names):
+    params = [DeviceParameter(name="Device On", value=1.0, min=0.0, max=1.0, is_quantized=True)]
+    params += [DeviceParameter(name=p, value=0.5, min=0.0, max=1.0, is_quantized=False) for p in param_names]
+    return Device(name=name, class_name=class_name, parameters=params)
+
+
+def make_track(index, scenes, midi=True, devices=3, clip_ratio=0.0, rng=None):
+    templates = DEVICE_TEMPLATES[:devices] if midi else DEVICE_TEMPLATES[1:devices + 1]
+    slots = [ClipSlot(has_clip=False, clip=None) for _ in range(scenes)]
+    for slot in slots:
+        if rng is not None and rng.random() < clip_ratio:
+            slot.create_clip(rng.choice((4.0, 8.0, 16.0)))
+    mixer = LomObject(volume=DeviceParameter(name="Track Volume", value=0.85, min=0.0, max=1.0),
+                      panning=DeviceParameter(name="Track Panning", value=0.0, min=-1.0, max=1.0))
+    return Track(name="%s %d" % ("MIDI" if midi else "Audio", index + 1), color=index % 70, mute=False, solo=False,
+                 arm=False, has_midi_input=midi, output_meter_level=0.0, mixer_device=mixer,
+                 devices=[make_device(*t) for t in templates], clip_slots=slots)
+
+
+def build_song(tracks=200, scenes=64, devices=3, clip_ratio=0.25, seed=1):
+    """Morceau de `tracks` pistes × `scenes` scènes, `devices` devices par piste, ~clip_ratio des slots remplis."""
+    rng = random.Random(seed)
+    track_list = [make_track(i, scenes, midi=i % 4 != 3, devices=devices, clip_ratio=clip_ratio, rng=rng) for i in range(tracks)]
+    master = make_track(0, 0, devices=1)
+    master.name = "Master"
+    returns = [make_track(i, 0, midi=False, devices=1) for i in range(2)]
+    song = Song(tracks=track_list, return_tracks=returns, master_track=master,
+                scenes=[Scene(name="Scene %d" % (i + 1), color=i % 70) for i in range(scenes)],
+                view=LomObject(selected_track=track_list[0]), tempo=120.0, signature_numerator=4,
+                signature_denominator=4, is_playing=False, current_song_time=0.0)
+    return song
+
+
+# --- Browser synthétique ---
+class BrowserItem(LomObject):
+    pass
+
+
+_ADJECTIVES = ("Warm", "Dusty", "Bright", "Dark", "Analog", "Glassy", "Deep", "Wide", "Punchy", "Soft",
+               "Gritty", "Airy", "Lush", "Vintage", "Crisp", "Hollow", "Metallic", "Smooth", "Tape", "Wobbly")
+_NOUNS = {
+    "audio_effects": ("Delay", "Chorus", "Saturator", "Phaser", "Glue", "Echo", "Flanger", "Gate", "Limiter", "Space"),
+    "instruments": ("Pad", "Lead", "Bass", "Pluck", "Keys", "Strings", "Brass", "Bell", "Arp", "Choir"),
+    "drums": ("Kit", "Rack", "Kick Rack", "Perc Kit", "Snare Rack", "Break Kit", "Tom Kit", "Hat Rack"),
+    "packs": ("Pad", "Bass", "Kit", "Texture", "Lead", "Drone", "Groove", "Riser"),
+    "samples": ("Kick", "Snare", "Hat", "Clap", "Loop", "Vox", "Shaker", "Rim", "Crash", "Fx"),
+    "user_library": ("Preset", "Chain", "Template", "Kick", "Loop", "Pad"),
+}
+_EXTENSIONS = {"audio_effects": ".adv", "instruments": ".adg", "drums": ".adg", "packs": ".adg",
+               "samples": ".wav", "user_library": ".adg"}
+# Éléments que les outils chargent par leur nom (toujours présents, comme dans une installation réelle)
+CORE_ITEMS = {
+    "audio_effects": ("Auto Filter.adv", "EQ Eight.adv", "Compressor.adv", "Reverb.adv", "Utility.adv"),
+    "instruments": ("Operator.adg", "Wavetable.adg", "Drift.adg"),
+    "drums": ("909 Core Kit.adg", "808 Core Kit.adg"),
+    "samples": ("Kick 01.wav", "Snare 01.wav", "80s Beat 90 bpm.wav"),
+}
+# Part de chaque catégorie dans le Browser
+_WEIGHTS = (("audio_effects", 0.05), ("instruments", 0.15), ("drums", 0.05), ("packs", 0.35),
+            ("samples", 0.3), ("user_library", 0.1))
+
+
+def _leaf(name, uri):
+    return BrowserItem(name=name, is_loadable=True, is_folder=False, is_device=not name.endswith(".wav"), children=[], uri=uri)
+
+
+def _folder(name, children, uri):
+    return BrowserItem(name=name, is_loadable=False, is_folder=True, is_device=False, children=children, uri=uri)
+
+
+def build_browser(items=100000, seed=2):
+    """Browser d'environ `items` éléments chargeables répartis en dossiers (catégorie / collection / sous-dossier)."""
+    rng = random.Random(seed)
+    roots = {}
+    for category, weight in _WEIGHTS:
+        count = int(items * weight)
+        nouns, ext = _NOUNS[category], _EXTENSIONS[category]
+        collections = []
+        per_folder, per_collection = 50, 500
+        for c in range(max(1, count // per_collection)):
+            subfolders = []
+            for f in range(per_collection // per_folder):
+                leaves = []
+                for i in range(per_folder):
+                    name = "%s %s %03d%s" % (rng.choice(_ADJECTIVES), rng.choice(nouns), rng.randrange(1000), ext)
+                    leaves.append(_leaf(name, "query:%s#%d-%d-%d" % (category, c, f, i)))
+                subfolders.append(_folder("Folder %d" % (f + 1), leaves, "query:%s#%d-%d" % (category, c, f)))
+            collections.append(_folder("Collection %d" % (c + 1), subfolders, "query:%s#%d" % (category, c)))
+        core = [_leaf(name, "query:%s#core-%d" % (category, i)) for i, name in enumerate(CORE_ITEMS.get(category, ()))]
+        roots[category] = _folder(category.replace("_", " ").title(), core + collections, "query:" + category)
+    return Browser(user_folders=[], **roots)
+
+
+class Browser(LomObject):
+    def __init__(self, **roots):
+        LomObject.__init__(self, **roots)
+        object.__setattr__(self, "loaded", [])
+        object.__setattr__(self, "song", None)
+
+    def load_item(self, item):
+        """Comme Live : un device chargé s'ajoute à la piste sélectionnée."""
+        self.loaded.append(item.name)
+        if self.song is None or not item.is_device:
+            return
+        track = self.song.view.selected_track
+        name = item.name.rsplit(".", 1)[0]
+        template = next((t for t in DEVICE_TEMPLATES if t[0] == name), (name, "PluginDevice", ("Macro 1", "Macro 2")))
+        track.devices = list(track.devices) + [make_device(name, template[1], template[2])]
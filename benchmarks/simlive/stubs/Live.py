@@ -0,0 +1,18 @@
+# benchmarks/simlive/stubs/Live.py
+# Module "Live" de remplacement : seulement ce que le Remote Script utilise (Application, Clip.MidiNoteSpecification).
+
+
+class Application(object):
+    _app = None
+
+    @staticmethod
+    def get_application():
+        return Application._app
+
+
+class Clip(object):
+    class MidiNoteSpecification(object):
+        __slots__ = ("pitch", "start_time", "duration", "velocity", "mute")
+
+        def __init__(self, pitch, start_time, duration, velocity=100, mute=False):
+            self.pitch, self.start_time, self.duration, self.velocity, self.mute = pitch, start_time, duration, velocity, mute
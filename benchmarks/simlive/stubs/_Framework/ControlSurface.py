@@ -0,0 +1,41 @@
+# benchmarks/simlive/stubs/_Framework/ControlSurface.py
+# ControlSurface de remplacement : schedule_message compte en ticks, tick() est appelé par l'horloge de l'hôte simulé.
+import threading
+
+
+class ControlSurface(object):
+    def __init__(self, c_instance):
+        self._c_instance = c_instance
+        self._scheduled = []
+        self._scheduled_lock = threading.Lock()
+
+    def song(self):
+        return self._c_instance.song()
+
+    def application(self):
+        return self._c_instance.application()
+
+    def log_message(self, *args):
+        self._c_instance.log_message(" ".join(str(a) for a in args))
+
+    def show_message(self, *args):
+        pass
+
+    def schedule_message(self, delay_in_ticks, callback, *args):
+        with self._scheduled_lock:
+            self._scheduled.append([max(1, int(delay_in_ticks)), callback, args])
+
+    def update_display(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def tick(self):
+        """Un tick du thread principal de Live : messages arrivés à échéance, puis rafraîchissement d'affichage."""
+        with self._scheduled_lock:
+            due = [s for s in self._scheduled if s[0] <= 1]
+            self._scheduled = [[d - 1, cb, a] for d, cb, a in self._scheduled if d > 1]
+        for _, callback, args in due:
+            callback(*args)
+        self.update_display()
@@ -0,0 +1,63 @@
+# benchmarks/wire_encoding.py
+# Compare l'encodage JSON et l'encodage binaire négocié (octets sur le fil, temps d'encodage/décodage).
+# Usage : python benchmarks/wire_encoding.py
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ableton-mcp-server"))
+
+from wire import encode_message, decode_message  # noqa: E402
+
+random.seed(7)
+
+
+def notes_payload(n=10000):
+    return {"id": 1, "type": "add_midi_notes", "params": {"track_index": 0, "clip_index": 0, "notes": {
+        "pitch": [random.randint(36, 96) for _ in range(n)],
+        "start": [i * 0.25 for i in range(n)],
+        "dur": [random.choice((0.25, 0.5, 1.0)) - 0.05 for _ in range(n)],
+        "vel": [random.randint(60, 127) for _ in range(n)],
+        "mute": [False] * n,
+    }}}
+
+
+def automation_payload(n=2000):
+    return {"id": 2, "type": "add_automation", "params": {"track_index": 0, "clip_index": 0, "points": {
+        "time": [i * 16.0 / n for i in range(n)],
+        "value": [random.random() for _ in range(n)],
+    }}}
+
+
+def meter_frame(tracks=16):
+    return {"event": "stream", "subscription": 1, "t": 1234.5678,
+            "values": [random.random(), [random.random() for _ in range(tracks)]]}
+
+
+CASES = [
+    ("notes (10 000)", notes_payload()),
+    ("automation (2 000 points)", automation_payload()),
+    ("meter frame (16 tracks)", meter_frame()),
+]
+
+
+def measure(msg, binary, number):
+    data = encode_message(msg, binary)
+    enc = min(timeit.repeat(lambda: encode_message(msg, binary), number=number, repeat=5)) / number
+    dec = min(timeit.repeat(lambda: decode_message(data), number=number, repeat=5)) / number
+    return len(data), enc * 1e6, dec * 1e6
+
+
+def main():
+    print(f"{'payload':<28}{'encoding':<10}{'bytes':>10}{'encode µs':>12}{'decode µs':>12}")
+    for name, msg in CASES:
+        number = 20 if "frame" not in name else 5000
+        assert decode_message(encode_message(msg, True)) == decode_message(encode_message(msg, False))
+        for label, binary in (("json", False), ("binary", True)):
+            size, enc, dec = measure(msg, binary, number)
+            print(f"{name:<28}{label:<10}{size:>10}{enc:>12.1f}{dec:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()